@@ -5,8 +5,10 @@ from configparser import ConfigParser, ExtendedInterpolation
 
 from leosTrack.utils.configfile import ConfigurationFile
 from leosTrack.output import OutputFile
-from leosTrack.tle import TLE
+from leosTrack.tle import TLE, TLE_MAX_AGE, TLE_URL
+from leosTrack.track import worker
 from leosTrack.track.adaptivetime import AdaptiveTime
+from leosTrack.track.interpolation import INTERPOLATION_TOLERANCE
 
 ###############################################################################
 from observatories import observatories
@@ -41,12 +43,19 @@ if __name__ == "__main__":
 
     # Set output directory
     output_directory = parser.get("directory", "output")
-    output_directory = f"{output_directory}/{satellite_brand}_{date}"
+    groups = "_".join(TLE.get_groups(satellite_brand))
+    output_directory = f"{output_directory}/{groups}_{date}"
     ###########################################################################
     # downloading tle file
     print("Fetch TLE file", end="\n")
 
-    tle = TLE(satellite_brand=satellite_brand, directory=output_directory)
+    tle = TLE(
+        satellite_brand=satellite_brand,
+        tle_directory=output_directory,
+        mirror_directory=parser.get("tle", "mirror", fallback=None),
+        url=parser.get("tle", "url", fallback=TLE_URL),
+        max_age=parser.getfloat("tle", "max_age", fallback=TLE_MAX_AGE),
+    )
 
     download_tle = parser.getboolean("tle", "download")
 
@@ -56,6 +65,9 @@ if __name__ == "__main__":
         tle_name = parser.get("tle", "name")
 
     tle_file_location = f"{output_directory}/{tle_name}"
+    # read the tle file once, workers build satellites from memory
+    tle_catalog = tle.read_catalog(f"{tle_file_location}")
+    tle_index = tle.get_tle_index(tle_catalog, key="name")
     ###########################################################################
     time_parameters = ConfigurationFile().section_to_dictionary(
         parser.items("time")
@@ -75,23 +87,119 @@ if __name__ == "__main__":
         tle_file_location=tle_file_location,
     )
 
+    compute_visibility.set_tle_index(tle_index)
+    # propagate every coarse_delta seconds and interpolate the track at
+    # the time steps, within tolerance meters of the propagation
+    coarse_delta = parser.getfloat(
+        "configuration", "coarse_delta", fallback=None
+    )
+
+    if coarse_delta is not None:
+        compute_visibility.set_interpolation(
+            coarse_delta,
+            parser.getfloat(
+                "configuration",
+                "tolerance",
+                fallback=INTERPOLATION_TOLERANCE,
+            ),
+        )
+
+    # ephem or numpy, see track.py
+    radec_method = parser.get("configuration", "radec", fallback="ephem")
+    compute_visibility.set_radec_method(radec_method)
+
     number_processes = parser.getint("configuration", "processes")
 
     visible_satellites = parser.get("observation", "satellites")
     visible_satellites = visible_satellites.split("\n")
-    print(output_directory)
-    # import sys
-    # sys.exit()
-    with mp.Pool(processes=number_processes) as pool:
-        results = pool.map(
-            compute_visibility.compute_visibility_of_satellite,
-            visible_satellites,
+
+    # Sun coordinates only depend on time and observatory, compute them
+    # once for all satellites
+    sun_ephemeris = compute_visibility.set_sun_ephemeris()
+    evaluations_saved = sun_ephemeris.evaluations_saved(
+        len(visible_satellites)
+    )
+    print(
+        f"Sun ephemeris: {sun_ephemeris.time_grid.size} time steps, "
+        f"{evaluations_saved} evaluations saved"
+    )
+
+    if radec_method == "numpy":
+        compute_visibility.set_equatorial_frame()
+
+    # either tsv, parquet, feather or hdf5
+    output_format = parser.get("file", "format", fallback="tsv")
+    OutputFile.check_output_format(output_format)
+    # row of each satellite in the simple file
+    simple_rule = parser.get("file", "simple_rule", fallback="earliest")
+    OutputFile.check_simple_rule(simple_rule)
+
+    # with fewer satellites than chunks for every process, the window is
+    # split in shards of its time grid, see worker.get_number_of_shards
+    number_of_shards = worker.get_number_of_shards(
+        len(visible_satellites),
+        number_processes,
+        sun_ephemeris.time_grid.size,
+    )
+
+    if number_of_shards > 1:
+        print(f"Time grid split in {number_of_shards} shards")
+
+    shard_states = {
+        (None, shard): shard_state
+        for shard, shard_state in enumerate(
+            compute_visibility.get_shard_states(number_of_shards)
         )
+    }
+
+    tasks = [
+        (None, shard, satellite)
+        for satellite in visible_satellites
+        for shard in range(number_of_shards)
+    ]
+
+    chunk_size = parser.getint(
+        "configuration",
+        "chunksize",
+        fallback=worker.get_chunk_size(len(tasks), number_processes),
+    )
+
+    sharded_results = worker.ShardedResults({None: number_of_shards})
+
+    with mp.Pool(
+        processes=number_processes,
+        initializer=worker.init_worker,
+        initargs=(compute_visibility, shard_states),
+    ) as pool:
+        results = [
+            result
+            for shard_result in pool.map(
+                worker.compute_visibility_in_shard,
+                tasks,
+                chunksize=chunk_size,
+            )
+            for result in sharded_results.add(*shard_result)
+        ]
     ##########################################################################
     output = OutputFile(results, output_directory)
     details_name = parser.get("file", "complete")
     visible_name = parser.get("file", "simple")
-    output.save_data(simple_name=visible_name, full_name=details_name)
+    output.save_data(
+        simple_name=visible_name,
+        full_name=details_name,
+        output_format=output_format,
+        simple_rule=simple_rule,
+    )
+
+    # one row per pass, only written if set
+    summary_name = parser.get("file", "summary", fallback=None)
+
+    if summary_name is not None:
+        output.save_pass_summary(
+            summary_name,
+            compute_visibility.time_delta.total_seconds(),
+            output_format,
+        )
     ##########################################################################
     with open(
         f"{output_directory}/{CONFIG_FILE_NAME}.ini", "w", encoding="utf-8"
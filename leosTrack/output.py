@@ -1,6 +1,13 @@
 """Handle output file of visible LEO-satellites"""
+import heapq
+import importlib.util
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
+from leosTrack.units import ConvertUnits
 from leosTrack.utils.filedir import FileDirectory
 
 ###############################################################################
@@ -22,6 +29,7 @@ COLUMN_NAMES = [
     "SunDEC[deg]",
     "SunZenithAngle[deg]",
     "SatAngularSpeed[arcsecs/sec]",
+    "SatPositionAngle[deg]",
 ]
 COLUMN_NAMES_SIMPLE = [
     "satellite",
@@ -30,6 +38,88 @@ COLUMN_NAMES_SIMPLE = [
     "RA[hh:mm:ss]",
     "DEC[dd:mm:ss]",
 ]
+PASS_COLUMN_NAMES = [
+    "satellite",
+    "start[UT]",
+    "StartAzimuth[deg]",
+    "StartElevation[deg]",
+    "peak[UT]",
+    "PeakAzimuth[deg]",
+    "PeakElevation[deg]",
+    "PeakRA[hh:mm:ss]",
+    "PeakDEC[dd:mm:ss]",
+    "PeakSunZenithAngle[deg]",
+    "end[UT]",
+    "EndAzimuth[deg]",
+    "EndElevation[deg]",
+]
+# consecutive visible time steps of a satellite collapsed in one row
+PASS_SUMMARY_COLUMN_NAMES = [
+    "satellite",
+    "start[UT]",
+    "end[UT]",
+    "peak[UT]",
+    "PeakElevation[deg]",
+    "StartRA[hh:mm:ss]",
+    "StartDEC[dd:mm:ss]",
+    "PeakRA[hh:mm:ss]",
+    "PeakDEC[dd:mm:ss]",
+    "EndRA[hh:mm:ss]",
+    "EndDEC[dd:mm:ss]",
+    "MeanAngularSpeed[arcsecs/sec]",
+    "MaxAngularSpeed[arcsecs/sec]",
+]
+# file extension and package needed by each format of OutputFile.save_data.
+# tsv is text, the others are columnar with numeric and timestamp types
+OUTPUT_FORMATS = {
+    "tsv": ["txt", None],
+    "parquet": ["parquet", "pyarrow"],
+    "feather": ["feather", "pyarrow"],
+    "hdf5": ["h5", "tables"],
+}
+# rule to pick the row of each satellite in the simple output: its
+# earliest visible time step, the one with the highest altitude or the
+# one with the slowest angular speed
+SIMPLE_RULES = ["earliest", "highest", "slowest"]
+# rows kept in memory by StreamingOutputFile before writing a sorted run
+STREAM_BUFFER_ROWS = 100_000
+# typed record of a visible time step, engines return an array of them
+# per satellite and they are formatted only when written
+RECORD_DTYPE = np.dtype(
+    [
+        ("date_time", "datetime64[us]"),  # UTC
+        ("longitude", "f8"),  # of the footprint in degrees
+        ("latitude", "f8"),  # of the footprint in degrees
+        ("orbital_altitude", "f8"),  # km
+        ("azimuth", "f8"),  # degrees
+        ("altitude", "f8"),  # degrees
+        ("right_ascension", "f8"),  # hours
+        ("declination", "f8"),  # degrees
+        ("sun_right_ascension", "f8"),  # hours
+        ("sun_declination", "f8"),  # degrees
+        ("sun_zenith", "f8"),  # degrees
+        ("angular_velocity", "f8"),  # arcsecs / sec
+        # direction of the motion, degrees from north through east
+        ("position_angle", "f8"),
+    ]
+)
+# typed pass summary, see get_pass_summary
+PASS_SUMMARY_DTYPE = np.dtype(
+    [
+        ("start", "datetime64[us]"),  # first visible time step, UTC
+        ("end", "datetime64[us]"),  # last visible time step, UTC
+        ("peak", "datetime64[us]"),  # time step of highest altitude
+        ("peak_altitude", "f8"),  # degrees
+        ("start_right_ascension", "f8"),  # hours
+        ("start_declination", "f8"),  # degrees
+        ("peak_right_ascension", "f8"),
+        ("peak_declination", "f8"),
+        ("end_right_ascension", "f8"),
+        ("end_declination", "f8"),
+        ("mean_angular_velocity", "f8"),  # arcsecs / sec
+        ("max_angular_velocity", "f8"),
+    ]
+)
 ###############################################################################
 
 
@@ -52,7 +142,13 @@ class OutputFile(FileDirectory):
         self.simple_data = None
 
     ###########################################################################
-    def save_data(self, simple_name: str, full_name: str) -> None:
+    def save_data(
+        self,
+        simple_name: str,
+        full_name: str,
+        output_format: str = "tsv",
+        simple_rule: str = "earliest",
+    ) -> None:
         """
         Process and save relevant data for observers in the directory
         passed to the constructor of the class
@@ -60,98 +156,297 @@ class OutputFile(FileDirectory):
         INPUTS
             simple_name: name of file with simple observation details
             full_name: name of file with all data
+            output_format: either tsv, parquet, feather or hdf5.
+                In tsv, coordinates are formatted as text. In the
+                others, columns keep their numeric and timestamp types
+                and RA and DEC are in hours and degrees
+            simple_rule: row of each satellite in the simple output,
+                either earliest, highest or slowest
         """
 
         print("Save data")
-        self._get_data()
+        self.check_output_format(output_format)
+        self.check_simple_rule(simple_rule)
+        self._get_data(output_format, simple_rule)
         super().check_directory(self.directory, exit_operation=False)
-        self._save_simple_output(simple_name)
-        self._save_output(full_name)
+        self._save_simple_output(simple_name, output_format)
+        self._save_output(full_name, output_format)
 
     ###########################################################################
-    def _save_simple_output(self, file_name: str) -> None:
+    def save_pass_summary(
+        self, file_name: str, time_delta: float, output_format: str = "tsv"
+    ) -> None:
         """
-        Process and save data with simple obsevation details
+        Save one row per pass of the visible satellites, where a pass
+        is a run of consecutive visible time steps, see get_pass_summary
 
-        PARAMETERS
-            file_name: name of file
+        INPUTS
+            file_name: name of file with the pass summary
+            time_delta: time step of the observation window in seconds
+            output_format: see save_data
         """
 
-        data_frame = pd.DataFrame(
-            columns=COLUMN_NAMES_SIMPLE, data=self.simple_data
-        )
-        #######################################################################
-        # Change output format in compute visible to avoid this line of code
+        print("Save pass summary")
+        self.check_output_format(output_format)
+        super().check_directory(self.directory, exit_operation=False)
 
-        data_frame["date[UT]"] = pd.to_datetime(
-            data_frame["date[UT]"] + " " + data_frame["time[UT]"],
-            format="%Y-%m-%d %H:%M:%Ss",
-        )
+        satellites = []
+        summaries = [np.empty(0, PASS_SUMMARY_DTYPE)]
 
-        data_frame.drop(columns=["time[UT]"], inplace=True)
+        # satellite by satellite, as they would arrive from the pool
+        for [satellite, records] in self._get_visible_satellites(
+            self.results
+        ):
 
-        #######################################################################
-        # drop duplicates
+            summary = get_pass_summary(records, time_delta)
 
-        data_frame = data_frame.sample(frac=1, random_state=0)
+            satellites += [satellite] * summary.size
+            summaries.append(summary)
 
-        data_frame = data_frame.drop_duplicates(
-            subset="satellite", keep="first"
-        )  # type: ignore
+        summary = np.concatenate(summaries)
 
-        data_frame.sort_values(by=["date[UT]", "satellite"], inplace=True)
+        if output_format == "tsv":
+            columns = format_pass_summary(satellites, summary)
+        else:
+            columns = get_pass_summary_columns(satellites, summary)
+
+        data_frame = pd.DataFrame(columns)
+
+        data_frame.sort_values(by=["start[UT]", "satellite"], inplace=True)
+
+        self._write_table(data_frame, file_name, output_format)
+
+    ###########################################################################
+    @staticmethod
+    def check_output_format(output_format: str) -> None:
+        """
+        Exit if the output format is not supported or the package it
+        needs is not installed, call it before the computation to fail
+        early
+
+        INPUTS
+            output_format: either tsv, parquet, feather or hdf5
+        """
+
+        if output_format not in OUTPUT_FORMATS:
+            print(f"format must be one of: {', '.join(OUTPUT_FORMATS)}")
+            sys.exit()
+
+        package = OUTPUT_FORMATS[output_format][1]
+
+        if package is not None and importlib.util.find_spec(package) is None:
+            print(f"format {output_format} needs package {package}")
+            print("Code cannot execute")
+            sys.exit()
+
+    ###########################################################################
+    def save_passes(self, file_name: str, output_format: str = "tsv") -> None:
+        """
+        Save one row per pass of the satellites, results must come from
+        PassPredictor.compute_visibility_of_satellite
+
+        INPUTS
+            file_name: name of file with the passes
+            output_format: see save_data, other than tsv RA and DEC at
+                the peak are kept in hours and degrees
+        """
+
+        print("Save passes")
+        super().check_directory(self.directory, exit_operation=False)
+
+        passes = []
+
+        for satellite_passes in self._get_visible_satellites(self.results):
+
+            for [satellite, pass_data] in satellite_passes:
+
+                passes.append([satellite] + pass_data)
+
+        data_frame = pd.DataFrame(columns=PASS_COLUMN_NAMES, data=passes)
+
+        data_frame.sort_values(by=["start[UT]", "satellite"], inplace=True)
+
+        if output_format != "tsv":
+
+            data_frame.rename(
+                columns={
+                    "PeakRA[hh:mm:ss]": "PeakRA[hr]",
+                    "PeakDEC[dd:mm:ss]": "PeakDEC[deg]",
+                },
+                inplace=True,
+            )
+
+            self._write_table(data_frame, file_name, output_format)
+
+            return
+
+        # RA and DEC at the peak to hh:mm:ss, dd:mm:ss
+        for column, format_column in [
+            ["PeakRA[hh:mm:ss]", format_right_ascension],
+            ["PeakDEC[dd:mm:ss]", format_declination],
+        ]:
+            data_frame[column] = format_column(
+                data_frame[column].to_numpy(dtype=float)
+            )
 
         data_frame.to_csv(
-            f"{self.directory}/{file_name}.txt", sep="\t", index=False
+            f"{self.directory}/{file_name}.txt",
+            sep="\t",
+            index=False,
+            float_format="%.3f",
         )
 
     ###########################################################################
-    def _save_output(self, file_name: str) -> None:
+    @staticmethod
+    def check_simple_rule(simple_rule: str) -> None:
+        """
+        Exit if the rule of the simple output is not supported
+
+        INPUTS
+            simple_rule: either earliest, highest or slowest
+        """
+
+        if simple_rule not in SIMPLE_RULES:
+            print(f"simple_rule must be one of: {', '.join(SIMPLE_RULES)}")
+            sys.exit()
+
+    ###########################################################################
+    def _save_simple_output(self, file_name: str, output_format: str) -> None:
         """
         Process and save data with simple obsevation details
 
         PARAMETERS
             file_name: name of file
+            output_format: see save_data
         """
 
-        data_frame = pd.DataFrame(columns=COLUMN_NAMES, data=self.data)
-        #######################################################################
-        data_frame = data_frame.dropna()
-        #######################################################################
-        data_frame["date[UT]"] = pd.to_datetime(
-            data_frame["date[UT]"] + " " + data_frame["time[UT]"],
-            format="%Y-%m-%d %H:%M:%Ss",
-        )
+        # one row per satellite, picked in _get_data
+        data_frame = pd.DataFrame(self.simple_data)
+
+        data_frame.sort_values(by=["date[UT]", "satellite"], inplace=True)
+
+        self._write_table(data_frame, file_name, output_format)
+
+    ###########################################################################
+    def _save_output(self, file_name: str, output_format: str) -> None:
+        """
+        Process and save data with simple obsevation details
+
+        PARAMETERS
+            file_name: name of file
+            output_format: see save_data
+        """
 
-        data_frame.drop(columns=["time[UT]"], inplace=True)
+        data_frame = pd.DataFrame(self.data)
 
         data_frame.sort_values(by=["satellite", "date[UT]"], inplace=True)
 
-        data_frame.to_csv(
-            f"{self.directory}/{file_name}.txt", sep="\t", index=False
-        )
+        self._write_table(data_frame, file_name, output_format)
 
     ###########################################################################
-    def _get_data(self) -> None:
+    def _write_table(
+        self, data_frame: pd.DataFrame, file_name: str, output_format: str
+    ) -> None:
         """
-        Gets list of data from visible satellites.
-        Example: self.data = [[satelite, data, data],....]
+        Write a table in the output format
+
+        PARAMETERS
+            data_frame: table to write
+            file_name: name of file, the extension is set by the format
+            output_format: see save_data
+        """
+
+        extension = OUTPUT_FORMATS[output_format][0]
+        file_location = f"{self.directory}/{file_name}.{extension}"
+
+        if output_format == "tsv":
+
+            rows = join_columns(
+                [
+                    data_frame[column_name].to_numpy(dtype=str)
+                    for column_name in data_frame.columns
+                ]
+            )
+
+            with open(file_location, "w", encoding="utf-8") as file:
+                file.write("\t".join(data_frame.columns) + "\n")
+                file.write(rows)
+
+        elif output_format == "parquet":
+
+            data_frame.to_parquet(file_location, index=False)
+
+        elif output_format == "feather":
+
+            data_frame.reset_index(drop=True).to_feather(file_location)
+
+        elif output_format == "hdf5":
+
+            data_frame.to_hdf(
+                file_location,
+                key="data",
+                mode="w",
+                format="table",
+                index=False,
+            )
+
+    ###########################################################################
+    def _get_data(self, output_format: str, simple_rule: str) -> None:
+        """
+        Gather the records of visible satellites, formatted for tsv, and
+        pick the row of each satellite for the simple output.
+        Example: self.data = {"satellite": [...], "date[UT]": [...], ...}
+
+        PARAMETERS
+            output_format: see save_data
+            simple_rule: see save_data
         """
 
         visible_satellites = self._get_visible_satellites(self.results)
 
-        self.data = []
-        self.simple_data = []
+        satellites = [satellite for [satellite, _] in visible_satellites]
+        records = [records for [_, records] in visible_satellites]
+
+        # One satellite appears more than once depending on time_step
+        number_of_rows = [len(data) for data in records]
+
+        satellites = np.repeat(np.array(satellites, dtype=str), number_of_rows)
+        records = np.concatenate([np.empty(0, RECORD_DTYPE)] + records)
+
+        # a single grouped pass over the position of each satellite in
+        # the results, cheaper to group by than its name
+        satellite_index = np.repeat(
+            np.arange(len(number_of_rows)), number_of_rows
+        )
+
+        simple_rows = (
+            pd.Series(get_rule_score(records, simple_rule))
+            .groupby(satellite_index, sort=False)
+            .idxmin()
+            .to_numpy(dtype=int)
+        )
+
+        if output_format == "tsv":
+
+            self.data = format_records(satellites, records)
 
-        for visible_satellite in visible_satellites:
+            self.simple_data = {
+                "satellite": self.data["satellite"][simple_rows],
+                "date[UT]": self.data["date[UT]"][simple_rows],
+                "RA[hh:mm:ss]": self.data["SatRA[hr]"][simple_rows],
+                "DEC[dd:mm:ss]": self.data["SatDEC[deg]"][simple_rows],
+            }
 
-            # One satellite appears more than once depending on time_step
-            for visible in visible_satellite:
+        else:
 
-                [satellite, data, simple_data] = visible
+            self.data = get_columns(satellites, records)
 
-                self.data.append([satellite] + data)
-                self.simple_data.append([satellite] + simple_data)
+            self.simple_data = {
+                "satellite": self.data["satellite"][simple_rows],
+                "date[UT]": self.data["date[UT]"][simple_rows],
+                "RA[hr]": self.data["SatRA[hr]"][simple_rows],
+                "DEC[deg]": self.data["SatDEC[deg]"][simple_rows],
+            }
 
     ###########################################################################
     @staticmethod
@@ -173,56 +468,566 @@ class OutputFile(FileDirectory):
         return list(visible_satellites)
 
 
+class StreamingOutputFile(FileDirectory):
+    """
+    Write the results of visible satellites as they arrive, instead of
+    collecting all of them before saving. Rows are kept in a buffer of
+    bounded size, written as sorted runs to temporary files and merged
+    in the final files when closing, so memory does not grow with the
+    number of visible satellites.
+
+    Same columns as OutputFile.save_data in tsv format
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        simple_name: str,
+        full_name: str,
+        simple_rule: str = "earliest",
+        summary_name: str = None,
+        time_delta: float = None,
+        buffer_rows: int = STREAM_BUFFER_ROWS,
+    ):
+        """
+        PARAMETERS
+
+            directory: directory to save all the outputs
+            simple_name: name of file with simple observation details
+            full_name: name of file with all data
+            simple_rule: row of each satellite in the simple output,
+                see OutputFile.save_data
+            summary_name: name of file with the pass summary, if None
+                it is not written. See OutputFile.save_pass_summary
+            time_delta: time step of the observation window in seconds,
+                needed for the pass summary
+            buffer_rows: rows kept in memory before writing a run
+        """
+
+        FileDirectory.__init__(self)
+        super().check_directory(directory, exit_operation=False)
+        OutputFile.check_simple_rule(simple_rule)
+
+        self.directory = directory
+        self.simple_rule = simple_rule
+        self.time_delta = time_delta
+        self.buffer_rows = buffer_rows
+
+        # full output sorted by satellite and date, simple one by
+        # date and satellite
+        self.outputs = {
+            "full": {
+                "name": full_name,
+                "sort_key": self._by_satellite,
+                "rows": [],
+                "runs": [],
+            },
+            "simple": {
+                "name": simple_name,
+                "sort_key": self._by_date,
+                "rows": [],
+                "runs": [],
+            },
+        }
+
+        # sorted by start and satellite
+        if summary_name is not None:
+
+            self.outputs["summary"] = {
+                "name": summary_name,
+                "sort_key": self._by_date,
+                "rows": [],
+                "runs": [],
+            }
+
+    ###########################################################################
+    def add_result(self, result) -> None:
+        """
+        Add the result of compute_visibility_of_satellite of a single
+        satellite, non visible satellites are ignored
+
+        PARAMETERS
+            result: [satellite, records] if visible, with records an
+                array with dtype RECORD_DTYPE, otherwise the satellite
+                name or None
+        """
+
+        if isinstance(result, list) is False:
+            return
+
+        [satellite, records] = result
+
+        if records.size == 0:
+            return
+
+        columns = format_records(np.full(records.size, satellite), records)
+
+        self.outputs["full"]["rows"] += join_columns(
+            list(columns.values())
+        ).split("\n")[:-1]
+
+        simple_row = get_rule_score(records, self.simple_rule).argmin()
+
+        self.outputs["simple"]["rows"].append(
+            "\t".join(
+                [
+                    satellite,
+                    columns["date[UT]"][simple_row],
+                    columns["SatRA[hr]"][simple_row],
+                    columns["SatDEC[deg]"][simple_row],
+                ]
+            )
+        )
+
+        if "summary" in self.outputs:
+
+            summary = get_pass_summary(records, self.time_delta)
+            summary = format_pass_summary(
+                np.full(summary.size, satellite), summary
+            )
+
+            self.outputs["summary"]["rows"] += join_columns(
+                list(summary.values())
+            ).split("\n")[:-1]
+
+        for output in self.outputs.values():
+
+            if len(output["rows"]) >= self.buffer_rows:
+                self._write_run(output)
+
+    ###########################################################################
+    def close(self) -> None:
+        """
+        Merge the sorted runs in the final files and remove the runs
+        """
+
+        print("Save data")
+
+        # date and time are merged in date[UT] as in OutputFile
+        self._merge_runs(
+            self.outputs["full"],
+            [name for name in COLUMN_NAMES if name != "time[UT]"],
+        )
+
+        self._merge_runs(
+            self.outputs["simple"],
+            [name for name in COLUMN_NAMES_SIMPLE if name != "time[UT]"],
+        )
+
+        if "summary" in self.outputs:
+
+            self._merge_runs(
+                self.outputs["summary"], PASS_SUMMARY_COLUMN_NAMES
+            )
+
+    ###########################################################################
+    def _write_run(self, output: dict) -> None:
+        """
+        Sort the rows in the buffer of an output, write them to a
+        temporary file and empty the buffer
+
+        PARAMETERS
+            output: entry of self.outputs
+        """
+
+        output["rows"].sort(key=output["sort_key"])
+
+        run_location = (
+            f"{self.directory}/.{output['name']}_{len(output['runs'])}.tmp"
+        )
+
+        with open(run_location, "w", encoding="utf-8") as run:
+            run.writelines(f"{row}\n" for row in output["rows"])
+
+        output["runs"].append(run_location)
+        output["rows"] = []
+
+    ###########################################################################
+    def _merge_runs(self, output: dict, column_names: list) -> None:
+        """
+        Merge the sorted runs of an output and what remains in its
+        buffer in the final file
+
+        PARAMETERS
+            output: entry of self.outputs
+            column_names: header of the file
+        """
+
+        sort_key = output["sort_key"]
+
+        output["rows"].sort(key=sort_key)
+        buffer = (f"{row}\n" for row in output["rows"])
+
+        runs = [
+            open(run_location, "r", encoding="utf-8")
+            for run_location in output["runs"]
+        ]
+
+        try:
+
+            with open(
+                f"{self.directory}/{output['name']}.txt", "w", encoding="utf-8"
+            ) as file:
+
+                file.write("\t".join(column_names) + "\n")
+                file.writelines(heapq.merge(buffer, *runs, key=sort_key))
+
+        finally:
+
+            for run in runs:
+                run.close()
+                os.remove(run.name)
+
+        output["rows"] = []
+        output["runs"] = []
+
+    ###########################################################################
+    @staticmethod
+    def _by_satellite(row: str) -> list:
+        """
+        Sort key of the full output: [satellite, date]
+        """
+
+        return row.split("\t", 2)[:2]
+
+    ###########################################################################
+    @staticmethod
+    def _by_date(row: str) -> list:
+        """
+        Sort key of the simple output: [date, satellite]
+        """
+
+        return row.split("\t", 2)[1::-1]
+
+
 ###############################################################################
-def data_formating(
+def data_record(
     date_time,
     satellite_lon_lat_alt: list,
     satellite_coordinates: list,
-    satellite_ra_hms: list,
-    satellite_dec_dms: list,
+    satellite_ra_dec: list,
     sun_coordinates: list,
     sun_zenith_angle,
     angular_velocity,
-):
+    position_angle,
+) -> tuple:
     """
-    Prepare data to txt file
+    Typed record of a visible time step, see RECORD_DTYPE
 
     INPUT
     satellite_coordinates: [azimuth, altitude] of satellite
+    satellite_ra_dec: [right ascension in hours, declination in degrees]
+    sun_coordinates: [right ascension in hours, declination in degrees]
+    """
+
+    return (
+        date_time,
+        *satellite_lon_lat_alt,
+        *satellite_coordinates,
+        *satellite_ra_dec,
+        *sun_coordinates,
+        sun_zenith_angle,
+        angular_velocity,
+        position_angle,
+    )
+
+
+###############################################################################
+def get_rule_score(records: np.ndarray, simple_rule: str) -> np.ndarray:
     """
+    Score of each record for the rule of the simple output, the row of
+    a satellite is the one with the lowest score. Ties go to the first
+    row
+
+    INPUT
+    records: array with dtype RECORD_DTYPE
+    simple_rule: either earliest, highest or slowest
+    """
+
+    if simple_rule == "highest":
+        return -records["altitude"]
 
-    date = f"{date_time:%Y-%m-%d}"
-    time = f"{date_time:%H:%M:%S}s"
+    if simple_rule == "slowest":
+        return records["angular_velocity"]
+
+    return records["date_time"].astype(np.int64)
+
+
+###############################################################################
+def get_pass_summary(records: np.ndarray, time_delta: float) -> np.ndarray:
+    """
+    Collapse the records of a satellite in passes: runs of visible time
+    steps one time_delta apart
 
-    satellite_ra_hms = (
-        f"{satellite_ra_hms[0]:02d}:{satellite_ra_hms[1]:02d}:"
-        f"{satellite_ra_hms[2]:05.2f}"
+    INPUT
+    records: array with dtype RECORD_DTYPE of a single satellite,
+        sorted by date_time
+    time_delta: time step of the observation window in seconds
+
+    OUTPUT
+    summary: array with dtype PASS_SUMMARY_DTYPE, one entry per pass
+    """
+
+    time_step = np.timedelta64(int(round(time_delta * 1e6)), "us")
+
+    # a pass ends where the next visible time step is not the next step
+    pass_start = np.flatnonzero(np.diff(records["date_time"]) != time_step)
+    pass_start = np.concatenate([[0], pass_start + 1]).astype(int)
+
+    if records.size == 0:
+        return np.empty(0, dtype=PASS_SUMMARY_DTYPE)
+
+    pass_end = np.append(pass_start[1:], records.size) - 1
+
+    pass_peak = np.array(
+        [
+            start + records["altitude"][start : end + 1].argmax()
+            for start, end in zip(pass_start, pass_end)
+        ],
+        dtype=int,
     )
+    #######################################################################
+    summary = np.empty(pass_start.size, dtype=PASS_SUMMARY_DTYPE)
+
+    summary["start"] = records["date_time"][pass_start]
+    summary["end"] = records["date_time"][pass_end]
+    summary["peak"] = records["date_time"][pass_peak]
+    summary["peak_altitude"] = records["altitude"][pass_peak]
 
-    satellite_dec_dms = (
-        f"{satellite_dec_dms[0]:+03d}:{satellite_dec_dms[1]:02d}:"
-        f"{satellite_dec_dms[2]:05.2f}"
+    for step, rows in zip(
+        ["start", "peak", "end"], [pass_start, pass_peak, pass_end]
+    ):
+
+        summary[f"{step}_right_ascension"] = records["right_ascension"][rows]
+        summary[f"{step}_declination"] = records["declination"][rows]
+
+    angular_velocity = records["angular_velocity"]
+
+    summary["mean_angular_velocity"] = np.add.reduceat(
+        angular_velocity, pass_start
+    ) / (pass_end - pass_start + 1)
+
+    summary["max_angular_velocity"] = np.maximum.reduceat(
+        angular_velocity, pass_start
     )
 
-    data = [
-        f"{date}",
-        f"{time}",
-        f"{satellite_lon_lat_alt[0]:9.6f}",
-        f"{satellite_lon_lat_alt[1]:9.6f}",
-        f"{satellite_lon_lat_alt[2]:5.2f}",
-        f"{satellite_coordinates[0]:06.3f}",
-        f"{satellite_coordinates[1]:06.3f}",
-        satellite_ra_hms,
-        satellite_dec_dms,
-        f"{sun_coordinates[0]:09.7f}",
-        f"{sun_coordinates[1]:09.7f}",
-        f"{sun_zenith_angle:07.3f}",
-        f"{angular_velocity:08.3f}",
+    return summary
+
+
+###############################################################################
+def get_pass_summary_columns(satellites: list, summary: np.ndarray) -> dict:
+    """
+    Columns of the pass summary with their numeric types, for the
+    columnar output formats. RA in hours and DEC in degrees
+
+    INPUT
+    satellites: name of the satellite of each pass
+    summary: array with dtype PASS_SUMMARY_DTYPE
+    """
+
+    columns = {"satellite": np.asarray(satellites, dtype=str)}
+
+    column_names = [
+        name.replace("[hh:mm:ss]", "[hr]").replace("[dd:mm:ss]", "[deg]")
+        for name in PASS_SUMMARY_COLUMN_NAMES[1:]
     ]
 
-    data_simple = [f"{date}", f"{time}", satellite_ra_hms, satellite_dec_dms]
+    for column_name, field in zip(column_names, PASS_SUMMARY_DTYPE.names):
+        columns[column_name] = summary[field]
 
-    return data, data_simple
+    return columns
 
 
 ###############################################################################
+def format_pass_summary(satellites: list, summary: np.ndarray) -> dict:
+    """
+    Format the pass summary as the columns of the tsv output
+
+    INPUT
+    satellites: name of the satellite of each pass
+    summary: array with dtype PASS_SUMMARY_DTYPE
+    """
+
+    columns = {"satellite": np.asarray(satellites, dtype=str)}
+
+    for column_name, field in zip(
+        PASS_SUMMARY_COLUMN_NAMES[1:4], ["start", "end", "peak"]
+    ):
+        columns[column_name] = _format_date_time(summary[field])
+
+    columns["PeakElevation[deg]"] = _format(
+        "%06.3f", summary["peak_altitude"]
+    )
+
+    for step in ["Start", "Peak", "End"]:
+
+        columns[f"{step}RA[hh:mm:ss]"] = format_right_ascension(
+            summary[f"{step.lower()}_right_ascension"]
+        )
+        columns[f"{step}DEC[dd:mm:ss]"] = format_declination(
+            summary[f"{step.lower()}_declination"]
+        )
+
+    for statistic in ["Mean", "Max"]:
+
+        columns[f"{statistic}AngularSpeed[arcsecs/sec]"] = _format(
+            "%08.3f", summary[f"{statistic.lower()}_angular_velocity"]
+        )
+
+    return columns
+
+
+###############################################################################
+def get_columns(satellites: np.ndarray, records: np.ndarray) -> dict:
+    """
+    Columns of the output files with their numeric types, for the
+    columnar output formats
+
+    INPUT
+    satellites: name of the satellite of each record
+    records: array with dtype RECORD_DTYPE
+
+    OUTPUT
+    columns: {column name: array}, same columns as format_records, with
+        RA in hours and DEC in degrees
+    """
+
+    column_names = [name for name in COLUMN_NAMES if name != "time[UT]"]
+
+    columns = {"satellite": np.asarray(satellites, dtype=str)}
+
+    for column_name, field in zip(column_names[1:], RECORD_DTYPE.names):
+        columns[column_name] = records[field]
+
+    return columns
+
+
+###############################################################################
+def format_records(satellites: np.ndarray, records: np.ndarray) -> dict:
+    """
+    Format the records of visible time steps as the columns of the
+    output files, one column at a time
+
+    INPUT
+    satellites: name of the satellite of each record
+    records: array with dtype RECORD_DTYPE
+
+    OUTPUT
+    columns: {column name: array of strings}, columns of COLUMN_NAMES
+        with date and time merged in date[UT], "2023-01-16 08:10:00"
+    """
+
+    return {
+        "satellite": np.asarray(satellites, dtype=str),
+        "date[UT]": _format_date_time(records["date_time"]),
+        "SatLon[deg]": _format("%9.6f", records["longitude"]),
+        "SatLat[deg]": _format("%9.6f", records["latitude"]),
+        "SatAlt[km]": _format("%5.2f", records["orbital_altitude"]),
+        "SatAzimuth[deg]": _format("%06.3f", records["azimuth"]),
+        "SatElevation[deg]": _format("%06.3f", records["altitude"]),
+        "SatRA[hr]": format_right_ascension(records["right_ascension"]),
+        "SatDEC[deg]": format_declination(records["declination"]),
+        "SunRA[hr]": _format("%09.7f", records["sun_right_ascension"]),
+        "SunDEC[deg]": _format("%09.7f", records["sun_declination"]),
+        "SunZenithAngle[deg]": _format("%07.3f", records["sun_zenith"]),
+        "SatAngularSpeed[arcsecs/sec]": _format(
+            "%08.3f", records["angular_velocity"]
+        ),
+        "SatPositionAngle[deg]": _format("%07.3f", records["position_angle"]),
+    }
+
+
+###############################################################################
+def format_right_ascension(hours: np.ndarray) -> np.ndarray:
+    """
+    Right ascension in hours to hh:mm:ss.ss, see
+    ConvertUnits.format_hh_mm_ss
+    """
+
+    return ConvertUnits.format_hh_mm_ss(hours)
+
+
+###############################################################################
+def format_declination(degrees: np.ndarray) -> np.ndarray:
+    """
+    Declination in degrees to +dd:mm:ss.ss, see
+    ConvertUnits.format_dd_mm_ss
+    """
+
+    return ConvertUnits.format_dd_mm_ss(degrees)
+
+
+def _format_date_time(date_time: np.ndarray) -> np.ndarray:
+    """
+    UTC times to "2023-01-16 08:10:00", seconds are truncated
+    """
+
+    date_time = np.datetime_as_string(
+        date_time.astype("datetime64[s]"), unit="s"
+    ).astype("U19")
+
+    # 2023-01-16T08:10:00, replace the T of every string at once through
+    # the code points of the characters
+    characters = date_time.view(np.uint32).reshape(-1, 19)
+    characters[:, 10] = ord(" ")
+
+    return date_time
+
+
+def _format(string_format: str, column: np.ndarray) -> np.ndarray:
+    """
+    Apply a printf style format, e.g, %06.3f, to a whole column at once,
+    see ConvertUnits.format_fixed_point
+    """
+
+    [width, decimals] = string_format[1:-1].split(".")
+
+    return ConvertUnits.format_fixed_point(
+        column,
+        width=int(width),
+        decimals=int(decimals),
+        zero_pad=width.startswith("0"),
+    )
+
+
+###############################################################################
+def join_columns(columns: list) -> str:
+    """
+    Rows of tab separated columns, each one ending with a new line.
+    The columns are laid side by side as matrices of bytes and joined
+    once for all the rows, instead of joining each row
+
+    INPUT
+    columns: arrays of strings with the same length
+
+    OUTPUT
+    rows: text of the rows, empty if there are none
+    """
+
+    number_of_rows = len(columns[0])
+
+    if number_of_rows == 0:
+        return ""
+
+    separator = np.full((number_of_rows, 1), ord("\t"), dtype=np.uint8)
+    characters = []
+
+    for column in columns:
+
+        column = np.ascontiguousarray(column, dtype=str)
+
+        # one 32 bit code point per character, ascii ones fit in a byte
+        code_points = column.view(np.uint32).reshape(number_of_rows, -1)
+
+        if code_points.size > 0 and code_points.max() >= 128:
+            code_points = np.char.encode(column, "utf-8")
+            code_points = code_points.view(np.uint8).reshape(
+                number_of_rows, -1
+            )
+
+        # shorter strings end with NUL bytes, dropped below
+        characters += [code_points.astype(np.uint8), separator]
+
+    characters[-1] = np.full_like(separator, ord("\n"))
+
+    return np.hstack(characters).tobytes().replace(b"\0", b"").decode("utf-8")
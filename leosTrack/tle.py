@@ -1,13 +1,29 @@
 """Handle operations with TLE file"""
 import datetime
-import re
-import urllib.request
+import hashlib
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from leosTrack.utils.filedir import FileDirectory
 
 ###############################################################################
 # CONSTANTS
 TLE_URL = "https://celestrak.com/NORAD/elements/supplemental"
+# mirrored groups younger than this are not requested again, in seconds
+TLE_MAX_AGE = 7200
+# concurrent connections to fetch groups of satellites
+MAX_CONNECTIONS = 4
+MAX_REDIRECTS = 5
+# bump when the fields of the catalog change to invalidate cached catalogs
+CATALOG_VERSION = 1
 ###############################################################################
 
 
@@ -15,163 +31,678 @@ class TLE(FileDirectory):
 
     """Handle operations with TLE file"""
 
-    def __init__(self, satellite_brand: str, tle_directory: str):
+    def __init__(
+        self,
+        satellite_brand: str,
+        tle_directory: str,
+        mirror_directory: str = None,
+        url: str = TLE_URL,
+        max_age: float = TLE_MAX_AGE,
+    ):
         """
         Handles tle files
 
         PARAMETERS
-            satellite_brand: Name of satellite type, e.g, oneweb
+            satellite_brand: Name of satellite type, e.g, oneweb, or
+                several of them separated by commas, e.g, oneweb, starlink
             directory: The location of the tle files
+            mirror_directory: The location of the local copy of the
+                groups of satellites. If None, tle_directory/mirror
+            url: base url of the groups, {url}/{group}.txt
+            max_age: seconds before a mirrored group is requested again
         """
 
         FileDirectory.__init__(self)
 
         self.satellite_brand = satellite_brand
+        self.groups = self.get_groups(satellite_brand)
         self.directory = tle_directory
 
-    def update_tle_file(self, tle_name: str) -> None:
+        if mirror_directory is None:
+            mirror_directory = f"{tle_directory}/mirror"
+
+        self.mirror_directory = mirror_directory
+        self.url = url.rstrip("/")
+        self.max_age = max_age
+
+        # one connection per thread and host, reused between requests
+        self._connections = threading.local()
+        self._open_connections = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_groups(satellite_brand: str) -> list:
+        """
+        Groups of satellites in satellite_brand
+
+        PARAMETERS
+            satellite_brand: e.g, "oneweb, starlink"
+
+        RETURNS
+            groups: e.g, ["oneweb", "starlink"]
+        """
+
+        groups = [group.strip() for group in satellite_brand.split(",")]
+
+        return [group for group in groups if group != ""]
+
+    def download(self) -> tuple:
         """
-        Make all satellite entries uniqe in tle file
+        Fetch the tle file of each group of satellites passed in the
+        constructor into the mirror directory, concurrently, and combine
+        them in a single tle file in the tle directory.
+
+        Groups mirrored less than max_age seconds ago are not requested.
+        Older ones are requested with If-None-Match and If-Modified-Since,
+        so the server only sends them if they changed
 
-        INPUT
-            tle_name: name of tle file
+        OUTPUTS
+            string with name of the tle file in the format
+                "tle_{groups}_{time_stamp}.txt".
+                time_stamp -> "%Y-%m-%d_%H:%M:%S" of the newest download
+                among the groups, therefore it only changes when the
+                content does
+                example: "tle_oneweb_starlink_2021-10-09_16:18:16.txt"
         """
 
-        with open(
-            f"{self.directory}/{tle_name}", "r", encoding="utf8"
-        ) as file:
+        super().check_directory(directory=self.directory)
+        super().check_directory(directory=self.mirror_directory)
+
+        number_of_threads = max(1, min(len(self.groups), MAX_CONNECTIONS))
 
-            tle_file_lines = file.readlines()
+        try:
 
-        # raw_satellites = self.get_satellites_from_tle(
-        #     f"{self.directory}/{tle_name}"
-        # )
-        #
-        # unique_satellites = self.unique_satellites(raw_satellites[:])
+            with ThreadPoolExecutor(max_workers=number_of_threads) as pool:
+                groups_metadata = list(
+                    pool.map(self.mirror_group, self.groups)
+                )
 
-        updated_tle = ""
+        finally:
 
-        regular_expression = (
-            r"[a-zA-Z ][a-zA-Z1-9]?.*[)]"
-            r"|"
-            r"[a-zA-Z ][a-zA-Z1-9]?.*[0-9a-zA-Z]"
+            for connection in self._open_connections:
+                connection.close()
+
+            self._open_connections.clear()
+
+        if None in groups_metadata:
+            print("Code cannot execute")
+            sys.exit()
+        #######################################################################
+        time_stamp = max(
+            [metadata["downloaded"] for metadata in groups_metadata]
         )
+        tle_file_name = f"tle_{'_'.join(self.groups)}_{time_stamp}.txt"
+        tle_file_location = f"{self.directory}/{tle_file_name}"
 
-        pattern = re.compile(regular_expression)
+        if not os.path.isfile(tle_file_location):
 
-        for idx, tle_line in enumerate(tle_file_lines):
+            group_contents = []
 
-            if idx % 3 == 0:
+            for group in self.groups:
 
-                satellite = pattern.findall(tle_line)
-                print(satellite)
-                satellite = pattern.findall(tle_line)[0]
+                with open(f"{self.mirror_directory}/{group}.txt", "rb") as tle:
+                    group_contents.append(tle.read().rstrip(b"\r\n"))
 
-                sat_id = f"{idx//3:04d}"
+            self._write_file(tle_file_location, b"\n".join(group_contents))
 
-                tle_line = re.sub(
-                    regular_expression,
-                    f"{satellite}-ID-{sat_id}",
-                    tle_line,
-                    1
-                )
+        return tle_file_name, time_stamp
 
-            updated_tle += tle_line
+    def mirror_group(self, group: str):
+        """
+        Update the local copy of the tle file of a group of satellites,
+        {mirror_directory}/{group}.txt, and its metadata in {group}.json
 
-        with open(
-            f"{self.directory}/unique_{tle_name}", "w", encoding="utf8"
-        ) as file:
+        PARAMETERS
+            group: name of the group, e.g, oneweb
 
-            file.write(updated_tle)
+        RETURNS
+            metadata: dictionary with url, etag, last_modified,
+                downloaded (time stamp of the last download) and
+                checked (unix time of the last request). None if the
+                group could not be fetched and there is no local copy
+        """
 
-    def download(self) -> tuple:
+        group_location = f"{self.mirror_directory}/{group}.txt"
+        metadata_location = f"{self.mirror_directory}/{group}.json"
+
+        metadata = {}
+
+        is_mirrored = os.path.isfile(group_location) and os.path.isfile(
+            metadata_location
+        )
+
+        if is_mirrored:
+
+            with open(metadata_location, "r", encoding="utf-8") as file:
+                metadata = json.load(file)
+
+            if time.time() - metadata["checked"] < self.max_age:
+                return metadata
+        #######################################################################
+        group_url = f"{self.url}/{group}.txt"
+        headers = {}
+
+        if is_mirrored and metadata["url"] == group_url:
+
+            if metadata["etag"] is not None:
+                headers["If-None-Match"] = metadata["etag"]
+
+            if metadata["last_modified"] is not None:
+                headers["If-Modified-Since"] = metadata["last_modified"]
+
+        try:
+
+            status, response_headers, content = self._request(
+                group_url, headers
+            )
+
+        except (OSError, http.client.HTTPException) as error:
+
+            status, content = f"{error}", None
+
+        if status == 304:
+
+            metadata["checked"] = time.time()
+
+        elif status == 200:
+
+            self._write_file(group_location, content)
+
+            metadata = {
+                "url": group_url,
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified"),
+                "downloaded": self.get_time_stamp(),
+                "checked": time.time(),
+            }
+
+        elif is_mirrored:
+
+            print(f"Fetch {group_url} failed: {status}, use local copy")
+
+            return metadata
+
+        else:
+
+            print(f"Fetch {group_url} failed: {status}")
+
+            return None
+
+        self._write_file(
+            metadata_location, json.dumps(metadata, indent=4).encode("utf-8")
+        )
+
+        return metadata
+
+    def _request(self, url: str, headers: dict, redirects: int = 0) -> tuple:
         """
-        Downloads the tle_file pass in the costructor from
-        TLE_URL = f"https://celestrak.com/NORAD/elements/supplemental"
+        GET request through the connection of the current thread to the
+        host of the url. Stale keep-alive connections are reopened once
+        and redirections are followed
 
-        OUTPUTS
-            string with name of the tle file in the format
-                "tle_{satellite_brand}_{time_stamp}.txt".
-                time_stamp -> "%Y-%m-%d %H:%M:%S"
-                example: "tle_oneweb_2021-10-09 16:18:16.txt"
+        PARAMETERS
+            url: of the resource
+            headers: of the request
+
+        RETURNS
+            [status, response headers, content]
         """
 
-        tle_query = f"{TLE_URL}/{self.satellite_brand}.txt"
+        url_parts = urllib.parse.urlsplit(url)
 
-        time_stamp = self.get_time_stamp()
-        tle_file_name = f"tle_{self.satellite_brand}_{time_stamp}.txt"
+        path = url_parts.path or "/"
 
-        super().check_directory(directory=self.directory)
+        if url_parts.query != "":
+            path = f"{path}?{url_parts.query}"
+
+        headers = {"User-Agent": "leosTrack", **headers}
+
+        for attempt in range(2):
+
+            connection = self._get_connection(
+                url_parts.scheme, url_parts.netloc
+            )
+
+            try:
+
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+
+                break
+
+            except (http.client.HTTPException, ConnectionError) as error:
+                # the server closed a kept-alive connection
+                connection.close()
+
+                if attempt == 1:
+                    raise error
+
+        if response.status in (301, 302, 303, 307, 308):
+
+            if redirects == MAX_REDIRECTS:
+                return response.status, response.headers, content
 
-        urllib.request.urlretrieve(
-            tle_query, f"{self.directory}/{tle_file_name}"
+            location = urllib.parse.urljoin(
+                url, response.getheader("Location")
+            )
+
+            return self._request(location, headers, redirects + 1)
+
+        return response.status, response.headers, content
+
+    def _get_connection(self, scheme: str, host: str):
+        """
+        Connection of the current thread to host, opened on first use
+
+        PARAMETERS
+            scheme: either http or https
+            host: e.g, celestrak.org or localhost:8000
+        """
+
+        if not hasattr(self._connections, "pool"):
+            self._connections.pool = {}
+
+        connection = self._connections.pool.get((scheme, host))
+
+        if connection is None:
+
+            if scheme == "https":
+                connection = http.client.HTTPSConnection(host, timeout=60)
+            else:
+                connection = http.client.HTTPConnection(host, timeout=60)
+
+            self._connections.pool[(scheme, host)] = connection
+
+            with self._lock:
+                self._open_connections.append(connection)
+
+        return connection
+
+    @staticmethod
+    def _write_file(file_location: str, content: bytes) -> None:
+        """
+        Write to a temporary file first and move it into place, so an
+        interrupted write does not leave a truncated file behind
+        """
+
+        temporary_location = (
+            f"{file_location}.{os.getpid()}.{threading.get_ident()}.tmp"
         )
 
-        return tle_file_name, time_stamp
+        with open(temporary_location, "wb") as file:
+            file.write(content)
+
+        os.replace(temporary_location, file_location)
 
-    def get_satellites_from_tle(self, file_location: str) -> list:
+    def read_catalog(
+        self, file_location: str, use_cache: bool = True
+    ) -> np.ndarray:
         """
-        Retrieves the names of satellites present in tle file.
-        The tle file must be stored locally.
+        Reads the 3-line records of the tle file in a single pass,
+        validates them and assign a unique identifier to each satellite,
+        e.g, ONEWEB-0008-ID-0007, where 0007 is the position of the
+        record in the file.
+
+        The parsed catalog is cached next to the tle file as
+        catalog_{hash}.npy, where hash is the sha256 of the content of
+        the tle file. Later reads of the same content memory map the
+        cache instead of parsing the text
 
         PARAMETERS
             file_location: path of the tle file
+            use_cache: if True, load the cached catalog when present and
+                write it otherwise
 
         RETURNS
-            list with all the sattelites available in tle file
-            example: [oneweb-000, ...]
+            catalog: structured array with one entry per valid record
+                and fields: name, satellite (unique identifier),
+                catalog_number, epoch, inclination, right_ascension,
+                eccentricity, argument_of_perigee, mean_anomaly,
+                mean_motion, line_1 and line_2. Angles in degrees and
+                mean motion in revolutions per day. Lines of
+                elements are stored as ascii bytes
         """
 
         super().file_exists(file_location, exit_operation=True)
 
+        with open(f"{file_location}", "rb") as tle:
+            tle_content = tle.read()
+
+        if use_cache is False:
+            return self._parse_catalog(tle_content)
+        #######################################################################
+        cache_location = self.get_cache_location(file_location, tle_content)
+
+        if os.path.isfile(cache_location):
+
+            print(f"Load cached catalog: {os.path.basename(cache_location)}")
+
+            return np.load(cache_location, mmap_mode="r")
+
+        catalog = self._parse_catalog(tle_content)
+
+        # write to a temporary file first, so an interrupted run does not
+        # leave a truncated cache behind
+        temporary_location = f"{cache_location}.{os.getpid()}.tmp"
+
+        with open(temporary_location, "wb") as cache:
+            np.save(cache, catalog, allow_pickle=False)
+
+        os.replace(temporary_location, cache_location)
+
+        return catalog
+
+    @staticmethod
+    def get_cache_location(file_location: str, tle_content: bytes) -> str:
+        """
+        Location of the cached catalog of a tle file
+
+        PARAMETERS
+            file_location: path of the tle file
+            tle_content: content of the tle file
+
+        RETURNS
+            path to catalog_{hash}.npy in the directory of the tle file
+        """
+
+        content_hash = hashlib.sha256(f"{CATALOG_VERSION}".encode("ascii"))
+        content_hash.update(tle_content)
+
+        directory = os.path.dirname(os.path.abspath(file_location))
+
+        return f"{directory}/catalog_{content_hash.hexdigest()[:32]}.npy"
+
+    def _parse_catalog(self, tle_content: bytes) -> np.ndarray:
+        """
+        Parse the content of a tle file, see read_catalog
+
+        PARAMETERS
+            tle_content: content of the tle file
+
+        RETURNS
+            catalog: structured array with one entry per valid record
+        """
+
+        tle_lines = tle_content.decode("utf-8").splitlines()
+
+        tle_lines = [line for line in tle_lines if line and not line.isspace()]
+
+        names, lines_1, lines_2 = self._split_records(tle_lines)
+        #######################################################################
+        number_of_records = len(names)
+
+        records_1 = self._lines_to_bytes(lines_1)
+        records_2 = self._lines_to_bytes(lines_2)
+
+        is_valid = self._valid_checksum(records_1)
+        is_valid &= self._valid_checksum(records_2)
+        # letters count as zero in the checksum, so a corrupt numeric
+        # field may still pass it
+        is_valid &= self._valid_numeric(records_1[:, 18:32])
+        is_valid &= self._valid_numeric(records_2[:, 8:63])
+
+        catalog_number = self._get_catalog_number(records_1[:, 2:7])
+        is_valid &= catalog_number == self._get_catalog_number(
+            records_2[:, 2:7]
+        )
+
+        number_of_invalid = number_of_records - np.count_nonzero(is_valid)
+
+        if number_of_invalid > 0:
+            print(f"Skip {number_of_invalid} invalid records in tle file")
+        #######################################################################
+        name_length = max([len(name) for name in names] + [1])
+        id_length = max(4, len(f"{number_of_records}"))
+        # identifiers keep the position of the record in the file
+        satellites = [
+            f"{name}-ID-{idx:0{id_length}d}" for idx, name in enumerate(names)
+        ]
+
+        # drop invalid records before any numeric conversion
+        names = [name for name, valid in zip(names, is_valid) if valid]
+        satellites = [
+            satellite
+            for satellite, valid in zip(satellites, is_valid)
+            if valid
+        ]
+        catalog_number = catalog_number[is_valid]
+        records_1 = records_1[is_valid]
+        records_2 = records_2[is_valid]
+
+        catalog = np.zeros(
+            len(names),
+            dtype=[
+                ("name", f"U{name_length}"),
+                ("satellite", f"U{name_length + 4 + id_length}"),
+                ("catalog_number", "i4"),
+                ("epoch", "datetime64[us]"),
+                ("inclination", "f8"),
+                ("right_ascension", "f8"),
+                ("eccentricity", "f8"),
+                ("argument_of_perigee", "f8"),
+                ("mean_anomaly", "f8"),
+                ("mean_motion", "f8"),
+                ("line_1", "S69"),
+                ("line_2", "S69"),
+            ],
+        )
+
+        catalog["name"] = names
+        catalog["satellite"] = satellites
+        catalog["catalog_number"] = catalog_number
+        catalog["line_1"] = records_1.view("S69").ravel()
+        catalog["line_2"] = records_2.view("S69").ravel()
+        #######################################################################
+        epoch_year = self._get_field(records_1, 18, 20).astype(int)
+        epoch_year += np.where(epoch_year < 57, 2000, 1900)
+        epoch_day = self._get_field(records_1, 20, 32).astype(float)
+
+        epoch_year = (epoch_year - 1970).astype("datetime64[Y]")
+
+        catalog["epoch"] = epoch_year.astype("datetime64[us]") + np.round(
+            (epoch_day - 1) * 86400e6
+        ).astype("timedelta64[us]")
+
+        catalog["inclination"] = self._get_field(records_2, 8, 16)
+        catalog["right_ascension"] = self._get_field(records_2, 17, 25)
+        catalog["eccentricity"] = self._get_field(records_2, 26, 33)
+        catalog["eccentricity"] *= 1e-7
+        catalog["argument_of_perigee"] = self._get_field(records_2, 34, 42)
+        catalog["mean_anomaly"] = self._get_field(records_2, 43, 51)
+        catalog["mean_motion"] = self._get_field(records_2, 52, 63)
+
+        return catalog
+
+    def get_satellites(self, catalog: np.ndarray) -> list:
+        """
+        Retrieves the unique identifiers of the satellites in the
+        catalog whose name starts with any of the satellite brands
+        passed to the constructor, all of them if a brand is ALL
+
+        PARAMETERS
+            catalog: output of read_catalog
+
+        RETURNS
+            list with the satellites, example: [ONEWEB-0008-ID-0007, ...]
+        """
+
         # oneweb -> ONEWEB
-        satellite = self.satellite_brand.upper()
+        brands = [group.upper() for group in self.groups]
 
-        if satellite == "ALL":
+        if "ALL" in brands:
+            return catalog["satellite"].tolist()
 
-            regular_expression = (
-                r"\n[a-zA-Z ][a-zA-Z1-9]?.*[)][-]ID[-][0-9]*"
-                r"|"
-                r"\n[a-zA-Z ][a-zA-Z1-9]?.*[0-9a-zA-Z][-]ID[-][0-9]*"
-            )
+        is_brand = np.zeros(catalog.size, dtype=bool)
 
-        else:
+        for brand in brands:
+            is_brand |= np.char.startswith(catalog["name"], brand)
+
+        return catalog["satellite"][is_brand].tolist()
+
+    @staticmethod
+    def get_tle_index(catalog: np.ndarray, key: str = "satellite") -> dict:
+        """
+        Index the two lines of elements of each satellite, so
+        pyorbital.orbital.Orbital can be built from them without
+        scanning the tle file for every satellite
+
+        PARAMETERS
+            catalog: output of read_catalog
+            key: either "satellite", the unique identifiers, or "name".
+                If a name is repeated, the first entry is kept as
+                pyorbital does when reading the tle file
 
-            regular_expression = (
-                f"\n{satellite}.*[)][-]ID[-][0-9]*"
-                f"|"
-                f"\n{satellite}.*[0-9a-zA-Z][-]ID[-][0-9]*"
+        RETURNS
+            tle_index: {satellite: (line_1, line_2), ...}
+        """
+
+        tle_index = {}
+
+        for satellite, line_1, line_2 in zip(
+            catalog[key].tolist(),
+            catalog["line_1"].tolist(),
+            catalog["line_2"].tolist(),
+        ):
+
+            tle_index.setdefault(
+                satellite, (line_1.decode("ascii"), line_2.decode("ascii"))
             )
 
-        pattern = re.compile(regular_expression)
+        return tle_index
+
+    @staticmethod
+    def _split_records(tle_lines: list) -> list:
+        """
+        Split the lines of the tle file in names, lines 1 and lines 2
+        of elements. Names are stripped and lines without a matching
+        line 1 or line 2 are dropped
+
+        PARAMETERS
+            tle_lines: non empty lines of the tle file
+
+        RETURNS
+            [names, lines_1, lines_2]
+        """
+
+        names = [name.strip() for name in tle_lines[0::3]]
+        lines_1 = tle_lines[1::3]
+        lines_2 = tle_lines[2::3]
+
+        is_three_line_file = (
+            len(names) == len(lines_1) == len(lines_2)
+            and all(line[:2] == "1 " for line in lines_1)
+            and all(line[:2] == "2 " for line in lines_2)
+        )
+
+        if is_three_line_file:
+            return [names, lines_1, lines_2]
+        #######################################################################
+        names, lines_1, lines_2 = [], [], []
+        name = ""
+
+        for line in tle_lines:
+
+            if line.startswith("1 "):
+
+                lines_1.append(line)
+
+            elif line.startswith("2 "):
+
+                if len(lines_2) < len(lines_1):
+                    # records without name get their catalog number
+                    names.append(name or line[2:7].strip())
+                    lines_2.append(line)
+                    name = ""
+
+            else:
+
+                name = line.strip()
+                # a name line without elements, drop its line 1
+                del lines_1[len(lines_2) :]
+
+        del lines_1[len(lines_2) :]
 
-        with open(f"{file_location}", "r", encoding="utf-8") as tle:
-            content = tle.read()
+        return [names, lines_1, lines_2]
 
-        satellites = pattern.findall(content)
-        satellites = [satellite.strip("\n") for satellite in satellites]
-        satellites = [satellite.strip() for satellite in satellites]
+    @staticmethod
+    def _lines_to_bytes(lines: list) -> np.ndarray:
+        """
+        Lines of elements as a matrix of bytes with one row per line,
+        short lines are padded with spaces
+        """
 
-        return satellites
+        records = "".join([f"{line[:69]:69}" for line in lines]).encode(
+            "ascii", errors="replace"
+        )
+
+        return np.frombuffer(records, dtype=np.uint8).reshape(-1, 69)
 
     @staticmethod
-    def unique_satellites(satellites: list) -> list:
+    def _get_field(records: np.ndarray, start: int, finish: int):
         """
-        If a satellite is repeated in the list, it will add an
-        index to defentiate them
+        Columns [start, finish) of the lines of elements as floats
         """
 
-        number_of_satellites = len(satellites)
+        field = np.ascontiguousarray(records[:, start:finish])
 
-        for idx_a in range(number_of_satellites):
+        return field.view(f"S{finish - start}").ravel().astype(float)
 
-            for idx_b in range(idx_a, number_of_satellites):
+    @staticmethod
+    def _valid_checksum(records: np.ndarray) -> np.ndarray:
+        """
+        Modulo 10 checksum of the lines of elements: digits count by
+        their value, minus signs count as one
+        """
+
+        # value of each byte in the checksum
+        byte_value = np.zeros(256, dtype=np.uint8)
+        byte_value[ord("0") : ord("9") + 1] = np.arange(10)
+        byte_value[ord("-")] = 1
+
+        checksum = byte_value[records[:, :68]].sum(axis=1, dtype=np.int32)
+        check_digit = records[:, 68].astype(int) - ord("0")
 
-                if satellites[idx_b] == satellites[idx_a]:
+        return checksum % 10 == check_digit
 
-                    satellites[idx_b] = f"{satellites[idx_b]}-{idx_b:02d}"
+    @staticmethod
+    def _valid_numeric(field: np.ndarray) -> np.ndarray:
+        """
+        Whether the columns of the lines of elements only hold digits,
+        blanks, signs and decimal points
+        """
 
-        return satellites
+        is_numeric = np.zeros(256, dtype=bool)
+        is_numeric[np.frombuffer(b"0123456789 +-.", dtype=np.uint8)] = True
+
+        return is_numeric[field].all(axis=1)
+
+    @staticmethod
+    def _get_catalog_number(field: np.ndarray) -> np.ndarray:
+        """
+        Catalog numbers from columns 3 to 7 of the lines of elements.
+        Numbers above 99999 use the alpha-5 scheme: A0001 -> 100001,
+        where letters I and O are skipped
+        """
+
+        field = field.astype(int)
+        digits = np.where(
+            (field >= ord("0")) & (field <= ord("9")), field - ord("0"), 0
+        )
+
+        letter = field[:, 0] - ord("A")
+        letter -= (field[:, 0] > ord("I")).astype(int)
+        letter -= (field[:, 0] > ord("O")).astype(int)
+
+        first_digit = np.where(
+            (field[:, 0] >= ord("A")) & (field[:, 0] <= ord("Z")),
+            letter + 10,
+            digits[:, 0],
+        )
+
+        return first_digit * 10000 + digits[:, 1:] @ np.array(
+            [1000, 100, 10, 1]
+        )
 
     @staticmethod
     def get_time_stamp() -> str:
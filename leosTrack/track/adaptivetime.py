@@ -3,13 +3,24 @@ import datetime
 
 import numpy as np
 import pyorbital
+from pyorbital import astronomy
+from pyorbital.orbital import Orbital
 
 from leosTrack import output
-from leosTrack.track.visible import ComputeVisibility, CONVERT
+from leosTrack.track.interpolation import (
+    INTERPOLATION_TOLERANCE,
+    get_nodes,
+    hermite_interpolation,
+)
+from leosTrack.track.vectorized import VectorizedWindow
 
 
-class AdaptiveTime(ComputeVisibility):
-    """Class to compute whether a satellite is visible or not"""
+class AdaptiveTime(VectorizedWindow):
+    """
+    Class to compute whether a satellite is visible or not in a custom
+    time window. With set_interpolation, the track comes from a coarse
+    propagation as in VectorizedWindow, otherwise from the loop
+    """
 
     def __init__(
         self,
@@ -19,7 +30,7 @@ class AdaptiveTime(ComputeVisibility):
         tle_file_location: dict,
     ):
         # init parent class
-        ComputeVisibility.__init__(
+        VectorizedWindow.__init__(
             self,
             time_parameters,
             observatory_data,
@@ -27,96 +38,126 @@ class AdaptiveTime(ComputeVisibility):
             tle_file_location,
         )
 
+        # seconds between propagations, see set_interpolation
+        self.coarse_delta = None
+        self.interpolation_tolerance = INTERPOLATION_TOLERANCE
+
     def compute_visibility_of_satellite(self, satellite_name: str) -> list:
         """
         PARAMETERS
             satellite: name of a satellite, eg, "ONEWEB-0008"
 
         OUTPUT
-            list with visible satellites data ?
+            [satellite_name, records] where records is an array with
+            dtype leosTrack.output.RECORD_DTYPE, one per visible time
+            step. If the satellite is not visible, None
         """
 
         ######################################################################
-        # I have to set the observer per satelitte inside this function,
-        # otherwise with mp.pool the line:
-        # observer = ephem.Observer()
-        # cannot be serialized avoiding the parallel computation.
-        # Therefore in parallel the observer will be set over and over
-        self._set_observer()
-        satellite = self._set_dark_satellite(satellite_name)
-
-        start_date_time, finish_date_time = self.get_date_time_object(
-            time_parameters=self.time_parameters,
-            time_zone=self.observatory_data["tz"],
-        )
+        # ephem.Observer cannot be serialized, so it is not sent to the
+        # processes of mp.pool. Each process sets it once, either in
+        # set_worker_state or here in its first satellite
+        if self.observer is None:
+            self._set_observer()
 
-        date_time = start_date_time
+        try:
 
-        observation_window_seconds = (
-            finish_date_time - start_date_time
-        ).total_seconds()
+            satellite = self._set_dark_satellite(satellite_name)
+
+        except (pyorbital.orbital.OrbitalError, NotImplementedError):
+
+            return None
+
+        time_grid = self.get_time_grid()
+        sun_ephemeris = self.get_sun_ephemeris()
+
+        if time_grid.size == 0:
+            # the sun is never within the zenith bounds
+            return None
 
-        number_of_time_steps = int(
-            observation_window_seconds / self.time_delta.total_seconds()
-        )
         #######################################################################
-        previous_satellite_azimuth = 0
-        previous_satellite_altitude = 0
+        # the whole track at once, interpolated between propagations
+        # every coarse_delta
+        if self.coarse_delta is not None:
+
+            try:
+
+                propagation = self.interpolate_satellite(
+                    satellite, self.get_time_steps()
+                )
+
+            except Exception:
+                # e.g, 'Satellite crashed at time %s', the loop handles
+                # the time steps one at a time
+                pass
+
+            else:
+
+                visibility = self.get_visible_records(
+                    satellite_name, propagation
+                )
+
+                # satellite_name when not visible, None as in the loop
+                return visibility if isinstance(visibility, list) else None
+        #######################################################################
+        date_time = time_grid[0].tolist()
+        previous_date_time = date_time - self.time_delta
+        #######################################################################
+        try:
+
+            previous_satellite_coordinates = self.get_satellite_geometry(
+                satellite, date_time - self.time_delta
+            )[1]
+
+        except Exception:
+            # catches either:
+            # 'Satellite crashed at time %s', utc_time
+            # 'e**2 >= 1 at %s', utc_time
+
+            return None
         #######################################################################
         visible_satellite_data = []
         #######################################################################
         print(f"Compute visibility of: {satellite_name}", end="\r")
 
-        for _ in range(number_of_time_steps):
+        for step, date_time in enumerate(time_grid.tolist()):
             # compute current latitude, longitude of the satellite's
-            # footprint and its current orbital altitude
-            # satellite_lon_lat_alt = satellite.get_lonlatalt(date_time)
+            # footprint and its current orbital altitude, as well as the
+            # satellite azimuth and elevation from the observer
+            # coordinates, with a single propagation. Negative elevation
+            # implies satellite is under the horizon
+            # satellite_azimuth, satellite_altitude = satellite_coordinates
             # Check with jeremy what was the error that motivated this block
             try:
-                satellite_lon_lat_alt = satellite.get_lonlatalt(date_time)
+
+                [
+                    satellite_lon_lat_alt,
+                    satellite_coordinates,
+                    _,
+                ] = self.get_satellite_geometry(satellite, date_time)
+
+                if date_time - previous_date_time != self.time_delta:
+                    # first step after a gap in the time grid, e.g,
+                    # between twilight intervals
+                    previous_satellite_coordinates = (
+                        self.get_satellite_geometry(
+                            satellite, date_time - self.time_delta
+                        )[1]
+                    )
 
             except NotImplementedError:
 
                 continue
             ###################################################################
-            # uses the observer coordinates to compute the satellite azimuth
-            # and elevation, negative elevation implies satellite is under
-            # the horizon. altitude must be in kilometers
-            # satellite_azimuth, satellite_altitude = satellite_coordinates
-
-            satellite_coordinates = satellite.get_observer_look(
-                date_time,
-                self.observatory_data["longitude"],
-                self.observatory_data["latitude"],
-                self.observatory_data["altitude"] / 1000.0,
-            )
-            ###################################################################
-            # gets the Sun's RA and DEC at the time of observation
+            # gets the Sun's RA and DEC at the time of observation from
+            # the ephemeris shared by all satellites
             # sun_right_ascension, sun_declination = sun_coordinates
 
-            sun_coordinates = pyorbital.astronomy.sun_ra_dec(date_time)
-            # convert to list and allow to update variables later on
-            sun_coordinates = list(sun_coordinates)
-
-            sun_coordinates[0] = CONVERT.right_ascension_in_radians_to_hours(
-                right_ascension=sun_coordinates[0]
-            )
-            sun_coordinates[1] = np.rad2deg(sun_coordinates[1])
+            sun_coordinates = sun_ephemeris.get_sun_coordinates(step)
             ###################################################################
             self._update_observer_date(date_time)
-
-            [
-                satellite_ra_hms,
-                satellite_dec_dms,
-            ] = self.get_satellite_ra_dec_from_azimuth_and_altitude(
-                satellite_coordinates[0], satellite_coordinates[1]
-            )
             ###################################################################
-            sun_zenith = pyorbital.astronomy.sun_zenith_angle(
-                date_time,
-                self.observatory_data["longitude"],
-                self.observatory_data["latitude"],
-            )
+            sun_zenith = sun_ephemeris.zenith[step]
 
             satellite_visibility = self.check_visibility(
                 satellite_coordinates[1], sun_zenith
@@ -127,40 +168,131 @@ class AdaptiveTime(ComputeVisibility):
                 ###############################################################
                 # compute the change in AZ and ALT of the satellite position
                 # between current and previous observation
-                angular_velocity = self.angular_velocity(
-                    satellite_coordinates,
-                    previous_satellite_azimuth,
-                    previous_satellite_altitude,
+                [
+                    satellite_ra_dec,  # [ra, dec]
+                    angular_velocity,
+                    position_angle,
+                ] = self.get_satellite_motion(
+                    satellite_coordinates, previous_satellite_coordinates
                 )
 
-                data_str, data_str_simple = output.data_formating(
-                    date_time,
-                    satellite_lon_lat_alt,
-                    satellite_coordinates[0],
-                    satellite_coordinates[1],
-                    satellite_ra_hms[0],
-                    satellite_ra_hms[1],
-                    satellite_ra_hms[2],
-                    satellite_dec_dms[0],
-                    satellite_dec_dms[1],
-                    satellite_dec_dms[2],
-                    sun_coordinates[0],
-                    sun_coordinates[1],
-                    sun_zenith,
-                    angular_velocity,
+                visible_satellite_data.append(
+                    output.data_record(
+                        date_time,
+                        satellite_lon_lat_alt,
+                        satellite_coordinates,  # [azimuth, altitude]
+                        satellite_ra_dec,  # [ra, dec]
+                        sun_coordinates,  # [ra, dec]
+                        sun_zenith,
+                        angular_velocity,
+                        position_angle,
+                    )
                 )
-                ##############################################################
-                visible_satellite_data.append([data_str, data_str_simple])
             ###################################################################
             # current position, time as the "previous" for next observation
-            # previous_satellite_azimuth = satellite_azimuth
-            # previous_satellite_altitude = satellite_altitude
-            previous_satellite_azimuth = satellite_coordinates[0]
-            previous_satellite_altitude = satellite_coordinates[1]
-            date_time += self.time_delta
+            # use [:] to make a copy of list
+            previous_satellite_coordinates = satellite_coordinates[:]
+            previous_date_time = date_time
         #######################################################################
         if len(visible_satellite_data) > 0:
-            return [[satellite_name] + data for data in visible_satellite_data]
+            return [
+                satellite_name,
+                np.array(visible_satellite_data, dtype=output.RECORD_DTYPE),
+            ]
+
+        return None
+
+    def set_interpolation(
+        self,
+        coarse_delta: float,
+        tolerance: float = INTERPOLATION_TOLERANCE,
+    ) -> None:
+        """
+        Propagate satellites every coarse_delta and interpolate the track
+        at the time steps of the window, see interpolate_satellite
+
+        PARAMETERS
+            coarse_delta: seconds between propagations, None to
+                propagate at every time step in the loop
+            tolerance: largest error of the interpolated position in
+                meters
+        """
+
+        self.coarse_delta = coarse_delta
+        self.interpolation_tolerance = tolerance
+
+    def interpolate_satellite(
+        self, satellite: Orbital, date_time: np.ndarray
+    ) -> list:
+        """
+        Same as propagate_satellite, but SGP4 only runs at nodes every
+        coarse_delta and the position and velocity at date_time come
+        from a cubic Hermite interpolation. The interpolation is checked
+        against direct propagation at the middle and at the quarters of
+        every interval, around where its error is largest. While the
+        error is above the tolerance, coarse_delta is halved. If it gets
+        down to the time step, the satellite is propagated at every time step
+
+        PARAMETERS
+            satellite: instance of pyorbital.orbital.Orbital
+            date_time: sorted array of numpy.datetime64 in UTC
+
+        OUTPUTS
+            same as propagate_satellite
+        """
+
+        coarse_delta = self.coarse_delta
+
+        while coarse_delta > self.time_delta.total_seconds():
+
+            nodes = get_nodes(date_time, coarse_delta)
+
+            position, velocity = satellite.get_position(
+                nodes, normalize=False
+            )
+
+            # the error of the fourth derivative peaks in the middle of
+            # an interval. The velocity of SGP4 departs from the
+            # derivative of its position by a few cm/s, that error
+            # vanishes in the middle and peaks near the quarters
+            interval = nodes[1:] - nodes[:-1]
+            checks = np.concatenate(
+                [nodes[:-1] + interval * quarter // 4 for quarter in [1, 2, 3]]
+            )
+
+            error = np.max(
+                np.linalg.norm(
+                    satellite.get_position(checks, normalize=False)[0]
+                    - hermite_interpolation(
+                        nodes, position, velocity, checks
+                    )[0],
+                    axis=0,
+                )
+            )
+
+            # km to meters
+            if error * 1e3 <= self.interpolation_tolerance:
+                break
+
+            coarse_delta /= 2
+
+        else:
+
+            return self.propagate_satellite(satellite, date_time)
+
+        position, velocity = hermite_interpolation(
+            nodes, position, velocity, date_time
+        )
+
+        greenwich_sidereal_time = astronomy.gmst(date_time)
+
+        return [
+            date_time,
+            position,
+            velocity,
+            greenwich_sidereal_time,
+            self.get_footprint(position, greenwich_sidereal_time),
+        ]
 
     @staticmethod
     def get_date_time_object(time_parameters: dict, time_zone: int) -> list:
@@ -0,0 +1,191 @@
+"""Sun coordinates shared by all satellites in a run"""
+import copy
+
+import numpy as np
+from pyorbital import astronomy
+from scipy.optimize import brentq
+
+###############################################################################
+# CONSTANTS
+# sampling of the sun zenith before refining its crossings, in seconds
+TWILIGHT_SCAN_STEP = 60.0
+# tolerance of the crossing times, in seconds
+TWILIGHT_TOLERANCE = 1e-3
+###############################################################################
+
+
+class SunEphemeris:
+    """
+    Sun RA, DEC and zenith angle at every time step of the observation
+    window. They only depend on time and observatory, therefore they are
+    computed once per run and shared with every satellite
+    """
+
+    def __init__(
+        self, time_grid: np.ndarray, longitude: float, latitude: float
+    ):
+        """
+        PARAMETERS
+            time_grid: UTC time steps of the observation window
+            longitude: of the observatory in degrees, negative to the west
+            latitude: of the observatory in degrees
+        """
+
+        self.time_grid = time_grid
+
+        right_ascension, declination = astronomy.sun_ra_dec(
+            time_grid
+        )
+        # same conversion as ConvertUnits.right_ascension_in_radians_to_hours
+        right_ascension = np.rad2deg(right_ascension)
+        right_ascension = np.where(
+            right_ascension < 0, right_ascension + 360, right_ascension
+        )
+
+        self.right_ascension = right_ascension * (24.0 / 360.0)  # hours
+        self.declination = np.rad2deg(declination)  # degrees
+
+        self.zenith = astronomy.sun_zenith_angle(
+            time_grid, longitude, latitude
+        )
+
+    def get_sun_coordinates(self, step: int) -> list:
+        """
+        PARAMETERS
+            step: index of the time step in the time grid
+
+        OUTPUTS
+            [sun right ascension in hours, sun declination in degrees]
+        """
+
+        return [self.right_ascension[step], self.declination[step]]
+
+    def get_slice(self, start: int, stop: int) -> "SunEphemeris":
+        """
+        Ephemeris of the time steps start to stop of the time grid,
+        without computing them again
+
+        PARAMETERS
+            start, stop: indexes of the time grid, stop excluded
+        """
+
+        return self.get_steps(slice(start, stop))
+
+    def get_steps(self, steps) -> "SunEphemeris":
+        """
+        Ephemeris of some time steps of the time grid, without computing
+        them again
+
+        PARAMETERS
+            steps: indexes of the time grid, either a slice or an array
+        """
+
+        sun_ephemeris = copy.copy(self)
+
+        for attribute in [
+            "time_grid",
+            "right_ascension",
+            "declination",
+            "zenith",
+        ]:
+            values = getattr(self, attribute)
+            setattr(sun_ephemeris, attribute, values[steps])
+
+        return sun_ephemeris
+
+    def evaluations_saved(self, number_of_satellites: int) -> int:
+        """
+        Number of sun_ra_dec and sun_zenith_angle evaluations saved
+        with respect to computing them for every satellite
+
+        PARAMETERS
+            number_of_satellites: satellites sharing the ephemeris
+        """
+
+        evaluations_per_satellite = 2 * self.time_grid.size
+
+        return (number_of_satellites - 1) * evaluations_per_satellite
+
+    @staticmethod
+    def get_zenith_intervals(
+        start_date_time: np.datetime64,
+        finish_date_time: np.datetime64,
+        longitude: float,
+        latitude: float,
+        zenith_bounds: list,
+    ) -> list:
+        """
+        Solve for the times at which the sun zenith crosses the bounds and
+        return the intervals where the sun zenith lies between them
+
+        PARAMETERS
+            start_date_time: UTC start of the observation window
+            finish_date_time: UTC end of the observation window
+            longitude: of the observatory in degrees, negative to the west
+            latitude: of the observatory in degrees
+            zenith_bounds: [sun_zenith_lowest, sun_zenith_highest]
+
+        OUTPUTS
+            intervals: [[start, finish], ...] as numpy.datetime64 in UTC
+        """
+
+        start_date_time = np.datetime64(start_date_time, "us")
+        window_seconds = (
+            np.datetime64(finish_date_time, "us") - start_date_time
+        ) / np.timedelta64(1, "s")
+
+        def sun_zenith(seconds):
+            micro_seconds = np.round(np.asarray(seconds) * 1e6)
+            date_time = start_date_time + micro_seconds.astype(
+                "timedelta64[us]"
+            )
+
+            return astronomy.sun_zenith_angle(
+                date_time, longitude, latitude
+            )
+
+        #######################################################################
+        scan_seconds = np.append(
+            np.arange(0, window_seconds, TWILIGHT_SCAN_STEP), window_seconds
+        )
+        scan_zenith = sun_zenith(scan_seconds)
+
+        crossings = [0.0, window_seconds]
+
+        for zenith_bound in zenith_bounds:
+
+            difference = scan_zenith - zenith_bound
+            sign_changes = np.flatnonzero(
+                difference[:-1] * difference[1:] < 0
+            )
+
+            for idx in sign_changes:
+
+                crossing = brentq(
+                    lambda seconds: sun_zenith(seconds) - zenith_bound,
+                    scan_seconds[idx],
+                    scan_seconds[idx + 1],
+                    xtol=TWILIGHT_TOLERANCE,
+                )
+
+                crossings.append(crossing)
+        #######################################################################
+        crossings = np.unique(crossings)
+        intervals = []
+
+        for start_seconds, finish_seconds in zip(crossings, crossings[1:]):
+
+            middle_zenith = sun_zenith(0.5 * (start_seconds + finish_seconds))
+
+            if zenith_bounds[0] < middle_zenith < zenith_bounds[1]:
+
+                intervals.append(
+                    [
+                        start_date_time
+                        + np.timedelta64(int(start_seconds * 1e6), "us"),
+                        start_date_time
+                        + np.timedelta64(int(finish_seconds * 1e6), "us"),
+                    ]
+                )
+
+        return intervals
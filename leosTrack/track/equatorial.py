@@ -0,0 +1,543 @@
+"""Topocentric J2000 RA and DEC from azimuth and altitude with arrays"""
+import copy
+
+import numpy as np
+from pyorbital import astronomy
+
+###############################################################################
+# CONSTANTS
+# atmosphere of the ephem observer, see ComputeVisibility._set_observer
+PRESSURE = 1010  # millibar
+TEMPERATURE = 15  # celsius
+ARCSEC = np.pi / (180 * 3600)  # radians
+# constant of aberration
+ABERRATION = 20.49552 * ARCSEC
+# largest distance to ephem.Observer.radec_of, see EquatorialFrame. Most
+# of it comes from the annual aberration, ephem departs from Meeus,
+# Astronomical Algorithms, equation 23.3 by up to 0.35"
+RADEC_TOLERANCE = 0.5 * ARCSEC
+# largest terms of the IAU 1980 nutation, Meeus, Astronomical Algorithms,
+# table 22.A. Multiples of D, M, M', F, Omega, then the coefficients of
+# the sine for the longitude and of the cosine for the obliquity in
+# 0.0001 arcsec, constant and times T. The truncation is below 0.05"
+NUTATION_TERMS = np.array(
+    [
+        [0, 0, 0, 0, 1, -171996, -174.2, 92025, 8.9],
+        [-2, 0, 0, 2, 2, -13187, -1.6, 5736, -3.1],
+        [0, 0, 0, 2, 2, -2274, -0.2, 977, -0.5],
+        [0, 0, 0, 0, 2, 2062, 0.2, -895, 0.5],
+        [0, 1, 0, 0, 0, 1426, -3.4, 54, -0.1],
+        [0, 0, 1, 0, 0, 712, 0.1, -7, 0],
+        [-2, 1, 0, 2, 2, -517, 1.2, 224, -0.6],
+        [0, 0, 0, 2, 1, -386, -0.4, 200, 0],
+        [0, 0, 1, 2, 2, -301, 0, 129, -0.1],
+        [-2, -1, 0, 2, 2, 217, -0.5, -95, 0.3],
+        [-2, 0, 1, 0, 0, -158, 0, 0, 0],
+        [-2, 0, 0, 2, 1, 129, 0.1, -70, 0],
+        [0, 0, -1, 2, 2, 123, 0, -53, 0],
+        [2, 0, 0, 0, 0, 63, 0, 0, 0],
+        [0, 0, 1, 0, 1, 63, 0.1, -33, 0],
+        [2, 0, -1, 2, 2, -59, 0, 26, 0],
+        [0, 0, -1, 0, 1, -58, -0.1, 32, 0],
+        [0, 0, 1, 2, 1, -51, 0, 27, 0],
+    ]
+)
+###############################################################################
+
+
+class EquatorialFrame:
+    """
+    Array version of ephem.Observer.radec_of with epoch J2000. What only
+    depends on time, the local apparent sidereal time, nutation and
+    precession, is computed once per time step of the observation
+    window and shared by all satellites
+    """
+
+    def __init__(
+        self,
+        time_grid: np.ndarray,
+        longitude: float,
+        latitude: float,
+        pressure: float = PRESSURE,
+        temperature: float = TEMPERATURE,
+    ):
+        """
+        PARAMETERS
+            time_grid: UTC time steps of the observation window
+            longitude: of the observatory in degrees, negative to the west
+            latitude: geodetic latitude of the observatory in degrees
+            pressure: in millibar, 0 to skip the refraction
+            temperature: in celsius
+        """
+
+        self.time_grid = np.asarray(time_grid, dtype="datetime64[us]")
+        self.latitude = np.radians(latitude)
+        self.pressure = pressure
+        self.temperature = temperature
+
+        self.centuries = get_julian_centuries(self.time_grid)
+
+        [
+            nutation_longitude,
+            nutation_obliquity,
+            mean_obliquity,
+        ] = get_nutation(self.centuries)
+
+        self.obliquity = mean_obliquity + nutation_obliquity
+
+        # local apparent sidereal time
+        self.sidereal_time = (
+            astronomy.gmst(self.time_grid)
+            + np.radians(longitude)
+            + nutation_longitude * np.cos(self.obliquity)
+        )
+
+        # true equator and equinox of date to mean of date, then to J2000
+        nutation = _rotation_matrix(0, -self.obliquity) @ (
+            _rotation_matrix(2, -nutation_longitude)
+            @ _rotation_matrix(0, mean_obliquity)
+        )
+
+        self.rotation = np.swapaxes(
+            nutation @ get_precession_matrix(self.centuries), -1, -2
+        )
+
+    def get_slice(self, start: int, stop: int) -> "EquatorialFrame":
+        """
+        Frame of the time steps start to stop of the time grid, without
+        computing them again
+
+        PARAMETERS
+            start, stop: indexes of the time grid, stop excluded
+        """
+
+        return self.get_steps(slice(start, stop))
+
+    def get_steps(self, steps) -> "EquatorialFrame":
+        """
+        Frame of some time steps of the time grid, without computing
+        them again
+
+        PARAMETERS
+            steps: indexes of the time grid, either a slice or an array
+        """
+
+        equatorial_frame = copy.copy(self)
+
+        for attribute in [
+            "time_grid",
+            "centuries",
+            "obliquity",
+            "sidereal_time",
+            "rotation",
+        ]:
+            values = getattr(self, attribute)
+            setattr(equatorial_frame, attribute, values[steps])
+
+        return equatorial_frame
+
+    def get_ra_dec(
+        self, azimuth: np.ndarray, altitude: np.ndarray, steps: np.ndarray
+    ) -> list:
+        """
+        The refraction is removed from the altitude, the local apparent
+        sidereal time gives the apparent RA and DEC, then aberration,
+        nutation and precession are undone. Agrees with ephem within
+        RADEC_TOLERANCE
+
+        PARAMETERS
+            azimuth: in degrees, from north to east
+            altitude: apparent altitude in degrees
+            steps: index in the time grid of each position
+
+        OUTPUTS
+            [right ascension in hours, declination in degrees]
+        """
+
+        azimuth = np.radians(azimuth)
+        altitude = unrefract(
+            np.radians(altitude), self.pressure, self.temperature
+        )
+        #######################################################################
+        hour_angle = np.arctan2(
+            -np.sin(azimuth) * np.cos(altitude),
+            np.cos(self.latitude) * np.sin(altitude)
+            - np.sin(self.latitude) * np.cos(altitude) * np.cos(azimuth),
+        )
+
+        declination = np.arcsin(
+            np.sin(self.latitude) * np.sin(altitude)
+            + np.cos(self.latitude) * np.cos(altitude) * np.cos(azimuth)
+        )
+
+        right_ascension = self.sidereal_time[steps] - hour_angle
+
+        [right_ascension, declination] = remove_aberration(
+            right_ascension,
+            declination,
+            self.centuries[steps],
+            self.obliquity[steps],
+        )
+        #######################################################################
+        direction = np.stack(
+            [
+                np.cos(declination) * np.cos(right_ascension),
+                np.cos(declination) * np.sin(right_ascension),
+                np.sin(declination),
+            ],
+            axis=-1,
+        )
+
+        direction = np.einsum(
+            "...ij,...j->...i", self.rotation[steps], direction
+        )
+
+        right_ascension = np.arctan2(direction[..., 1], direction[..., 0])
+        right_ascension = np.mod(np.rad2deg(right_ascension), 360.0)
+
+        declination = np.rad2deg(np.arcsin(np.clip(direction[..., 2], -1, 1)))
+
+        return [right_ascension * (24.0 / 360.0), declination]
+
+
+def get_angular_separation(
+    right_ascension: np.ndarray,
+    declination: np.ndarray,
+    previous_right_ascension: np.ndarray,
+    previous_declination: np.ndarray,
+) -> np.ndarray:
+    """
+    Angular distance between two positions with the haversine formula,
+    same as ComputeVisibility.angular_velocity before dividing by the
+    time step
+
+    PARAMETERS
+        right_ascension, previous_right_ascension: in hours
+        declination, previous_declination: in degrees
+
+    OUTPUTS
+        angular_separation: in arcseconds
+    """
+
+    right_ascension = np.radians(right_ascension * 15.0)
+    previous_right_ascension = np.radians(previous_right_ascension * 15.0)
+    declination = np.radians(declination)
+    previous_declination = np.radians(previous_declination)
+
+    angular_separation = 2 * np.arcsin(
+        np.sqrt(
+            np.sin(0.5 * (declination - previous_declination)) ** 2
+            + np.cos(declination)
+            * np.cos(previous_declination)
+            * np.sin(0.5 * (right_ascension - previous_right_ascension)) ** 2
+        )
+    )
+
+    return angular_separation / ARCSEC
+
+
+def get_position_angle(
+    right_ascension: np.ndarray,
+    declination: np.ndarray,
+    previous_right_ascension: np.ndarray,
+    previous_declination: np.ndarray,
+) -> np.ndarray:
+    """
+    Direction of the motion from the previous position to the current
+    one, e.g, the direction of the streak of a satellite
+
+    PARAMETERS
+        right_ascension, previous_right_ascension: in hours
+        declination, previous_declination: in degrees
+
+    OUTPUTS
+        position_angle: in degrees, from north through east in [0, 360)
+    """
+
+    delta_right_ascension = np.radians(
+        (right_ascension - previous_right_ascension) * 15.0
+    )
+    declination = np.radians(declination)
+    previous_declination = np.radians(previous_declination)
+
+    position_angle = np.arctan2(
+        np.sin(delta_right_ascension) * np.cos(declination),
+        np.cos(previous_declination) * np.sin(declination)
+        - np.sin(previous_declination)
+        * np.cos(declination)
+        * np.cos(delta_right_ascension),
+    )
+
+    return np.mod(np.rad2deg(position_angle), 360.0)
+
+
+def get_angular_motion(
+    right_ascension: np.ndarray,
+    declination: np.ndarray,
+    previous_right_ascension: np.ndarray,
+    previous_declination: np.ndarray,
+    time_delta: float,
+) -> list:
+    """
+    Angular speed and position angle of the motion over whole arrays
+    of positions, see get_angular_separation and get_position_angle
+
+    PARAMETERS
+        right_ascension, previous_right_ascension: in hours
+        declination, previous_declination: in degrees
+        time_delta: seconds between the previous and current positions
+
+    OUTPUTS
+        [angular_velocity, position_angle]
+            angular_velocity: in arcseconds per second
+            position_angle: in degrees
+    """
+
+    coordinates = [
+        right_ascension,
+        declination,
+        previous_right_ascension,
+        previous_declination,
+    ]
+
+    return [
+        get_angular_separation(*coordinates) / time_delta,
+        get_position_angle(*coordinates),
+    ]
+
+
+def unrefract(
+    altitude: np.ndarray, pressure: float, temperature: float
+) -> np.ndarray:
+    """
+    True altitude from the apparent one, same formulas as libastro,
+    the library behind ephem: a rational fit below 15 degrees and the
+    tangent law above
+
+    PARAMETERS
+        altitude: apparent altitude in radians
+        pressure: in millibar
+        temperature: in celsius
+
+    OUTPUTS
+        altitude: true altitude in radians
+    """
+
+    altitude_degrees = np.rad2deg(altitude)
+
+    high_refraction = (
+        7.888888e-5 * pressure / ((273 + temperature) * np.tan(altitude))
+    )
+
+    low_refraction = np.radians(
+        pressure
+        * ((2e-5 * altitude_degrees + 1.96e-2) * altitude_degrees + 0.1594)
+        / (
+            (273 + temperature)
+            * ((8.45e-2 * altitude_degrees + 0.505) * altitude_degrees + 1.0)
+        )
+    )
+
+    # linear blend of both formulas between 14.5 and 15.5 degrees
+    weight = np.clip(altitude_degrees - 14.5, 0, 1)
+
+    refraction = low_refraction + weight * (high_refraction - low_refraction)
+
+    return altitude - refraction
+
+
+def get_julian_centuries(date_time: np.ndarray) -> np.ndarray:
+    """
+    Julian centuries since J2000.0
+
+    PARAMETERS
+        date_time: UTC time as numpy.datetime64
+    """
+
+    days = (date_time - np.datetime64("2000-01-01T12:00:00", "us")) / (
+        np.timedelta64(1, "D")
+    )
+
+    return days / 36525.0
+
+
+def get_nutation(centuries: np.ndarray) -> list:
+    """
+    Nutation in longitude and obliquity and the mean obliquity of the
+    ecliptic, see NUTATION_TERMS
+
+    PARAMETERS
+        centuries: julian centuries since J2000.0
+
+    OUTPUTS
+        [nutation in longitude, nutation in obliquity, mean obliquity]
+        in radians
+    """
+
+    centuries = np.asarray(centuries, dtype=float)
+    powers = centuries[..., None] ** np.arange(4)
+    # mean elongation of the moon, mean anomaly of the sun and of the
+    # moon, argument of latitude of the moon and longitude of its node
+    fundamental_arguments = powers @ np.array(
+        [
+            [297.85036, 357.52772, 134.96298, 93.27191, 125.04452],
+            [
+                445267.111480,
+                35999.050340,
+                477198.867398,
+                483202.017538,
+                -1934.136261,
+            ],
+            [-0.0019142, -0.0001603, 0.0086972, -0.0036825, 0.0020708],
+            [
+                1 / 189474,
+                -1 / 300000,
+                1 / 56250,
+                1 / 327270,
+                1 / 450000,
+            ],
+        ]
+    )
+
+    argument = np.radians(fundamental_arguments) @ NUTATION_TERMS[:, :5].T
+    centuries = centuries[..., None]
+
+    nutation_longitude = np.sum(
+        (NUTATION_TERMS[:, 5] + NUTATION_TERMS[:, 6] * centuries)
+        * np.sin(argument),
+        axis=-1,
+    )
+    nutation_obliquity = np.sum(
+        (NUTATION_TERMS[:, 7] + NUTATION_TERMS[:, 8] * centuries)
+        * np.cos(argument),
+        axis=-1,
+    )
+
+    mean_obliquity = (
+        powers
+        @ np.array([84381.448, -46.8150, -0.00059, 0.001813])
+    )
+
+    return [
+        nutation_longitude * 1e-4 * ARCSEC,
+        nutation_obliquity * 1e-4 * ARCSEC,
+        mean_obliquity * ARCSEC,
+    ]
+
+
+def get_precession_matrix(centuries: np.ndarray) -> np.ndarray:
+    """
+    IAU 1976 precession from the mean equator and equinox of J2000 to
+    the ones of date
+
+    PARAMETERS
+        centuries: julian centuries since J2000.0
+
+    OUTPUTS
+        precession: array with shape centuries.shape + (3, 3)
+    """
+
+    centuries = np.asarray(centuries, dtype=float)
+    powers = centuries[..., None] ** np.arange(1, 4)
+
+    zeta = powers @ np.array([2306.2181, 0.30188, 0.017998]) * ARCSEC
+    z = powers @ np.array([2306.2181, 1.09468, 0.018203]) * ARCSEC
+    theta = powers @ np.array([2004.3109, -0.42665, -0.041833]) * ARCSEC
+
+    return _rotation_matrix(2, -z) @ (
+        _rotation_matrix(1, theta) @ _rotation_matrix(2, -zeta)
+    )
+
+
+def remove_aberration(
+    right_ascension: np.ndarray,
+    declination: np.ndarray,
+    centuries: np.ndarray,
+    obliquity: np.ndarray,
+) -> list:
+    """
+    Remove the annual aberration from apparent RA and DEC, Meeus,
+    Astronomical Algorithms, equation 23.3
+
+    PARAMETERS
+        right_ascension, declination: apparent, in radians
+        centuries: julian centuries since J2000.0
+        obliquity: of the ecliptic in radians
+
+    OUTPUTS
+        [right ascension, declination] in radians
+    """
+
+    # true longitude of the sun
+    mean_anomaly = np.radians(357.52911 + 35999.05029 * centuries)
+    sun_longitude = np.radians(
+        280.46646
+        + 36000.76983 * centuries
+        + (1.914602 - 0.004817 * centuries) * np.sin(mean_anomaly)
+        + (0.019993 - 0.000101 * centuries) * np.sin(2 * mean_anomaly)
+        + 0.000289 * np.sin(3 * mean_anomaly)
+    )
+    # eccentricity and longitude of the perihelion of the earth orbit
+    eccentricity = 0.016708634 - 0.000042037 * centuries
+    perihelion = np.radians(102.93735 + 1.71946 * centuries)
+    ###########################################################################
+    cos_ra = np.cos(right_ascension)
+    sin_ra = np.sin(right_ascension)
+    cos_dec = np.cos(declination)
+    sin_dec = np.sin(declination)
+    cos_obliquity = np.cos(obliquity)
+    tan_obliquity = np.tan(obliquity)
+
+    delta_right_ascension = 0
+    delta_declination = 0
+
+    for factor, longitude in [
+        [-ABERRATION, sun_longitude],
+        [eccentricity * ABERRATION, perihelion],
+    ]:
+
+        delta_right_ascension += (
+            factor
+            * (
+                cos_ra * np.cos(longitude) * cos_obliquity
+                + sin_ra * np.sin(longitude)
+            )
+            / cos_dec
+        )
+
+        delta_declination += factor * (
+            np.cos(longitude)
+            * cos_obliquity
+            * (tan_obliquity * cos_dec - sin_ra * sin_dec)
+            + cos_ra * sin_dec * np.sin(longitude)
+        )
+
+    return [
+        right_ascension - delta_right_ascension,
+        declination - delta_declination,
+    ]
+
+
+def _rotation_matrix(axis: int, angle: np.ndarray) -> np.ndarray:
+    """
+    Rotation of the coordinate frame by angle around axis, 0 for x,
+    1 for y and 2 for z
+
+    OUTPUTS
+        rotation: array with shape angle.shape + (3, 3)
+    """
+
+    angle = np.asarray(angle, dtype=float)
+
+    rotation = np.zeros(angle.shape + (3, 3))
+    rotation[..., axis, axis] = 1
+
+    [first, second] = [idx for idx in range(3) if idx != axis]
+    sign = -1 if axis == 1 else 1
+
+    rotation[..., first, first] = np.cos(angle)
+    rotation[..., second, second] = np.cos(angle)
+    rotation[..., first, second] = sign * np.sin(angle)
+    rotation[..., second, first] = -sign * np.sin(angle)
+
+    return rotation
@@ -4,9 +4,16 @@ import sys
 
 import numpy as np
 import pyorbital
+from pyorbital.orbital import Orbital
 
 from leosTrack import output
-from leosTrack.track.visible import ComputeVisibility, CONVERT
+from leosTrack.track.prefilter import (
+    get_apogee_radius,
+    get_central_angle,
+    get_central_angle_rate,
+    get_visible_central_angle,
+)
+from leosTrack.track.visible import ComputeVisibility
 
 
 class FixWindow(ComputeVisibility):
@@ -34,48 +41,42 @@ class FixWindow(ComputeVisibility):
             satellite: name of a satellite, eg, "ONEWEB-0008"
 
         OUTPUT
-            list with visible satellites data ?
+            [satellite_name, records] where records is an array with
+            dtype leosTrack.output.RECORD_DTYPE, one per visible time
+            step. If the satellite is not visible, satellite_name
         """
 
         ######################################################################
-        # I have to set the observer per satelitte inside this function,
-        # otherwise with mp.pool the line:
-        # observer = ephem.Observer()
-        # cannot be serialized avoiding the parallel computation.
-        # Therefore in parallel the observer will be set over and over
-        self._set_observer()
-
-        try: 
-        
+        # ephem.Observer cannot be serialized, so it is not sent to the
+        # processes of mp.pool. Each process sets it once, either in
+        # set_worker_state or here in its first satellite
+        if self.observer is None:
+            self._set_observer()
+
+        try:
+
             satellite = self._set_dark_satellite(satellite_name)
 
-        except pyorbital.orbital.OrbitalError:
+        except (pyorbital.orbital.OrbitalError, NotImplementedError):
+            # NotImplementedError: deep space orbits are not supported
 
             return satellite_name
 
-        start_date_time, finish_date_time = self.get_date_time_object(
-            time_parameters=self.time_parameters,
-            time_zone=self.observatory_data["tz"],
-        )
-
-        date_time = start_date_time
+        time_grid = self.get_time_grid()
+        sun_ephemeris = self.get_sun_ephemeris()
 
-        observation_window_seconds = (
-            finish_date_time - start_date_time
-        ).total_seconds()
+        if time_grid.size == 0:
+            # the sun is never within the zenith bounds
+            return satellite_name
 
-        number_of_time_steps = int(
-            observation_window_seconds / self.time_delta.total_seconds()
-        )
+        date_time = time_grid[0].tolist()
+        previous_date_time = date_time - self.time_delta
         #################################################################
         try:
 
-            previous_satellite_coordinates = satellite.get_observer_look(
-                date_time-self.time_delta,
-                self.observatory_data["longitude"],
-                self.observatory_data["latitude"],
-                self.observatory_data["altitude"] / 1000.0,
-            )
+            previous_satellite_coordinates = self.get_satellite_geometry(
+                satellite, date_time - self.time_delta
+            )[1]
 
         except NotImplementedError:
 
@@ -90,17 +91,41 @@ class FixWindow(ComputeVisibility):
 
         #################################################################
         visible_satellite_data = []
+        # after the satellite sets, time steps before it could be above
+        # lowest_altitude_satellite again are not propagated
+        reach = self._get_reach(satellite)
+        next_step = 0
         #################################################################
         print(f"Compute visibility of: {satellite_name}", end="\r")
 
-        for _ in range(number_of_time_steps):
+        for step, date_time in enumerate(time_grid.tolist()):
+
+            if step < next_step:
+                continue
+
             # compute current latitude, longitude of the satellite's
-            # footprint and its current orbital altitude
-            # satellite_lon_lat_alt = satellite.get_lonlatalt(date_time)
+            # footprint and its current orbital altitude, as well as the
+            # satellite azimuth and elevation from the observer
+            # coordinates, with a single propagation. Negative elevation
+            # implies satellite is under the horizon
+            # satellite_azimuth, satellite_altitude = satellite_coordinates
             # Check with jeremy what was the error that motivated this block
             try:
 
-                satellite_lon_lat_alt = satellite.get_lonlatalt(date_time)
+                [
+                    satellite_lon_lat_alt,
+                    satellite_coordinates,
+                    _,
+                ] = self.get_satellite_geometry(satellite, date_time)
+
+                if date_time - previous_date_time != self.time_delta:
+                    # first step after a gap in the time grid, e.g,
+                    # between twilight intervals
+                    previous_satellite_coordinates = (
+                        self.get_satellite_geometry(
+                            satellite, date_time - self.time_delta
+                        )[1]
+                    )
 
             except NotImplementedError:
 
@@ -113,44 +138,15 @@ class FixWindow(ComputeVisibility):
 
                 continue
             #############################################################
-            # uses the observer coordinates to compute the satellite azimuth
-            # and elevation, negative elevation implies satellite is under
-            # the horizon. altitude must be in kilometers
-            # satellite_azimuth, satellite_altitude = satellite_coordinates
-
-            satellite_coordinates = satellite.get_observer_look(
-                date_time,
-                self.observatory_data["longitude"],
-                self.observatory_data["latitude"],
-                self.observatory_data["altitude"] / 1000.0,
-            )
-            #############################################################
-            # gets the Sun's RA and DEC at the time of observation
+            # gets the Sun's RA and DEC at the time of observation from
+            # the ephemeris shared by all satellites
             # sun_right_ascension, sun_declination = sun_coordinates
 
-            sun_coordinates = pyorbital.astronomy.sun_ra_dec(date_time)
-            # convert to list and allow to update variables later on
-            sun_coordinates = list(sun_coordinates)
-
-            sun_coordinates[0] = CONVERT.right_ascension_in_radians_to_hours(
-                right_ascension=sun_coordinates[0]
-            )
-            sun_coordinates[1] = np.rad2deg(sun_coordinates[1])
+            sun_coordinates = sun_ephemeris.get_sun_coordinates(step)
             #############################################################
             self._update_observer_date(date_time)
-
-            [
-                satellite_ra_hms,
-                satellite_dec_dms,
-            ] = self.get_satellite_ra_dec_from_azimuth_and_altitude(
-                satellite_coordinates[0], satellite_coordinates[1]
-            )
             #############################################################
-            sun_zenith = pyorbital.astronomy.sun_zenith_angle(
-                date_time,
-                self.observatory_data["longitude"],
-                self.observatory_data["latitude"],
-            )
+            sun_zenith = sun_ephemeris.zenith[step]
 
             satellite_visibility = self.check_visibility(
                 satellite_coordinates[1], sun_zenith
@@ -161,34 +157,129 @@ class FixWindow(ComputeVisibility):
                 #########################################################
                 # compute the change in AZ and ALT of the satellite position
                 # between current and previous observation
-                angular_velocity = self.angular_velocity(
-                    satellite_coordinates,
-                    previous_satellite_coordinates
+                [
+                    satellite_ra_dec,  # [ra, dec]
+                    angular_velocity,
+                    position_angle,
+                ] = self.get_satellite_motion(
+                    satellite_coordinates, previous_satellite_coordinates
                 )
 
-                data_str, data_str_simple = output.data_formating(
-                    date_time,
-                    satellite_lon_lat_alt,
-                    satellite_coordinates,  # [azimuth, altitude]
-                    satellite_ra_hms,
-                    satellite_dec_dms,
-                    sun_coordinates,  # [ra, dec]
-                    sun_zenith,
-                    angular_velocity,
+                visible_satellite_data.append(
+                    output.data_record(
+                        date_time,
+                        satellite_lon_lat_alt,
+                        satellite_coordinates,  # [azimuth, altitude]
+                        satellite_ra_dec,  # [ra, dec]
+                        sun_coordinates,  # [ra, dec]
+                        sun_zenith,
+                        angular_velocity,
+                        position_angle,
+                    )
+                )
+            else:
+
+                next_step = self._get_next_step(
+                    date_time, satellite_lon_lat_alt, reach
                 )
-                #########################################################
-                visible_satellite_data.append([data_str, data_str_simple])
             #############################################################
             # current position, time as the "previous" for next observation
             # use [:] to make a copy of list
             previous_satellite_coordinates = satellite_coordinates[:]
-            date_time += self.time_delta
+            previous_date_time = date_time
         #################################################################
         if len(visible_satellite_data) > 0:
-            return [[satellite_name] + data for data in visible_satellite_data]
+            return [
+                satellite_name,
+                np.array(visible_satellite_data, dtype=output.RECORD_DTYPE),
+            ]
 
         return satellite_name
 
+    def _get_reach(self, satellite: Orbital) -> list:
+        """
+        Bounds of the region where the satellite may be above
+        lowest_altitude_satellite and of how fast it gets there, see
+        leosTrack.track.prefilter
+
+        PARAMETERS
+            satellite: instance of pyorbital.orbital.Orbital
+
+        OUTPUTS
+            [visible_central_angle, central_angle_rate]
+                visible_central_angle: in degrees
+                central_angle_rate: in degrees per second
+        """
+
+        # orbit elements of pyorbital name the eccentricity differently
+        # across versions and older ones have no apogee, both come from
+        # the tle as in the prefilter
+        elements = {
+            "mean_motion": satellite.tle.mean_motion,
+            "eccentricity": int(satellite.tle.line2[26:33]) * 1e-7,
+        }
+
+        apogee_radius = get_apogee_radius(elements)
+
+        visible_central_angle = get_visible_central_angle(
+            apogee_radius, self.constraints["lowest_altitude_satellite"]
+        )
+
+        # pyorbital keeps mean motions in radians per minute
+        mean_motion = max(
+            satellite.orbit_elements.mean_motion,
+            satellite.orbit_elements.original_mean_motion,
+        )
+
+        central_angle_rate = get_central_angle_rate(
+            mean_motion / 60.0, elements["eccentricity"]
+        )
+
+        return [visible_central_angle, central_angle_rate]
+
+    def _get_next_step(
+        self,
+        date_time: datetime.datetime,
+        satellite_lon_lat_alt: list,
+        reach: list,
+    ) -> int:
+        """
+        First time step of the time grid at which the satellite may be
+        above lowest_altitude_satellite. Until then, the angle at the
+        center of the Earth between the observatory and the satellite
+        is larger than the one of the visible region
+
+        PARAMETERS
+            date_time: UTC time of the current position
+            satellite_lon_lat_alt: footprint of the satellite at date_time
+            reach: output of _get_reach
+
+        OUTPUTS
+            next_step: index in the time grid
+        """
+
+        [visible_central_angle, central_angle_rate] = reach
+
+        central_angle = get_central_angle(
+            *satellite_lon_lat_alt[:2],
+            self.observatory_data["longitude"],
+            self.observatory_data["latitude"],
+        )
+
+        time_to_reach = (
+            central_angle - visible_central_angle
+        ) / central_angle_rate
+
+        if time_to_reach <= self.time_delta.total_seconds():
+            return 0
+
+        return np.searchsorted(
+            self.get_time_grid(),
+            np.datetime64(
+                date_time + datetime.timedelta(seconds=time_to_reach), "us"
+            ),
+        )
+
     @staticmethod
     def get_date_time_object(time_parameters: dict, time_zone: int) -> list:
         """
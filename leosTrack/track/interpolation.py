@@ -0,0 +1,99 @@
+"""Interpolate satellite tracks between coarse propagations"""
+import numpy as np
+
+###############################################################################
+# CONSTANTS
+# largest error of the interpolated position, in meters. At 500 km from
+# the observatory, a meter is 0.4 arcsec
+INTERPOLATION_TOLERANCE = 1.0
+###############################################################################
+
+
+def get_nodes(date_time: np.ndarray, coarse_delta: float) -> np.ndarray:
+    """
+    Times at which the satellite is propagated, every coarse_delta
+    from the first time step until past the last one. Nodes fall on
+    multiples of coarse_delta since the unix epoch, so the pieces of a
+    time grid split in shards get the nodes of the whole grid
+
+    PARAMETERS
+        date_time: sorted array of numpy.datetime64 in UTC
+        coarse_delta: time between nodes in seconds
+
+    OUTPUTS
+        nodes: array of numpy.datetime64[us], at least two of them
+    """
+
+    coarse_step = np.timedelta64(int(round(coarse_delta * 1e6)), "us")
+
+    first_node = date_time[0].astype("datetime64[us]")
+    first_node -= (first_node - np.datetime64(0, "us")) % coarse_step
+
+    number_of_nodes = np.ceil((date_time[-1] - first_node) / coarse_step)
+    number_of_nodes = max(int(number_of_nodes), 1) + 1
+
+    return first_node + np.arange(number_of_nodes) * coarse_step
+
+
+###############################################################################
+def hermite_interpolation(
+    nodes: np.ndarray,
+    position: np.ndarray,
+    velocity: np.ndarray,
+    date_time: np.ndarray,
+) -> list:
+    """
+    Cubic Hermite interpolation of position and velocity. Each interval
+    between nodes uses the positions and velocities at both ends, the
+    error of the position falls with the fourth power of the interval
+
+    PARAMETERS
+        nodes: sorted array of numpy.datetime64, output of get_nodes
+        position: at the nodes in km, shape (3, number of nodes)
+        velocity: at the nodes in km/s, shape (3, number of nodes)
+        date_time: array of numpy.datetime64 between first and last node
+
+    OUTPUTS
+        [position, velocity] at date_time, shape (3, date_time.size)
+    """
+
+    one_second = np.timedelta64(1, "s")
+
+    node_time = (nodes - nodes[0]) / one_second
+    time = (date_time - nodes[0]) / one_second
+
+    interval = np.clip(
+        np.searchsorted(node_time, time, side="right") - 1,
+        0,
+        node_time.size - 2,
+    )
+
+    step = node_time[interval + 1] - node_time[interval]
+    fraction = (time - node_time[interval]) / step
+    fraction_2 = fraction**2
+    fraction_3 = fraction**3
+
+    [start_position, end_position] = [
+        position[:, interval],
+        position[:, interval + 1],
+    ]
+    [start_velocity, end_velocity] = [
+        velocity[:, interval] * step,
+        velocity[:, interval + 1] * step,
+    ]
+
+    interpolated_position = (
+        (2 * fraction_3 - 3 * fraction_2 + 1) * start_position
+        + (fraction_3 - 2 * fraction_2 + fraction) * start_velocity
+        + (-2 * fraction_3 + 3 * fraction_2) * end_position
+        + (fraction_3 - fraction_2) * end_velocity
+    )
+
+    interpolated_velocity = (
+        (6 * fraction_2 - 6 * fraction) * start_position
+        + (3 * fraction_2 - 4 * fraction + 1) * start_velocity
+        + (-6 * fraction_2 + 6 * fraction) * end_position
+        + (3 * fraction_2 - 2 * fraction) * end_velocity
+    ) / step
+
+    return [interpolated_position, interpolated_velocity]
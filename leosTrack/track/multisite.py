@@ -0,0 +1,196 @@
+"""Compute visibility of LEO sats from several observatories at once"""
+import numpy as np
+import pyorbital
+
+from leosTrack.track.vectorized import VectorizedWindow
+
+
+class MultiSiteWindow(VectorizedWindow):
+    """
+    Observation window of VectorizedWindow for several observatories.
+    Each satellite is propagated once over the union of the time steps
+    of all the observatories, then it is projected to each of them
+    """
+
+    def __init__(
+        self,
+        time_parameters: dict,
+        observatories_data: dict,
+        observation_constraints: dict,
+        tle_file_location: str,
+    ):
+        """
+        INPUTS
+
+            observatories_data: {observatory: observatory_data, ...},
+                see ComputeVisibility for observatory_data
+            time_parameters, observation_constraints, tle_file_location:
+                see ComputeVisibility
+        """
+
+        # one engine per observatory, with its own time grid, sun
+        # ephemeris and observer
+        self.sites = {
+            site: VectorizedWindow(
+                time_parameters=time_parameters,
+                observatory_data=observatory_data,
+                observation_constraints=observation_constraints,
+                tle_file_location=tle_file_location,
+            )
+            for site, observatory_data in observatories_data.items()
+        }
+
+        # the first observatory stands for all of them where a single
+        # one is needed, e.g, the fall back to the loop
+        VectorizedWindow.__init__(
+            self,
+            time_parameters,
+            next(iter(observatories_data.values())),
+            observation_constraints,
+            tle_file_location,
+        )
+
+    def compute_visibility_of_satellite(self, satellite_name: str) -> dict:
+        """
+        PARAMETERS
+            satellite: name of a satellite, eg, "ONEWEB-0008"
+
+        OUTPUT
+            {observatory: visibility, ...} where visibility is the
+            output of VectorizedWindow.compute_visibility_of_satellite
+            for that observatory
+        """
+
+        try:
+
+            satellite = self._set_dark_satellite(satellite_name)
+
+        except (pyorbital.orbital.OrbitalError, NotImplementedError):
+
+            return {site: satellite_name for site in self.sites}
+
+        time_steps = self.get_time_steps()
+
+        if time_steps.size == 0:
+            # the sun is never within the zenith bounds
+            return {site: satellite_name for site in self.sites}
+        #################################################################
+        print(f"Compute visibility of: {satellite_name}", end="\r")
+
+        try:
+
+            # a single propagation for the time steps of all observatories
+            propagation = self.propagate_satellite(satellite, time_steps)
+
+        except Exception:
+            # as in VectorizedWindow, each observatory falls back to
+            # the loop on its own
+
+            return {
+                site: engine.compute_visibility_of_satellite(satellite_name)
+                for site, engine in self.sites.items()
+            }
+        #################################################################
+        visibility = {}
+
+        for site, engine in self.sites.items():
+
+            if engine.get_time_grid().size == 0:
+
+                visibility[site] = satellite_name
+
+                continue
+
+            visibility[site] = engine.get_visible_records(
+                satellite_name, propagation
+            )
+
+        return visibility
+
+    def get_time_steps(self) -> np.ndarray:
+        """
+        Union of the time steps of all the observatories, see
+        VectorizedWindow.get_time_steps
+        """
+
+        return np.unique(
+            np.concatenate(
+                [np.empty(0, dtype="datetime64[us]")]
+                + [engine.get_time_steps() for engine in self.sites.values()]
+            )
+        )
+
+    def set_tle_index(self, tle_index: dict) -> None:
+        """
+        Same as ComputeVisibility.set_tle_index, the observatories share
+        the tle index, so it is pickled once
+        """
+
+        self.tle_index = tle_index
+
+        for engine in self.sites.values():
+            engine.set_tle_index(tle_index)
+
+    def set_radec_method(self, radec_method: str) -> None:
+        """
+        See ComputeVisibility.set_radec_method
+        """
+
+        VectorizedWindow.set_radec_method(self, radec_method)
+
+        for engine in self.sites.values():
+            engine.set_radec_method(radec_method)
+
+    def set_night(self, time_parameters: dict) -> None:
+        """
+        See ComputeVisibility.set_night
+        """
+
+        VectorizedWindow.set_night(self, time_parameters)
+
+        for engine in self.sites.values():
+            engine.set_night(time_parameters)
+
+    def get_night_state(self) -> dict:
+        """
+        Night state of each observatory, see
+        ComputeVisibility.get_night_state
+        """
+
+        return {
+            site: engine.get_night_state()
+            for site, engine in self.sites.items()
+        }
+
+    def get_shard_states(self, number_of_shards: int) -> list:
+        """
+        Shards of each observatory, see
+        ComputeVisibility.get_shard_states
+        """
+
+        site_shards = {
+            site: engine.get_shard_states(number_of_shards)
+            for site, engine in self.sites.items()
+        }
+
+        return [
+            {site: shards[shard] for site, shards in site_shards.items()}
+            for shard in range(number_of_shards)
+        ]
+
+    def set_night_state(self, night_state: dict) -> None:
+        """
+        PARAMETERS
+            night_state: output of get_night_state
+        """
+
+        for site, engine in self.sites.items():
+            engine.set_night_state(night_state[site])
+
+    def set_worker_state(self) -> None:
+        """
+        See ComputeVisibility.set_worker_state
+        """
+
+        for engine in self.sites.values():
+            engine.set_worker_state()
@@ -0,0 +1,372 @@
+"""Find passes of LEO sats above the lowest altitude with root finding"""
+import numpy as np
+import pyorbital
+from scipy.optimize import brentq, minimize_scalar
+
+from leosTrack.track.ephemeris import SunEphemeris
+from leosTrack.track.fixtime import FixWindow
+
+###############################################################################
+# CONSTANTS
+# tolerance of rise, culmination and set times, in seconds
+PASS_TOLERANCE = 1e-2
+###############################################################################
+
+
+class PassPredictor(FixWindow):
+    """
+    Compute one record per pass of a satellite above the lowest altitude
+    in the observation window of FixWindow. Elevation is scanned on the
+    time grid, then threshold crossings and culmination are refined
+    with a root finder
+    """
+
+    def compute_visibility_of_satellite(self, satellite_name: str) -> list:
+        """
+        PARAMETERS
+            satellite: name of a satellite, eg, "ONEWEB-0008"
+
+        OUTPUT
+            list with one entry per pass, [satellite_name, pass_data],
+            see get_pass_data. If there are no passes, satellite_name
+        """
+
+        ######################################################################
+        # see FixWindow on how the observer is set
+        if self.observer is None:
+            self._set_observer()
+
+        try:
+
+            satellite = self._set_dark_satellite(satellite_name)
+
+        except (pyorbital.orbital.OrbitalError, NotImplementedError):
+
+            return satellite_name
+
+        time_grid = self.get_time_grid()
+
+        if time_grid.size == 0:
+            return satellite_name
+        #######################################################################
+        print(f"Compute passes of: {satellite_name}", end="\r")
+
+        def elevation(seconds):
+
+            date_time = time_grid[0] + np.timedelta64(
+                int(round(seconds * 1e6)), "us"
+            )
+
+            return self._get_satellite_look(satellite, date_time)[1]
+
+        try:
+
+            scan_elevation = self._get_satellite_look(satellite, time_grid)[1]
+
+        except Exception:
+            # catches either:
+            # 'Satellite crashed at time %s', utc_time
+            # 'e**2 >= 1 at %s', utc_time
+
+            return satellite_name
+
+        scan_seconds = (time_grid - time_grid[0]) / np.timedelta64(1, "s")
+        #######################################################################
+        passes_data = []
+
+        for start_seconds, finish_seconds in self._get_passes(
+            scan_seconds, scan_elevation, elevation
+        ):
+
+            for interval_start, interval_finish in self._get_intervals(
+                time_grid[0]
+            ):
+                # only the part of the pass within the observation window
+                pass_start = max(start_seconds, interval_start)
+                pass_finish = min(finish_seconds, interval_finish)
+
+                if pass_start >= pass_finish:
+                    continue
+
+                passes_data.append(
+                    self.get_pass_data(
+                        satellite,
+                        time_grid[0],
+                        pass_start,
+                        pass_finish,
+                        elevation,
+                    )
+                )
+        #######################################################################
+        if len(passes_data) > 0:
+            return [[satellite_name, pass_data] for pass_data in passes_data]
+
+        return satellite_name
+
+    def get_pass_data(
+        self,
+        satellite: pyorbital.orbital.Orbital,
+        reference_time: np.datetime64,
+        start_seconds: float,
+        finish_seconds: float,
+        elevation,
+    ) -> list:
+        """
+        Geometry of a pass at start, culmination and end
+
+        PARAMETERS
+            satellite: instance of pyorbital.orbital.Orbital
+            reference_time: seconds are measured from this UTC time
+            start_seconds: start of the pass
+            finish_seconds: end of the pass
+            elevation: function of seconds that returns the elevation of
+                the satellite in degrees
+
+        OUTPUTS
+            [
+                start_date_time, start_azimuth, start_altitude,
+                peak_date_time, peak_azimuth, peak_altitude,
+                peak_ra_hours, peak_dec_degrees, peak_sun_zenith,
+                finish_date_time, finish_azimuth, finish_altitude
+            ]
+        """
+
+        culmination = minimize_scalar(
+            lambda seconds: -elevation(seconds),
+            bounds=(start_seconds, finish_seconds),
+            method="bounded",
+            options={"xatol": PASS_TOLERANCE},
+        )
+
+        # a pass cut by the observation window may still be rising at
+        # its start or setting at its end, then the peak is an endpoint
+        peak_seconds = max(
+            [start_seconds, culmination.x, finish_seconds], key=elevation
+        )
+
+        pass_data = []
+
+        for idx, seconds in enumerate(
+            [start_seconds, peak_seconds, finish_seconds]
+        ):
+
+            date_time = reference_time + np.timedelta64(
+                int(round(seconds * 1e6)), "us"
+            )
+
+            satellite_azimuth, satellite_altitude = self._get_satellite_look(
+                satellite, date_time
+            )
+
+            pass_data += [
+                date_time.tolist(),
+                float(satellite_azimuth),
+                float(satellite_altitude),
+            ]
+
+            if idx == 1:
+                # peak of the pass
+
+                self._update_observer_date(date_time.tolist())
+
+                [
+                    satellite_ra_hours,
+                    satellite_dec_degrees,
+                ] = self.get_satellite_ra_dec(
+                    satellite_azimuth, satellite_altitude
+                )
+
+                sun_zenith = pyorbital.astronomy.sun_zenith_angle(
+                    date_time,
+                    self.observatory_data["longitude"],
+                    self.observatory_data["latitude"],
+                )
+
+                pass_data += [
+                    float(satellite_ra_hours),
+                    float(satellite_dec_degrees),
+                    float(sun_zenith),
+                ]
+
+        return pass_data
+
+    def _get_passes(
+        self, scan_seconds: np.ndarray, scan_elevation: np.ndarray, elevation
+    ) -> list:
+        """
+        Bracket the crossings of the lowest altitude in the scan and
+        refine them with brentq. Local maxima of the scan below the
+        lowest altitude are refined too, since a short pass can peak
+        between two time steps
+
+        PARAMETERS
+            scan_seconds: seconds of each time step
+            scan_elevation: elevation of the satellite at each time step
+            elevation: function of seconds that returns the elevation of
+                the satellite in degrees
+
+        OUTPUTS
+            passes: [[start_seconds, finish_seconds], ...]
+        """
+
+        lowest_altitude = self.constraints["lowest_altitude_satellite"]
+        time_step = self.time_delta.total_seconds()
+
+        def above(seconds):
+            return elevation(seconds) - lowest_altitude
+
+        passes = []
+        start_seconds = None
+
+        # a pass may already be on going at the start of the time grid
+        if scan_elevation[0] > lowest_altitude:
+            start_seconds = scan_seconds[0]
+
+        for idx in range(1, scan_seconds.size):
+
+            previous_seconds, seconds = scan_seconds[idx - 1 : idx + 1]
+            previous_elevation, current_elevation = scan_elevation[
+                idx - 1 : idx + 1
+            ]
+
+            if seconds - previous_seconds > 1.5 * time_step:
+                # gap in the time grid, e.g, between twilight intervals
+                if start_seconds is not None:
+                    passes.append([start_seconds, previous_seconds])
+
+                start_seconds = None
+
+                if current_elevation > lowest_altitude:
+                    start_seconds = seconds
+
+                continue
+
+            rises = previous_elevation <= lowest_altitude < current_elevation
+            sets = current_elevation <= lowest_altitude < previous_elevation
+
+            if rises:
+
+                start_seconds = brentq(
+                    above, previous_seconds, seconds, xtol=PASS_TOLERANCE
+                )
+
+            elif sets and start_seconds is not None:
+
+                finish_seconds = brentq(
+                    above, previous_seconds, seconds, xtol=PASS_TOLERANCE
+                )
+
+                passes.append([start_seconds, finish_seconds])
+                start_seconds = None
+
+            elif (
+                current_elevation <= lowest_altitude
+                and idx < scan_seconds.size - 1
+                and previous_elevation < current_elevation
+                and scan_elevation[idx + 1] < current_elevation
+                and scan_seconds[idx + 1] - seconds < 1.5 * time_step
+            ):
+                passes += self._get_short_pass(
+                    previous_seconds, seconds + time_step, above
+                )
+
+        if start_seconds is not None:
+            passes.append([start_seconds, scan_seconds[-1]])
+
+        return passes
+
+    @staticmethod
+    def _get_short_pass(
+        start_seconds: float, finish_seconds: float, above
+    ) -> list:
+        """
+        Check if the satellite rises above the lowest altitude around a
+        local maximum of the scan
+
+        PARAMETERS
+            start_seconds, finish_seconds: bracket of the local maximum
+            above: function of seconds, elevation minus lowest altitude
+
+        OUTPUTS
+            [[start_seconds, finish_seconds]] if there is a pass,
+            otherwise []
+        """
+
+        culmination = minimize_scalar(
+            lambda seconds: -above(seconds),
+            bounds=(start_seconds, finish_seconds),
+            method="bounded",
+            options={"xatol": PASS_TOLERANCE},
+        )
+
+        if above(culmination.x) <= 0:
+            return []
+
+        return [
+            [
+                brentq(
+                    above, start_seconds, culmination.x, xtol=PASS_TOLERANCE
+                ),
+                brentq(
+                    above, culmination.x, finish_seconds, xtol=PASS_TOLERANCE
+                ),
+            ]
+        ]
+
+    def _get_intervals(self, reference_time: np.datetime64) -> list:
+        """
+        Observation intervals in seconds from reference_time: the
+        twilight intervals if set_twilight_window was called, otherwise
+        the intervals of the observation window where the sun zenith is
+        between sun_zenith_lowest and sun_zenith_highest
+
+        PARAMETERS
+            reference_time: seconds are measured from this UTC time
+
+        OUTPUTS
+            intervals: [[start_seconds, finish_seconds], ...]
+        """
+
+        if self.twilight_intervals is None:
+
+            start_date_time, finish_date_time = self.get_date_time_object(
+                time_parameters=self.time_parameters,
+                time_zone=self.observatory_data["tz"],
+            )
+
+            intervals = SunEphemeris.get_zenith_intervals(
+                start_date_time=start_date_time,
+                finish_date_time=finish_date_time,
+                longitude=self.observatory_data["longitude"],
+                latitude=self.observatory_data["latitude"],
+                zenith_bounds=[
+                    self.constraints["sun_zenith_lowest"],
+                    self.constraints["sun_zenith_highest"],
+                ],
+            )
+
+        else:
+
+            intervals = self.twilight_intervals
+
+        return [
+            [
+                (start - reference_time) / np.timedelta64(1, "s"),
+                (finish - reference_time) / np.timedelta64(1, "s"),
+            ]
+            for start, finish in intervals
+        ]
+
+    def _get_satellite_look(
+        self, satellite: pyorbital.orbital.Orbital, date_time: np.ndarray
+    ) -> list:
+        """
+        Azimuth and elevation of the satellite in degrees, with a
+        single propagation, see get_satellite_geometry
+
+        PARAMETERS
+            satellite: instance of pyorbital.orbital.Orbital
+            date_time: UTC time, either a single time or an array
+        """
+
+        return self.get_satellite_geometry(satellite, date_time)[1]
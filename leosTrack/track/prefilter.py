@@ -0,0 +1,232 @@
+"""Bounds on whether and when satellites can be visible from observatories"""
+import numpy as np
+from pyorbital.orbital import XKE, XKMPER
+
+###############################################################################
+# CONSTANTS
+# pyorbital does not propagate orbits with periods above 225 minutes.
+# Its period comes from the mean motion corrected for the oblateness of
+# the Earth, within a percent of the one of the tle, hence the margin
+DEEP_SPACE_PERIOD = 225  # minutes
+PERIOD_MARGIN = 0.01
+# margins so that no visible satellite is discarded: on the apogee for
+# the periodic terms of SGP4 around the mean elements, and on the angle
+# between the observatory and the ground track for the oscillation of
+# the inclination and geodetic vs geocentric latitudes
+RADIUS_MARGIN = 50  # km
+ANGLE_MARGIN = 1  # degrees
+# smallest radius of the Earth, an observer on it sees satellites higher
+# than an observer at any other radius
+POLAR_RADIUS = XKMPER * (1 - 1 / 298.257)  # km
+# the angular velocity of a satellite propagated with SGP4 departs from
+# the one of its mean elements by less than this fraction
+RATE_MARGIN = 0.05
+EARTH_ROTATION = 7.292115e-5  # radians per second
+###############################################################################
+
+
+def filter_satellites(
+    catalog: np.ndarray,
+    satellites: list,
+    latitudes: list,
+    lowest_altitude: float,
+) -> list:
+    """
+    Discard satellites of deep space orbits and the ones whose orbit
+    never reaches lowest_altitude above the horizon of any observatory.
+    Only the mean elements are used, so it is cheap enough to run
+    before propagating any satellite
+
+    PARAMETERS
+        catalog: output of TLE.read_catalog
+        satellites: unique identifiers of the satellites to track, e.g,
+            output of TLE.get_satellites
+        latitudes: latitude of each observatory in degrees
+        lowest_altitude: lower bound for the altitude of a visible
+            satellite in degrees
+
+    OUTPUTS
+        [satellites, number_deep_space, number_out_of_reach]
+            satellites: the ones that may be visible, same order
+            number_deep_space: satellites discarded for their period
+            number_out_of_reach: satellites discarded for their orbit
+    """
+
+    catalog = catalog[np.isin(catalog["satellite"], satellites)]
+
+    is_deep_space = get_period(catalog) >= DEEP_SPACE_PERIOD * (
+        1 + PERIOD_MARGIN
+    )
+
+    highest_altitude = np.max(
+        [get_highest_altitude(catalog, latitude) for latitude in latitudes],
+        axis=0,
+    )
+
+    is_out_of_reach = (highest_altitude < lowest_altitude) & ~is_deep_space
+
+    keep = set(catalog["satellite"][~(is_deep_space | is_out_of_reach)])
+
+    return [
+        [satellite for satellite in satellites if satellite in keep],
+        np.count_nonzero(is_deep_space),
+        np.count_nonzero(is_out_of_reach),
+    ]
+
+
+###############################################################################
+def get_period(catalog: np.ndarray) -> np.ndarray:
+    """
+    PARAMETERS
+        catalog: output of TLE.read_catalog
+
+    OUTPUTS
+        period: of each orbit in minutes
+    """
+
+    return 1440.0 / catalog["mean_motion"]
+
+
+###############################################################################
+def get_apogee_radius(catalog: np.ndarray) -> np.ndarray:
+    """
+    Largest distance to the center of the Earth of each orbit, from its
+    semi-major axis with Kepler's third law plus RADIUS_MARGIN
+
+    PARAMETERS
+        catalog: output of TLE.read_catalog
+
+    OUTPUTS
+        apogee_radius: in km
+    """
+
+    # radians per minute, as XKE
+    mean_motion = catalog["mean_motion"] * (2 * np.pi / 1440.0)
+
+    # in earth radii
+    semi_major_axis = (XKE / mean_motion) ** (2.0 / 3.0)
+
+    apogee_radius = semi_major_axis * (1 + catalog["eccentricity"]) * XKMPER
+
+    return apogee_radius + RADIUS_MARGIN
+
+
+###############################################################################
+def get_highest_altitude(catalog: np.ndarray, latitude: float) -> np.ndarray:
+    """
+    Upper bound of the altitude above the horizon each orbit reaches
+    from an observatory. The ground track of an orbit stays between
+    latitudes -inclination and inclination, so the satellite is never
+    closer to the zenith than the difference between those and the
+    latitude of the observatory, seen at the apogee
+
+    PARAMETERS
+        catalog: output of TLE.read_catalog
+        latitude: of the observatory in degrees
+
+    OUTPUTS
+        highest_altitude: in degrees
+    """
+
+    # retrograde orbits reach the same latitudes as prograde ones
+    inclination = np.minimum(
+        catalog["inclination"], 180.0 - catalog["inclination"]
+    )
+
+    # smallest angle at the center of the Earth between the observatory
+    # and the satellite
+    central_angle = np.radians(
+        np.maximum(abs(latitude) - inclination - ANGLE_MARGIN, 0)
+    )
+
+    highest_altitude = np.arctan2(
+        np.cos(central_angle) - POLAR_RADIUS / get_apogee_radius(catalog),
+        np.sin(central_angle),
+    )
+
+    return np.rad2deg(highest_altitude)
+
+
+###############################################################################
+def get_visible_central_angle(
+    apogee_radius: float, lowest_altitude: float
+) -> float:
+    """
+    Largest angle at the center of the Earth between an observatory and
+    a satellite above lowest_altitude, the one at apogee_radius seen
+    from the polar radius plus ANGLE_MARGIN
+
+    PARAMETERS
+        apogee_radius: largest distance of the satellite to the center
+            of the Earth in km
+        lowest_altitude: lower bound for the altitude of a visible
+            satellite in degrees
+
+    OUTPUTS
+        central_angle: in degrees
+    """
+
+    lowest_altitude = np.radians(lowest_altitude)
+
+    central_angle = (
+        np.arccos(POLAR_RADIUS * np.cos(lowest_altitude) / apogee_radius)
+        - lowest_altitude
+    )
+
+    return np.rad2deg(central_angle) + ANGLE_MARGIN
+
+
+###############################################################################
+def get_central_angle_rate(mean_motion: float, eccentricity: float) -> float:
+    """
+    Upper bound of how fast the angle at the center of the Earth between
+    an observatory and a satellite changes: the angular velocity of the
+    satellite at perigee plus RATE_MARGIN and the rotation of the Earth
+
+    PARAMETERS
+        mean_motion: in radians per second
+        eccentricity: of the orbit
+
+    OUTPUTS
+        central_angle_rate: in degrees per second
+    """
+
+    perigee_rate = (
+        mean_motion * np.sqrt(1 - eccentricity**2) / (1 - eccentricity) ** 2
+    )
+
+    return np.rad2deg(perigee_rate * (1 + RATE_MARGIN) + EARTH_ROTATION)
+
+
+###############################################################################
+def get_central_angle(
+    longitude: float,
+    latitude: float,
+    other_longitude: float,
+    other_latitude: float,
+) -> float:
+    """
+    Angle at the center of the Earth between two locations with the
+    haversine formula
+
+    PARAMETERS
+        longitude, latitude, other_longitude, other_latitude: in degrees
+
+    OUTPUTS
+        central_angle: in degrees
+    """
+
+    [longitude, latitude, other_longitude, other_latitude] = np.radians(
+        [longitude, latitude, other_longitude, other_latitude]
+    )
+
+    central_angle = 2 * np.arcsin(
+        np.sqrt(
+            np.sin(0.5 * (latitude - other_latitude)) ** 2
+            + np.cos(latitude)
+            * np.cos(other_latitude)
+            * np.sin(0.5 * (longitude - other_longitude)) ** 2
+        )
+    )
+
+    return np.rad2deg(central_angle)
@@ -0,0 +1,200 @@
+"""Fine tracks of the passes found by a coarse run"""
+import numpy as np
+
+from leosTrack import output
+from leosTrack.track.adaptivetime import AdaptiveTime
+from leosTrack.track.fixtime import FixWindow
+
+
+class RefineWindow(AdaptiveTime):
+    """
+    AdaptiveTime over the intervals around the passes of a satellite
+    found by a coarse run, e.g, FixWindow with 60 s steps, instead of
+    a custom time window. The time grid, the sun ephemeris and the
+    equatorial frame of each night are computed once, see
+    set_night_state, and each satellite takes the time steps inside
+    its intervals, see set_intervals
+    """
+
+    def __init__(
+        self,
+        time_parameters: dict,
+        observatory_data: dict,
+        observation_constraints: dict,
+        tle_file_location: dict,
+    ):
+        # init parent class
+        AdaptiveTime.__init__(
+            self,
+            time_parameters,
+            observatory_data,
+            observation_constraints,
+            tle_file_location,
+        )
+
+        # output of get_night_state for the whole night, see
+        # set_night_state
+        self.night_state = None
+
+    @staticmethod
+    def get_date_time_object(time_parameters: dict, time_zone: int) -> list:
+        """
+        The nights are the observation windows of the coarse run, see
+        FixWindow.get_date_time_object
+        """
+
+        return FixWindow.get_date_time_object(time_parameters, time_zone)
+
+    def set_night(self, time_parameters: dict) -> None:
+        """
+        See ComputeVisibility.set_night
+        """
+
+        AdaptiveTime.set_night(self, time_parameters)
+
+        self.night_state = None
+
+    def set_night_state(self, night_state: dict) -> None:
+        """
+        Keep the state of the whole night, set_intervals takes the time
+        steps of each satellite from it
+
+        PARAMETERS
+            night_state: output of get_night_state
+        """
+
+        AdaptiveTime.set_night_state(self, night_state)
+
+        self.night_state = night_state
+
+    def set_intervals(self, intervals: np.ndarray) -> None:
+        """
+        Time steps of the night inside the intervals. The sun ephemeris
+        and the equatorial frame of the night are indexed instead of
+        computed again for each satellite
+
+        PARAMETERS
+            intervals: [[start, end], ...] of numpy.datetime64 in UTC,
+                output of get_refine_intervals
+        """
+
+        if self.night_state is None:
+
+            self.set_sun_ephemeris()
+
+            if self.radec_method == "numpy":
+                self.set_equatorial_frame()
+
+            self.set_night_state(self.get_night_state())
+
+        time_grid = self.night_state["time_grid"]
+
+        in_intervals = np.zeros(time_grid.size, dtype=bool)
+
+        for start, end in intervals:
+            in_intervals |= (time_grid >= start) & (time_grid <= end)
+
+        steps = np.flatnonzero(in_intervals)
+
+        self.time_grid = time_grid[steps]
+
+        for attribute in ["sun_ephemeris", "equatorial_frame"]:
+
+            if self.night_state[attribute] is not None:
+                setattr(
+                    self,
+                    attribute,
+                    self.night_state[attribute].get_steps(steps),
+                )
+
+    def compute_visibility_in_intervals(
+        self, satellite_name: str, intervals: np.ndarray
+    ) -> list:
+        """
+        PARAMETERS
+            satellite_name: unique identifier, e.g, ONEWEB-0008-ID-0007
+            intervals: see set_intervals
+
+        OUTPUT
+            same as AdaptiveTime.compute_visibility_of_satellite
+        """
+
+        self.set_intervals(intervals)
+
+        return self.compute_visibility_of_satellite(satellite_name)
+
+    def set_worker_state(self) -> None:
+        """
+        Only the ephem observer, the time grid depends on the satellite
+        """
+
+        self._set_observer()
+
+
+###############################################################################
+def get_refine_intervals(
+    records: np.ndarray, time_delta: float, padding: float
+) -> np.ndarray:
+    """
+    Intervals around the passes of a satellite in a coarse run. Each
+    pass is padded on both sides, since it may start or end up to a
+    coarse time step away from its first and last visible time steps.
+    Overlapping intervals are merged
+
+    PARAMETERS
+        records: array with dtype RECORD_DTYPE of a single satellite
+        time_delta: time step of the coarse run in seconds
+        padding: seconds added before and after each pass
+
+    OUTPUTS
+        intervals: [[start, end], ...] of numpy.datetime64 in UTC
+    """
+
+    summary = output.get_pass_summary(records, time_delta)
+
+    padding = np.timedelta64(int(round(padding * 1e6)), "us")
+
+    starts = summary["start"] - padding
+    ends = summary["end"] + padding
+
+    # a pass starts a new interval if it begins after the previous ends
+    is_new = np.ones(starts.size, dtype=bool)
+    is_new[1:] = starts[1:] > np.maximum.accumulate(ends)[:-1]
+
+    interval_start = np.flatnonzero(is_new)
+
+    return np.stack(
+        [starts[interval_start], np.maximum.reduceat(ends, interval_start)],
+        axis=-1,
+    )
+
+
+###############################################################################
+def get_refine_task(
+    night: str, site: str, result, time_delta: float, padding: float
+):
+    """
+    Task of leosTrack.track.worker.refine_visibility from the result
+    of a satellite in the coarse run
+
+    PARAMETERS
+        night, site: keys of the night and observatory of the result
+        result: output of compute_visibility_of_satellite
+        time_delta, padding: see get_refine_intervals
+
+    OUTPUTS
+        (night, site, satellite_name, intervals), None if the
+        satellite is not visible
+    """
+
+    if isinstance(result, list) is False:
+        return None
+
+    [satellite_name, records] = result
+
+    return (
+        night,
+        site,
+        satellite_name,
+        get_refine_intervals(records, time_delta, padding),
+    )
@@ -0,0 +1,249 @@
+"""Compute visibility of LEO sats with whole window array operations"""
+import numpy as np
+import pyorbital
+
+from leosTrack import output
+from leosTrack.track.equatorial import get_angular_motion
+from leosTrack.track.fixtime import FixWindow
+
+
+class VectorizedWindow(FixWindow):
+    """
+    Same observation window and output as FixWindow, but the time loop
+    is replaced by array operations over all time steps of the window
+    """
+
+    def compute_visibility_of_satellite(self, satellite_name: str) -> list:
+        """
+        PARAMETERS
+            satellite: name of a satellite, eg, "ONEWEB-0008"
+
+        OUTPUT
+            list with visible satellites data, same as in
+            FixWindow.compute_visibility_of_satellite
+        """
+
+        ######################################################################
+        # see FixWindow on how the observer is set
+        if self.observer is None:
+            self._set_observer()
+
+        try:
+
+            satellite = self._set_dark_satellite(satellite_name)
+
+        except (pyorbital.orbital.OrbitalError, NotImplementedError):
+
+            return satellite_name
+
+        time_grid = self.get_time_grid()
+
+        if time_grid.size == 0:
+            # the sun is never within the zenith bounds
+            return satellite_name
+
+        time_steps = self.get_time_steps()
+        #################################################################
+        print(f"Compute visibility of: {satellite_name}", end="\r")
+
+        try:
+
+            # a single propagation for all time steps and their previous
+            propagation = self.propagate_satellite(satellite, time_steps)
+
+        except Exception:
+            # if the propagation fails at any time step, e.g,
+            # 'Satellite crashed at time %s', the loop handles the
+            # time steps one at a time
+            return FixWindow.compute_visibility_of_satellite(
+                self, satellite_name
+            )
+
+        return self.get_visible_records(satellite_name, propagation)
+
+    def get_time_steps(self) -> np.ndarray:
+        """
+        Time steps of the time grid and the step before each of them,
+        its "previous" position when computing the angular velocity.
+        For a contiguous time grid it only adds the step before the
+        window
+
+        OUTPUTS
+            time_steps: sorted array of numpy.datetime64 in UTC
+        """
+
+        time_grid = self.get_time_grid()
+        previous_time_grid = time_grid - np.timedelta64(self.time_delta, "us")
+
+        return np.union1d(time_grid, previous_time_grid)
+
+    def get_visible_records(
+        self, satellite_name: str, propagation: list
+    ) -> list:
+        """
+        Visible time steps of a satellite from its propagation. The
+        propagation may cover more time steps than the ones of this
+        observation window, e.g, the union of the windows of several
+        observatories, see MultiSiteWindow
+
+        PARAMETERS
+            satellite_name: name of the satellite
+            propagation: output of propagate_satellite at time steps
+                that include the ones of get_time_steps
+
+        OUTPUT
+            same as compute_visibility_of_satellite
+        """
+
+        if self.observer is None:
+            self._set_observer()
+
+        time_grid = self.get_time_grid()
+        previous_time_grid = time_grid - np.timedelta64(self.time_delta, "us")
+
+        # only the time steps of this window are projected
+        propagation_steps = np.searchsorted(
+            propagation[0], self.get_time_steps()
+        )
+
+        [date_time, position, velocity, greenwich_sidereal_time] = [
+            values[..., propagation_steps] for values in propagation[:4]
+        ]
+
+        satellite_lon_lat_alt = [
+            coordinate[propagation_steps] for coordinate in propagation[4]
+        ]
+
+        [satellite_azimuth, satellite_altitude] = self.get_look_angles(
+            date_time, position, velocity, greenwich_sidereal_time
+        )[0]
+
+        current_step = np.searchsorted(date_time, time_grid)
+        previous_step = np.searchsorted(date_time, previous_time_grid)
+        #################################################################
+        sun_ephemeris = self.get_sun_ephemeris()
+        sun_zenith = sun_ephemeris.zenith
+
+        visibility_mask = self.get_visibility_mask(
+            satellite_altitude[current_step], sun_zenith
+        )
+        #################################################################
+        visible_steps = np.flatnonzero(visibility_mask)
+
+        if visible_steps.size == 0:
+            return satellite_name
+
+        print(f"{satellite_name} is visible", end="\r")
+
+        records = np.empty(visible_steps.size, dtype=output.RECORD_DTYPE)
+
+        records["date_time"] = time_grid[visible_steps]
+
+        for field, coordinate in zip(
+            ["longitude", "latitude", "orbital_altitude"],
+            satellite_lon_lat_alt,
+        ):
+            records[field] = coordinate[current_step[visible_steps]]
+
+        records["azimuth"] = satellite_azimuth[current_step[visible_steps]]
+        records["altitude"] = satellite_altitude[current_step[visible_steps]]
+
+        records["sun_right_ascension"] = sun_ephemeris.right_ascension[
+            visible_steps
+        ]
+        records["sun_declination"] = sun_ephemeris.declination[visible_steps]
+        records["sun_zenith"] = sun_zenith[visible_steps]
+        #################################################################
+        if self.radec_method == "numpy":
+
+            self._set_ra_dec(
+                records,
+                visible_steps,
+                [
+                    satellite_azimuth[previous_step[visible_steps]],
+                    satellite_altitude[previous_step[visible_steps]],
+                ],
+            )
+
+            return [satellite_name, records]
+        #################################################################
+        # RA and DEC come from ephem, one visible time step at a time,
+        # the angular velocity then over all of them at once
+        previous_ra_dec = np.empty((visible_steps.size, 2))
+
+        for record, previous, idx in zip(
+            records, previous_ra_dec, visible_steps
+        ):
+
+            self._update_observer_date(time_grid[idx].tolist())
+
+            [
+                record["right_ascension"],
+                record["declination"],
+            ] = self.get_satellite_ra_dec(
+                record["azimuth"], record["altitude"]
+            )
+
+            previous[:] = self.get_satellite_ra_dec(
+                satellite_azimuth[previous_step[idx]],
+                satellite_altitude[previous_step[idx]],
+            )
+
+        [
+            records["angular_velocity"],
+            records["position_angle"],
+        ] = get_angular_motion(
+            records["right_ascension"],
+            records["declination"],
+            *previous_ra_dec.T,
+            self.time_delta.total_seconds(),
+        )
+
+        return [satellite_name, records]
+
+    def _set_ra_dec(
+        self,
+        records: np.ndarray,
+        visible_steps: np.ndarray,
+        previous_satellite_coordinates: list,
+    ) -> None:
+        """
+        Fill RA, DEC, angular velocity and position angle of the
+        records with the equatorial frame shared by all satellites
+        instead of ephem. As in get_satellite_motion, the previous
+        position is converted at the time of the current one
+
+        PARAMETERS
+            records: array with dtype RECORD_DTYPE, azimuth and
+                altitude already set
+            visible_steps: index in the time grid of each record
+            previous_satellite_coordinates: [azimuth, altitude] at the
+                time step before each record
+        """
+
+        equatorial_frame = self.get_equatorial_frame()
+
+        [
+            records["right_ascension"],
+            records["declination"],
+        ] = equatorial_frame.get_ra_dec(
+            records["azimuth"], records["altitude"], visible_steps
+        )
+
+        [
+            previous_right_ascension,
+            previous_declination,
+        ] = equatorial_frame.get_ra_dec(
+            *previous_satellite_coordinates, visible_steps
+        )
+
+        [
+            records["angular_velocity"],
+            records["position_angle"],
+        ] = get_angular_motion(
+            records["right_ascension"],
+            records["declination"],
+            previous_right_ascension,
+            previous_declination,
+            self.time_delta.total_seconds(),
+        )
@@ -1,14 +1,27 @@
 """Compute visibility of LEO sats according to observation constraints"""
 import datetime
+import sys
 
 import ephem
 import numpy as np
-from pyorbital.orbital import Orbital
-
+from pyorbital import astronomy
+from pyorbital.orbital import Orbital, XKMPER
+
+from leosTrack.track.ephemeris import SunEphemeris
+from leosTrack.track.equatorial import (
+    PRESSURE,
+    TEMPERATURE,
+    EquatorialFrame,
+    get_angular_motion,
+)
 from leosTrack.units import ConvertUnits
 
 ###############################################################################
 CONVERT = ConvertUnits()
+# how RA and DEC of satellites are computed: "ephem", one position at a
+# time with ephem.Observer.radec_of, or "numpy", the whole time grid at
+# once with EquatorialFrame. The latter only in VectorizedWindow
+RADEC_METHODS = ["ephem", "numpy"]
 
 
 class ComputeVisibility:
@@ -81,25 +94,29 @@ class ComputeVisibility:
         self.constraints = observation_constraints
         self.tle_file_location = tle_file_location
         self.observer = None
-        # self._set_observer()
-
-    def get_satellite_ra_dec_from_azimuth_and_altitude(
+        self.sun_ephemeris = None
+        self.equatorial_frame = None
+        self.radec_method = "ephem"
+        self.time_grid = None
+        self.twilight_intervals = None
+        self.tle_index = None
+        # Orbital of each satellite, reused over the nights of a date
+        # range. Each process builds its own
+        self.orbital_cache = {}
+
+    def get_satellite_ra_dec(
         self, satellite_azimuth: float, satellite_altitude: float
     ) -> list:
         """
-            Compute satellite RA [hh, mm, ss] and DEC [dd, mm, ss] using
-            satellite's azimuth and altitude in degrees.
+            Compute satellite RA and DEC using satellite's azimuth and
+            altitude in degrees.
 
             INPUTS
             satellite_azimuth: in units of [degree]
             satellite_altitude: in units of [degree]
 
             OUTPUTS
-            [
-                [ra_satellite_h, ra_satellite_m, ra_satellite_s],
-                [dec_satellite_d, dec_satellite_m, dec_satellite_s]
-            ]
-
+            [right ascension in hours, declination in degrees]
         """
 
         [
@@ -108,37 +125,26 @@ class ComputeVisibility:
         ] = self.observer.radec_of(
             np.radians(satellite_azimuth), np.radians(satellite_altitude)
         )
-        # convert right ascension to hh, mm, ss
-        [
-            ra_satellite_h,
-            ra_satellite_m,
-            ra_satellite_s,
-        ] = CONVERT.right_ascension_in_radians_to_hh_mm_ss(
-            right_ascension=right_ascension_satellite
-        )
-
-        # convert declination to dd, mm, ss
-        [
-            dec_satellite_d,
-            dec_satellite_m,
-            dec_satellite_s,
-        ] = CONVERT.declination_in_radians_to_dd_mm_ss(
-            declination=declination_satellite
-        )
 
         return [
-            [ra_satellite_h, ra_satellite_m, ra_satellite_s],
-            [dec_satellite_d, dec_satellite_m, dec_satellite_s],
+            CONVERT.right_ascension_in_radians_to_hours(
+                right_ascension_satellite
+            ),
+            np.rad2deg(declination_satellite),
         ]
 
-    def angular_velocity(
+    def get_satellite_motion(
         self,
         satellite_coordinates: list,
         previous_satellite_coordinates: list,
-    ) -> float:
+    ) -> list:
 
         """
-            Compute the angular velocity of the satellite
+            Compute satellite RA and DEC, its angular velocity and the
+            position angle of its motion. The previous position is
+            converted at the time of the current one, so the angular
+            velocity is the one in the AZ, ALT frame. The current RA
+            and DEC are used for both, two calls to radec_of
 
             INPUTS
 
@@ -147,39 +153,232 @@ class ComputeVisibility:
                 [azimuth in t_{n-1}, altitude in t_{n-1}]
 
             OUTPUTS
-            angular_velocity: satellite angular velocity
+            [satellite_ra_dec, angular_velocity, position_angle]
+                satellite_ra_dec: [right ascension in hours,
+                    declination in degrees]
+                angular_velocity: in arcseconds per second
+                position_angle: direction of the motion in degrees,
+                    from north through east
         """
 
-        [
-            previous_right_ascension,
-            previous_declination,
-        ] = self.observer.radec_of(
-            np.radians(previous_satellite_coordinates[0]),
-            np.radians(previous_satellite_coordinates[1])
+        satellite_ra_dec = self.get_satellite_ra_dec(*satellite_coordinates)
+
+        previous_satellite_ra_dec = self.get_satellite_ra_dec(
+            *previous_satellite_coordinates
+        )
+
+        [angular_velocity, position_angle] = get_angular_motion(
+            *satellite_ra_dec,
+            *previous_satellite_ra_dec,
+            self.time_delta.total_seconds(),
+        )
+
+        return [satellite_ra_dec, angular_velocity, position_angle]
+
+    def get_satellite_geometry(
+        self, satellite: Orbital, date_time: np.ndarray
+    ) -> list:
+        """
+            Propagate the satellite once and derive from the same
+            position and velocity vectors its footprint, its azimuth
+            and altitude as seen from the observatory and its range.
+            It replaces calling satellite.get_lonlatalt and
+            satellite.get_observer_look, since each of them runs SGP4
+            for the same instant.
+
+            INPUTS
+
+            satellite: instance of pyorbital.orbital.Orbital
+            date_time: UTC time, either a single time or an array
+
+            OUTPUTS
+            [
+                [longitude, latitude, orbital altitude in km],
+                [azimuth, altitude], # in degrees
+                [range in km, range rate in km/s]
+            ]
+        """
+
+        propagation = self.propagate_satellite(satellite, date_time)
+
+        return [propagation[-1]] + self.get_look_angles(*propagation[:-1])
+
+    def propagate_satellite(
+        self, satellite: Orbital, date_time: np.ndarray
+    ) -> list:
+        """
+            Part of get_satellite_geometry that does not depend on the
+            observatory: the SGP4 propagation and the footprint. Several
+            observatories share it, see get_look_angles
+
+            INPUTS
+
+            satellite: instance of pyorbital.orbital.Orbital
+            date_time: UTC time, either a single time or an array
+
+            OUTPUTS
+            [
+                date_time,
+                position, # in km, inertial frame of SGP4
+                velocity, # in km/s
+                greenwich_sidereal_time, # in radians
+                [longitude, latitude, orbital altitude in km]
+            ]
+        """
+
+        date_time = np.array(date_time, dtype="datetime64[us]")
+
+        if date_time.ndim == 0:
+            date_time = date_time[()]
+
+        position, velocity = satellite.get_position(
+            date_time, normalize=False
         )
+        greenwich_sidereal_time = astronomy.gmst(date_time)
+
+        return [
+            date_time,
+            position,
+            velocity,
+            greenwich_sidereal_time,
+            self.get_footprint(position, greenwich_sidereal_time),
+        ]
 
-        right_ascension, declination = self.observer.radec_of(
-            np.radians(satellite_coordinates[0]),
-            np.radians(satellite_coordinates[1])
+    @staticmethod
+    def get_footprint(
+        position: np.ndarray, greenwich_sidereal_time: np.ndarray
+    ) -> list:
+        """
+            Footprint of the satellite, same as Orbital.get_lonlatalt
+
+            INPUTS
+
+            position: in km, inertial frame of SGP4
+            greenwich_sidereal_time: in radians
+
+            OUTPUTS
+            [longitude, latitude, orbital altitude in km]
+        """
+
+        [position_x, position_y, position_z] = position
+
+        longitude = (
+            np.arctan2(position_y, position_x) - greenwich_sidereal_time
+        ) % (2 * np.pi)
+        longitude = np.where(
+            longitude > np.pi, longitude - 2 * np.pi, longitude
+        )
+        longitude = np.where(
+            longitude <= -np.pi, longitude + 2 * np.pi, longitude
         )
 
-        dtheta = 2 * np.arcsin(
-            np.sqrt(
-                np.sin(0.5*(declination - previous_declination))**2
-                +
-                np.cos(declination) * np.cos(previous_declination) *
-                np.sin(0.5*(right_ascension-previous_right_ascension))**2
+        radius = np.sqrt(position_x**2 + position_y**2) / XKMPER
+        latitude = np.arctan2(position_z / XKMPER, radius)
+        eccentricity_squared = astronomy.F * (2 - astronomy.F)
+
+        while True:
+
+            previous_latitude = latitude
+            curvature = 1 / np.sqrt(
+                1 - eccentricity_squared * np.sin(previous_latitude) ** 2
             )
+            latitude = np.arctan2(
+                position_z / XKMPER
+                + curvature * eccentricity_squared * np.sin(previous_latitude),
+                radius,
+            )
+
+            if np.all(np.abs(latitude - previous_latitude) < 1e-10):
+                break
+
+        orbital_altitude = radius / np.cos(latitude) - curvature
+        orbital_altitude *= astronomy.A
+
+        return [np.rad2deg(longitude), np.rad2deg(latitude), orbital_altitude]
+
+    def get_look_angles(
+        self,
+        date_time: np.ndarray,
+        position: np.ndarray,
+        velocity: np.ndarray,
+        greenwich_sidereal_time: np.ndarray,
+    ) -> list:
+        """
+            Part of get_satellite_geometry that depends on the
+            observatory, from the output of propagate_satellite. Same as
+            Orbital.get_observer_look
+
+            INPUTS
+
+            date_time, position, velocity, greenwich_sidereal_time: see
+                propagate_satellite
+
+            OUTPUTS
+            [
+                [azimuth, altitude], # in degrees
+                [range in km, range rate in km/s]
+            ]
+        """
+
+        ###################################################################
+        observatory_longitude = self.observatory_data["longitude"]
+        observatory_latitude = self.observatory_data["latitude"]
+
+        observer_position, observer_velocity = astronomy.observer_position(
+            date_time,
+            observatory_longitude,
+            observatory_latitude,
+            self.observatory_data["altitude"] / 1000.0,
         )
-        # convert from radians to arcseconds
-        # 1rad × (3600 × 180)/π = 206264.806"
-        dtheta *= 206264.806
-        ###############################################################
-        dtime = self.time_delta.total_seconds()
 
-        angular_velocity = dtheta/dtime
+        relative_position = [
+            satellite_axis - observer_axis
+            for satellite_axis, observer_axis in zip(
+                position, observer_position
+            )
+        ]
+        [range_x, range_y, range_z] = relative_position
+
+        observatory_latitude = np.radians(observatory_latitude)
+        local_sidereal_time = (
+            greenwich_sidereal_time + np.radians(observatory_longitude)
+        ) % (2 * np.pi)
+
+        sin_latitude = np.sin(observatory_latitude)
+        cos_latitude = np.cos(observatory_latitude)
+        sin_theta = np.sin(local_sidereal_time)
+        cos_theta = np.cos(local_sidereal_time)
+
+        top_south = (
+            sin_latitude * cos_theta * range_x
+            + sin_latitude * sin_theta * range_y
+            - cos_latitude * range_z
+        )
+        top_east = -sin_theta * range_x + cos_theta * range_y
+        top_zenith = (
+            cos_latitude * cos_theta * range_x
+            + cos_latitude * sin_theta * range_y
+            + sin_latitude * range_z
+        )
+
+        azimuth = np.arctan(-top_east / top_south)
+        azimuth = np.where(top_south > 0, azimuth + np.pi, azimuth)
+        azimuth = np.where(azimuth < 0, azimuth + 2 * np.pi, azimuth)
+
+        satellite_range = np.sqrt(range_x**2 + range_y**2 + range_z**2)
+        altitude = np.arcsin(top_zenith / satellite_range)
+        ###################################################################
+        range_rate = sum(
+            relative_axis * (satellite_axis - observer_axis)
+            for relative_axis, satellite_axis, observer_axis in zip(
+                relative_position, velocity, observer_velocity
+            )
+        ) / satellite_range
 
-        return angular_velocity
+        return [
+            [np.rad2deg(azimuth), np.rad2deg(altitude)],
+            [satellite_range, range_rate],
+        ]
 
     def check_visibility(
         self, satellite_altitude: float, sun_zenith_angle: float
@@ -217,6 +416,357 @@ class ComputeVisibility:
 
         return is_visible
 
+    def get_visibility_mask(
+        self, satellite_altitude: np.ndarray, sun_zenith_angle: np.ndarray
+    ) -> np.ndarray:
+
+        """
+            Array version of check_visibility: verify at every time step
+            if satellite is visible according to constraints defined in
+            the constructor of the class
+
+            INPUTS
+
+            satellite_altitude: altitude of satellite at each time step
+            sun_zenith_angle: sun zenith at each time step
+
+            OUTPUTS
+
+            visibility_mask: boolean array, True where the satellite
+                is visible
+        """
+
+        lowest_altitude_satellite = self.constraints[
+            "lowest_altitude_satellite"
+        ]
+
+        sun_zenith_highest = self.constraints["sun_zenith_highest"]
+        sun_zenith_lowest = self.constraints["sun_zenith_lowest"]
+        ###################################################################
+
+        visibility_mask = satellite_altitude > lowest_altitude_satellite
+        visibility_mask &= sun_zenith_lowest < sun_zenith_angle
+        visibility_mask &= sun_zenith_angle < sun_zenith_highest
+
+        return visibility_mask
+
+    def get_time_grid(self) -> np.ndarray:
+        """
+        Time steps of the observation window as an array of
+        numpy.datetime64 in UTC. The steps are the same the loop over
+        date_time += time_delta goes through. If set_twilight_window
+        was called, only the steps inside the twilight intervals are
+        returned
+
+        OUTPUTS
+            time_grid: array with the UTC time of every time step
+        """
+
+        if self.time_grid is not None:
+            return self.time_grid
+
+        start_date_time, finish_date_time = self.get_date_time_object(
+            time_parameters=self.time_parameters,
+            time_zone=self.observatory_data["tz"],
+        )
+
+        observation_window_seconds = (
+            finish_date_time - start_date_time
+        ).total_seconds()
+
+        number_of_time_steps = int(
+            observation_window_seconds / self.time_delta.total_seconds()
+        )
+
+        time_step = np.timedelta64(self.time_delta, "us")
+
+        time_grid = np.datetime64(start_date_time, "us") + (
+            np.arange(number_of_time_steps) * time_step
+        )
+
+        return time_grid
+
+    def set_twilight_window(self) -> list:
+        """
+        Solve for the times at which the sun zenith crosses
+        sun_zenith_lowest and sun_zenith_highest and keep only the time
+        steps inside the intervals between them, padded by one time
+        step. Satellites are not visible outside these intervals, so
+        there is no need to propagate them there.
+        Call it before set_sun_ephemeris
+
+        OUTPUTS
+            twilight_intervals: [[start, finish], ...] as
+                numpy.datetime64 in UTC
+        """
+
+        start_date_time, finish_date_time = self.get_date_time_object(
+            time_parameters=self.time_parameters,
+            time_zone=self.observatory_data["tz"],
+        )
+
+        self.twilight_intervals = SunEphemeris.get_zenith_intervals(
+            start_date_time=start_date_time,
+            finish_date_time=finish_date_time,
+            longitude=self.observatory_data["longitude"],
+            latitude=self.observatory_data["latitude"],
+            zenith_bounds=[
+                self.constraints["sun_zenith_lowest"],
+                self.constraints["sun_zenith_highest"],
+            ],
+        )
+        #######################################################################
+        self.time_grid = None
+        time_grid = self.get_time_grid()
+        time_step = np.timedelta64(self.time_delta, "us")
+
+        in_twilight = np.zeros(time_grid.size, dtype=bool)
+
+        for start_interval, finish_interval in self.twilight_intervals:
+
+            in_twilight |= (time_grid >= start_interval - time_step) & (
+                time_grid <= finish_interval + time_step
+            )
+
+        self.time_grid = time_grid[in_twilight]
+
+        return self.twilight_intervals
+
+    def set_sun_ephemeris(self) -> SunEphemeris:
+        """
+        Compute Sun coordinates for every time step of the observation
+        window. Call it before the parallel computation, so all the
+        satellites share the same ephemeris instead of computing it
+        over and over
+
+        OUTPUTS
+            sun_ephemeris: instance of SunEphemeris
+        """
+
+        self.sun_ephemeris = SunEphemeris(
+            time_grid=self.get_time_grid(),
+            longitude=self.observatory_data["longitude"],
+            latitude=self.observatory_data["latitude"],
+        )
+
+        return self.sun_ephemeris
+
+    def get_sun_ephemeris(self) -> SunEphemeris:
+        """
+        Sun ephemeris of the observation window, it is computed
+        if set_sun_ephemeris was not called before
+
+        OUTPUTS
+            sun_ephemeris: instance of SunEphemeris
+        """
+
+        if self.sun_ephemeris is None:
+            self.set_sun_ephemeris()
+
+        return self.sun_ephemeris
+
+    def set_equatorial_frame(self) -> EquatorialFrame:
+        """
+        Sidereal time, nutation and precession at every time step of
+        the observation window, shared by all the satellites when
+        radec_method is "numpy", see set_radec_method
+
+        OUTPUTS
+            equatorial_frame: instance of EquatorialFrame
+        """
+
+        self.equatorial_frame = EquatorialFrame(
+            time_grid=self.get_time_grid(),
+            longitude=self.observatory_data["longitude"],
+            latitude=self.observatory_data["latitude"],
+        )
+
+        return self.equatorial_frame
+
+    def get_equatorial_frame(self) -> EquatorialFrame:
+        """
+        Equatorial frame of the observation window, it is computed
+        if set_equatorial_frame was not called before
+        """
+
+        if self.equatorial_frame is None:
+            self.set_equatorial_frame()
+
+        return self.equatorial_frame
+
+    def set_radec_method(self, radec_method: str) -> None:
+        """
+        PARAMETERS
+            radec_method: either "ephem" or "numpy", see RADEC_METHODS
+        """
+
+        if radec_method not in RADEC_METHODS:
+            print(f"radec must be one of: {', '.join(RADEC_METHODS)}")
+            sys.exit()
+
+        self.radec_method = radec_method
+
+    def set_worker_state(self) -> None:
+        """
+        Build the state shared by all satellites in a process: the ephem
+        observer, the time grid and the sun ephemeris. Called once per
+        process by leosTrack.track.worker.init_worker
+        """
+
+        self._set_observer()
+        self.time_grid = self.get_time_grid()
+        self.get_sun_ephemeris()
+
+    def __getstate__(self) -> dict:
+        """
+        ephem.Observer cannot be pickled, processes set their own.
+        The same goes for the Orbital cache
+        """
+
+        state = self.__dict__.copy()
+        state["observer"] = None
+        state["orbital_cache"] = {}
+
+        return state
+
+    ###########################################################################
+    def get_nights(self, last_day: str = None, windows: list = None) -> list:
+        """
+        Time parameters of every night from the date in time_parameters
+        up to last_day, one per observation window
+
+        PARAMETERS
+            last_day: last date of the range as "yyyy-mm-dd", if None
+                only the date in time_parameters
+            windows: observation windows of each night, e.g,
+                ["morning", "evening"]. If None, the window in
+                time_parameters
+
+        OUTPUTS
+            nights: [[night, time_parameters], ...] where night is a
+                label like "2023_01_16_morning"
+        """
+
+        first_day = datetime.date(
+            self.time_parameters["year"],
+            self.time_parameters["month"],
+            self.time_parameters["day"],
+        )
+
+        if last_day is None:
+            last_day = first_day
+        else:
+            last_day = datetime.date.fromisoformat(last_day)
+
+        if windows is None:
+            windows = [self.time_parameters["window"]]
+
+        nights = []
+
+        for day in range((last_day - first_day).days + 1):
+
+            date = first_day + datetime.timedelta(days=day)
+
+            for window in windows:
+
+                time_parameters = self.time_parameters.copy()
+                time_parameters.update(
+                    year=date.year, month=date.month, day=date.day
+                )
+                time_parameters["window"] = window
+
+                nights.append(
+                    [f"{date:%Y_%m_%d}_{window}", time_parameters]
+                )
+
+        return nights
+
+    def set_night(self, time_parameters: dict) -> None:
+        """
+        Move the engine to another observation window, the observer,
+        the tle elements and the Orbital cache are kept. Call
+        set_twilight_window and set_sun_ephemeris after it if needed
+
+        PARAMETERS
+            time_parameters: see constructor
+        """
+
+        self.time_parameters = time_parameters
+        self.time_grid = None
+        self.sun_ephemeris = None
+        self.equatorial_frame = None
+        self.twilight_intervals = None
+
+    def get_night_state(self) -> dict:
+        """
+        State that depends on the observation window, to be restored
+        with set_night_state
+        """
+
+        return {
+            "time_parameters": self.time_parameters,
+            "time_grid": self.get_time_grid(),
+            "sun_ephemeris": self.get_sun_ephemeris(),
+            "equatorial_frame": self.equatorial_frame,
+            "twilight_intervals": self.twilight_intervals,
+        }
+
+    def get_shard_states(self, number_of_shards: int) -> list:
+        """
+        State of the observation window split in consecutive pieces of
+        the time grid, each one restored with set_night_state. A
+        satellite computed over every shard gives the same time steps
+        as over the whole window, since the previous position of the
+        first step of a shard is computed in that shard
+
+        PARAMETERS
+            number_of_shards: number of pieces of the time grid
+
+        OUTPUTS
+            [shard_state, ...] in time order, same keys as the output
+                of get_night_state
+        """
+
+        night_state = self.get_night_state()
+
+        if number_of_shards <= 1:
+            return [night_state]
+
+        bounds = np.linspace(
+            0, night_state["time_grid"].size, number_of_shards + 1
+        ).astype(int)
+
+        shard_states = []
+
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+
+            shard_state = dict(night_state)
+
+            shard_state["time_grid"] = night_state["time_grid"][start:stop]
+
+            for attribute in ["sun_ephemeris", "equatorial_frame"]:
+
+                if night_state[attribute] is not None:
+                    shard_state[attribute] = night_state[
+                        attribute
+                    ].get_slice(start, stop)
+
+            shard_states.append(shard_state)
+
+        return shard_states
+
+    def set_night_state(self, night_state: dict) -> None:
+        """
+        Restore the state of an observation window saved by
+        get_night_state
+
+        PARAMETERS
+            night_state: output of get_night_state
+        """
+
+        for attribute, value in night_state.items():
+            setattr(self, attribute, value)
+
     def _set_dark_satellite(self, satellite: str) -> Orbital:
         """
         Set dark satellite object for orbital computations
@@ -229,10 +779,37 @@ class ComputeVisibility:
             dark_satellite: instance of class pyorbital.orbital.Orbital
 
         """
-        dark_satellite = Orbital(satellite, tle_file=self.tle_file_location)
+        if satellite in self.orbital_cache:
+            return self.orbital_cache[satellite]
+
+        if self.tle_index is None:
+
+            dark_satellite = Orbital(
+                satellite, tle_file=self.tle_file_location
+            )
+
+        else:
+
+            line_1, line_2 = self.tle_index[satellite]
+
+            dark_satellite = Orbital(satellite, line1=line_1, line2=line_2)
+
+        self.orbital_cache[satellite] = dark_satellite
 
         return dark_satellite
 
+    def set_tle_index(self, tle_index: dict) -> None:
+        """
+        Set the tle elements of the satellites in memory, from then on
+        the satellites are not looked up in the tle file
+
+        PARAMETERS
+            tle_index: {satellite: (line_1, line_2), ...}, see
+                leosTrack.tle.TLE.get_tle_index
+        """
+
+        self.tle_index = tle_index
+
     ###########################################################################
     def _set_observer(self) -> None:
         """
@@ -244,8 +821,8 @@ class ComputeVisibility:
 
         observer = ephem.Observer()
         observer.epoch = "2000"
-        observer.pressure = 1010
-        observer.temp = 15
+        observer.pressure = PRESSURE
+        observer.temp = TEMPERATURE
         #######################################################################
         observatory_latitude = self.observatory_data["latitude"]  # degrees
         observer.lat = np.radians(observatory_latitude)
@@ -0,0 +1,317 @@
+"""Worker processes that share one visibility engine per process"""
+import math
+import pickle
+import time
+
+import numpy as np
+
+###############################################################################
+# CONSTANTS
+# chunks handed to each process, more chunks balance better the load of
+# satellites that are visible for long against those that never are
+CHUNKS_PER_PROCESS = 8
+# when there are few satellites, the time grid of each night is split in
+# shards of at least this many time steps, so that the propagations of
+# the first step of each shard stay a small fraction of the work
+MIN_SHARD_STEPS = 600
+###############################################################################
+# engine of the current worker process, set by init_worker
+WORKER_ENGINE = None
+# state of each night of a date range and the night the engine is set to
+WORKER_NIGHTS = None
+WORKER_NIGHT = None
+# engines of the fine tracks of each observatory, see refine_visibility,
+# the state of each night and observatory and the night each engine is
+# set to
+WORKER_REFINE = None
+WORKER_REFINE_NIGHTS = None
+WORKER_REFINE_NIGHT = None
+###############################################################################
+
+
+def init_worker(
+    compute_visibility,
+    nights: dict = None,
+    refine_windows: dict = None,
+    refine_nights: dict = None,
+) -> None:
+    """
+    Initializer of multiprocessing.Pool. The engine is pickled once per
+    process instead of once per chunk of satellites, and the state that
+    does not depend on the satellite, the ephem observer, the time grid
+    and the sun ephemeris, is built once here
+
+    PARAMETERS
+        compute_visibility: instance of a subclass of ComputeVisibility,
+            e.g, FixWindow, with the tle index already set
+        nights: {night: night_state, ...} with the output of
+            ComputeVisibility.get_night_state for each night of a date
+            range, see compute_visibility_at_night
+        refine_windows: {observatory: RefineWindow, ...} for the fine
+            tracks of the passes of the coarse run, see
+            refine_visibility
+        refine_nights: {(night, observatory): night_state, ...} with
+            the output of RefineWindow.get_night_state for each night
+            and observatory, so the sun ephemeris and the equatorial
+            frame of the fine tracks are computed once per night
+    """
+
+    global WORKER_ENGINE, WORKER_NIGHTS, WORKER_NIGHT, WORKER_REFINE
+    global WORKER_REFINE_NIGHTS, WORKER_REFINE_NIGHT
+
+    compute_visibility.set_worker_state()
+
+    WORKER_ENGINE = compute_visibility
+    WORKER_NIGHTS = nights
+    WORKER_NIGHT = None
+
+    if refine_windows is not None:
+
+        for refine_window in refine_windows.values():
+            refine_window.set_worker_state()
+
+    WORKER_REFINE = refine_windows
+    WORKER_REFINE_NIGHTS = refine_nights
+    WORKER_REFINE_NIGHT = {}
+
+
+def compute_visibility_at_night(task: tuple) -> list:
+    """
+    Run compute_visibility_of_satellite of the engine of the worker for
+    a night of a date range. The engine moves to another night only
+    when the night of the task changes, so the observer and the Orbital
+    of the satellites are reused over the nights
+
+    PARAMETERS
+        task: (night, satellite_name), night is a key of the nights
+            passed to init_worker
+
+    OUTPUTS
+        [night, output of compute_visibility_of_satellite]
+    """
+
+    global WORKER_NIGHT
+
+    night, satellite_name = task
+
+    if night != WORKER_NIGHT:
+
+        WORKER_ENGINE.set_night_state(WORKER_NIGHTS[night])
+        WORKER_NIGHT = night
+
+    return [
+        night,
+        WORKER_ENGINE.compute_visibility_of_satellite(satellite_name),
+    ]
+
+
+def compute_visibility_in_shard(task: tuple) -> list:
+    """
+    Run compute_visibility_of_satellite of the engine of the worker for
+    a shard of the time grid of a night, see compute_visibility_at_night
+
+    PARAMETERS
+        task: (night, shard, satellite_name), (night, shard) is a key of
+            the nights passed to init_worker
+
+    OUTPUTS
+        [night, shard, satellite_name, output of
+            compute_visibility_of_satellite]
+    """
+
+    night, shard, satellite_name = task
+
+    [_, result] = compute_visibility_at_night(
+        ((night, shard), satellite_name)
+    )
+
+    return [night, shard, satellite_name, result]
+
+
+def refine_visibility(task: tuple) -> list:
+    """
+    Fine track of a satellite around its passes in the coarse run with
+    the RefineWindow of the observatory. As in compute_visibility_at_night,
+    the engine moves to another night only when the night changes
+
+    PARAMETERS
+        task: (night, observatory, satellite_name, intervals), output
+            of leosTrack.track.refine.get_refine_task
+
+    OUTPUTS
+        [night, observatory, output of compute_visibility_in_intervals]
+    """
+
+    night, site, satellite_name, intervals = task
+
+    if WORKER_REFINE_NIGHTS is not None and (
+        WORKER_REFINE_NIGHT.get(site) != night
+    ):
+
+        WORKER_REFINE[site].set_night_state(
+            WORKER_REFINE_NIGHTS[(night, site)]
+        )
+        WORKER_REFINE_NIGHT[site] = night
+
+    return [
+        night,
+        site,
+        WORKER_REFINE[site].compute_visibility_in_intervals(
+            satellite_name, intervals
+        ),
+    ]
+
+
+def get_chunk_size(number_of_tasks: int, number_of_processes: int) -> int:
+    """
+    Number of satellites sent to a process at once: CHUNKS_PER_PROCESS
+    chunks per process, at least one satellite per chunk
+
+    PARAMETERS
+        number_of_tasks: number of satellites
+        number_of_processes: number of processes in the pool
+    """
+
+    number_of_chunks = CHUNKS_PER_PROCESS * max(number_of_processes, 1)
+
+    return max(1, math.ceil(number_of_tasks / number_of_chunks))
+
+
+def get_number_of_shards(
+    number_of_satellites: int, number_of_processes: int, number_of_steps: int
+) -> int:
+    """
+    Number of pieces the time grid of a night is split in so that every
+    process gets CHUNKS_PER_PROCESS chunks even with few satellites,
+    each piece with at least MIN_SHARD_STEPS time steps. One if there
+    are enough satellites to keep all processes busy
+
+    PARAMETERS
+        number_of_satellites: number of satellites
+        number_of_processes: number of processes in the pool
+        number_of_steps: time steps of the night
+    """
+
+    if number_of_processes <= 1:
+        return 1
+
+    number_of_chunks = CHUNKS_PER_PROCESS * number_of_processes
+
+    number_of_shards = math.ceil(
+        number_of_chunks / max(number_of_satellites, 1)
+    )
+
+    return max(1, min(number_of_shards, number_of_steps // MIN_SHARD_STEPS))
+
+
+def stitch_shards(results: list):
+    """
+    Join the results of a satellite over the shards of a night
+
+    PARAMETERS
+        results: output of compute_visibility_of_satellite for each
+            shard in time order. With several observatories, dictionaries
+            {observatory: result, ...}
+
+    OUTPUTS
+        same as compute_visibility_of_satellite over the whole night
+    """
+
+    if isinstance(results[0], dict):
+
+        return {
+            site: stitch_shards([result[site] for result in results])
+            for site in results[0]
+        }
+
+    visible = [result for result in results if isinstance(result, list)]
+
+    if len(visible) == 0:
+        return results[0]
+
+    return [
+        visible[0][0],
+        np.concatenate([records for _, records in visible]),
+    ]
+
+
+class ShardedResults:
+    """
+    Collect the results of compute_visibility_in_shard, that may arrive
+    in any order, until every shard of a satellite is done
+    """
+
+    def __init__(self, number_of_shards: dict):
+        """
+        PARAMETERS
+            number_of_shards: {night: number of shards, ...}
+        """
+
+        self.number_of_shards = number_of_shards
+        self.shards = {}
+
+    def add(self, night, shard: int, satellite_name: str, result) -> list:
+        """
+        PARAMETERS
+            night, shard, satellite_name, result: output of
+                compute_visibility_in_shard
+
+        OUTPUTS
+            [result over the whole night] once all the shards of the
+                satellite are done, otherwise an empty list
+        """
+
+        number_of_shards = self.number_of_shards[night]
+
+        if number_of_shards == 1:
+            return [result]
+
+        shards = self.shards.setdefault((night, satellite_name), {})
+        shards[shard] = result
+
+        if len(shards) < number_of_shards:
+            return []
+
+        del self.shards[(night, satellite_name)]
+
+        return [stitch_shards([shards[idx] for idx in range(len(shards))])]
+
+
+def get_task_overhead(
+    initargs: tuple, tasks: list, number_of_processes: int, chunk_size: int
+) -> list:
+    """
+    Measure what the pool pickles: the initargs of init_worker, once per
+    process, and the tasks in chunks of chunk_size. Pickling the
+    engine, the states of the nights and the refine windows may take a
+    while, so it is only meant as a diagnostic
+
+    PARAMETERS
+        initargs: arguments of init_worker passed to the pool
+        tasks: tasks passed to the pool
+        number_of_processes: number of processes in the pool
+        chunk_size: tasks sent to a process at once
+
+    OUTPUTS
+        [bytes per task, seconds per task, bytes of initargs]
+    """
+
+    start_time = time.perf_counter()
+    initargs_bytes = len(pickle.dumps(initargs))
+    initargs_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    tasks_bytes = sum(
+        len(pickle.dumps(tasks[idx : idx + chunk_size]))
+        for idx in range(0, len(tasks), max(chunk_size, 1))
+    )
+    tasks_time = time.perf_counter() - start_time
+
+    number_of_tasks = max(len(tasks), 1)
+
+    return [
+        (number_of_processes * initargs_bytes + tasks_bytes)
+        / number_of_tasks,
+        (number_of_processes * initargs_time + tasks_time) / number_of_tasks,
+        initargs_bytes,
+    ]
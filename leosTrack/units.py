@@ -35,7 +35,8 @@ class ConvertUnits:
         self, right_ascension: float
     ) -> List[float]:
         """
-        Converts right_ascension in radians to hh:mm:ss.sss
+        Converts right_ascension in radians to hh:mm:ss.ss, with the
+        same rounding as hours_to_hh_mm_ss
 
         PAright_ascensionMETERS
 
@@ -43,20 +44,22 @@ class ConvertUnits:
             [hh, mm, ss]
                 hh: int value of hours
                 mm: int value of minutes
-                ss: int value of seconds
+                ss: seconds rounded to two decimals
         """
 
         hours = self.right_ascension_in_radians_to_hours(right_ascension)
-        minutes = (hours - int(hours)) * 60.0
-        seconds = (minutes - int(minutes)) * 60
 
-        hours, minutes = int(hours), int(minutes)
-        return [hours, minutes, seconds]
+        [hh, mm, ss] = self.hours_to_hh_mm_ss(hours)
+
+        return [int(hh), int(mm), float(ss)]
 
     @staticmethod
     def declination_in_radians_to_dd_mm_ss(declination: float) -> List[float]:
         """
-        Converts declination in radians to dd:mm:ss.sss
+        Converts declination in radians to dd:mm:ss.ss, with the same
+        rounding as degrees_to_dd_mm_ss. For declinations between -1
+        and 0 degrees dd is 0 and the sign is lost, use format_dd_mm_ss
+        to write declinations
 
         PAright_ascensionMETERS
 
@@ -64,23 +67,317 @@ class ConvertUnits:
             [dd, mm, ss]
                 dd: int value of degrees
                 mm: int value of minutes
-                ss: int value of seconds
+                ss: seconds rounded to two decimals
+        """
+
+        [sign, dd, mm, ss] = ConvertUnits.degrees_to_dd_mm_ss(
+            np.rad2deg(declination)
+        )
+
+        return [int(sign * dd), int(mm), float(ss)]
+
+    ###########################################################################
+    # Array versions, whole columns of RA and DEC at once
+    @staticmethod
+    def hours_to_hh_mm_ss(
+        hours: np.ndarray, decimals: int = 2
+    ) -> List[np.ndarray]:
+        """
+        Array version of right_ascension_in_radians_to_hh_mm_ss from
+        right ascension in hours
+
+        PARAMETERS
+            hours: right ascension in hours
+            decimals: seconds are rounded to this number of decimals,
+                a carry goes to minutes and hours, e.g, 07:45:59.995 is
+                07:46:00.00 and 23:59:59.999 wraps to 00:00:00.00
+
+        OUTPUTS
+            [hh, mm, ss]
+                hh: int array of hours
+                mm: int array of minutes
+                ss: float array of seconds
+        """
+
+        hours = np.mod(np.asarray(hours, dtype=float), 24.0)
+
+        [hh, mm, ss] = _split_sexagesimal(hours, decimals)
+
+        return [np.mod(hh, 24), mm, ss]
+
+    @staticmethod
+    def degrees_to_dd_mm_ss(
+        degrees: np.ndarray, decimals: int = 2
+    ) -> List[np.ndarray]:
+        """
+        Array version of declination_in_radians_to_dd_mm_ss from
+        declination in degrees
+
+        PARAMETERS
+            degrees: declination in degrees
+            decimals: seconds are rounded to this number of decimals,
+                a carry goes to minutes and degrees
+
+        OUTPUTS
+            [sign, dd, mm, ss]
+                sign: int array, -1 or 1. Kept apart from dd, otherwise
+                    declinations between -1 and 0 degrees lose the sign
+                dd: int array of degrees, non negative
+                mm: int array of minutes
+                ss: float array of seconds
+        """
+
+        degrees = np.asarray(degrees, dtype=float)
+        sign = np.where(degrees < 0, -1, 1)
+
+        [dd, mm, ss] = _split_sexagesimal(np.abs(degrees), decimals)
+
+        return [sign, dd, mm, ss]
+
+    @staticmethod
+    def format_hh_mm_ss(hours: np.ndarray, decimals: int = 2) -> np.ndarray:
+        """
+        Right ascension in hours to strings, e.g, "07:45:12.34"
+
+        PARAMETERS
+            hours: right ascension in hours
+            decimals: decimals of the seconds
+
+        OUTPUTS
+            array of strings
         """
-        declination_in_degrees = np.rad2deg(declination)
 
-        if declination_in_degrees < 0:
-            declination_sign = -1
-            declination_in_degrees = abs(declination_in_degrees)
-        else:
-            declination_sign = 1
+        [hh, mm, ss] = ConvertUnits.hours_to_hh_mm_ss(hours, decimals)
+
+        return _join_sexagesimal(hh, mm, ss, decimals)
+
+    @staticmethod
+    def format_dd_mm_ss(degrees: np.ndarray, decimals: int = 2) -> np.ndarray:
+        """
+        Declination in degrees to strings, e.g, "-05:12:34.56"
 
-        minutes = (declination_in_degrees - int(declination_in_degrees)) * 60.0
+        PARAMETERS
+            degrees: declination in degrees
+            decimals: decimals of the seconds
 
-        seconds = (minutes - int(minutes)) * 60
+        OUTPUTS
+            array of strings
+        """
+
+        [sign, dd, mm, ss] = ConvertUnits.degrees_to_dd_mm_ss(
+            degrees, decimals
+        )
+
+        return _join_sexagesimal(dd, mm, ss, decimals, sign)
+
+    @staticmethod
+    def format_fixed_point(
+        values: np.ndarray, width: int, decimals: int, zero_pad: bool = False
+    ) -> np.ndarray:
+        """
+        Whole column at once, same strings as the printf style format
+        %{width}.{decimals}f, or %0{width}.{decimals}f with zero_pad
+
+        PARAMETERS
+            values: array of floats
+            width: minimum length of the strings
+            decimals: digits after the decimal point
+            zero_pad: pad with zeros after the sign instead of blanks
+
+        OUTPUTS
+            array of strings
+        """
 
-        declination, minutes = [
-            declination_sign * int(declination_in_degrees),
-            int(minutes),
+        values = np.asarray(values, dtype=float).ravel()
+
+        [characters, is_exact] = _fixed_point_bytes(
+            values, width, decimals, zero_pad
+        )
+
+        strings = _bytes_to_strings(characters)
+
+        if not is_exact.all():
+
+            strings = strings.astype(object)
+            string_format = f"%{'0' * zero_pad}{width}.{decimals}f"
+
+            for idx in np.flatnonzero(~is_exact):
+                strings[idx] = string_format % values[idx]
+
+            strings = strings.astype(str)
+
+        return strings
+
+
+###############################################################################
+def _fixed_point_bytes(
+    values: np.ndarray, width: int, decimals: int, zero_pad: bool
+) -> list:
+    """
+    Characters of %{width}.{decimals}f for every value at once, as a
+    matrix of bytes with one row per value. Rows are right aligned to
+    the length of their string and end with NUL bytes, that numpy drops
+    from bytes strings
+
+    OUTPUTS
+        [characters, is_exact]
+            characters: uint8 array with shape (values.size, length)
+            is_exact: False where printf must format the value, see
+                format_fixed_point
+    """
+
+    scale = 10**decimals
+    scaled = np.abs(values) * scale
+
+    # printf rounds the exact binary value, the product above may round
+    # the other way when it is close to a half, and integers beyond
+    # 2**53 are not exact. Those values are formatted one by one, as are
+    # nan and inf
+    is_exact = np.isfinite(scaled) & (scaled < 2**53)
+    scaled = np.where(is_exact, scaled, 0)
+    is_exact &= np.abs(scaled - np.trunc(scaled) - 0.5) > 1e-6
+
+    digits = np.rint(scaled).astype(np.int64)
+    is_negative = np.signbit(values)
+
+    # digits of the integer part, at least one
+    integer_digits = 1 + np.searchsorted(
+        10 ** np.arange(1, 19, dtype=np.int64), digits // scale, side="right"
+    )
+
+    point = int(decimals > 0)
+    number_length = integer_digits + point + decimals
+    length = np.maximum(width, is_negative + number_length)
+    total_length = max(width, int(length.max(initial=0)))
+    ###########################################################################
+    # right aligned to total_length, one column at a time from the right
+    characters = np.zeros((values.size, total_length), dtype=np.uint8)
+
+    for position in range(total_length):
+
+        column = total_length - 1 - position
+
+        if point and position == decimals:
+            characters[:, column] = ord(".")
+            continue
+
+        [digits, digit] = np.divmod(digits, 10)
+
+        characters[:, column] = digit + ord("0")
+
+        if zero_pad is False and position > point + decimals:
+            # blanks in place of the zeros left of the integer part
+            characters[position >= number_length, column] = ord(" ")
+
+    # sign at the start of the string, or right before the digits
+    sign_position = length if zero_pad else number_length + 1
+    characters[
+        np.flatnonzero(is_negative),
+        total_length - sign_position[is_negative],
+    ] = ord("-")
+    ###########################################################################
+    # strings shorter than total_length start at the first column and
+    # end with NUL bytes
+    shift = total_length - length
+
+    if shift.any():
+
+        columns = np.arange(total_length)[None, :] + shift[:, None]
+
+        characters = np.where(
+            columns < total_length,
+            np.take_along_axis(
+                characters, np.minimum(columns, total_length - 1), axis=1
+            ),
+            0,
+        )
+
+    return [characters.astype(np.uint8, copy=False), is_exact]
+
+
+def _bytes_to_strings(characters: np.ndarray) -> np.ndarray:
+    """
+    Rows of a matrix of ascii bytes to an array of strings. Numpy
+    strings hold one 32 bit code point per character, equal to the
+    ascii byte, so the bytes are widened instead of decoded
+    """
+
+    characters = np.ascontiguousarray(characters, dtype=np.uint32)
+
+    return characters.view(f"U{max(characters.shape[1], 1)}").ravel()
+
+
+###############################################################################
+def _join_sexagesimal(
+    whole: np.ndarray,
+    minutes: np.ndarray,
+    seconds: np.ndarray,
+    decimals: int,
+    sign: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Output of _split_sexagesimal to strings, e.g, "07:45:12.34", or
+    "-05:12:34.56" if the sign, -1 or 1, is passed. Whole units and
+    minutes have two digits and the seconds are below 60, so all the
+    strings have the same length
+    """
+
+    [characters, is_exact] = _fixed_point_bytes(
+        seconds, decimals + 3, decimals, zero_pad=True
+    )
+
+    separator = np.full((whole.size, 1), ord(":"), dtype=np.uint8)
+
+    sign_column = (
+        []
+        if sign is None
+        else [np.where(sign < 0, ord("-"), ord("+"))[:, None]]
+    )
+
+    characters = np.hstack(
+        sign_column
+        + [
+            ord("0") + np.stack([whole // 10, whole % 10], axis=1),
+            separator,
+            ord("0") + np.stack([minutes // 10, minutes % 10], axis=1),
+            separator,
+            characters[:, : decimals + 3],
         ]
+    ).astype(np.uint8)
+
+    strings = _bytes_to_strings(characters).astype(object)
+    string_format = f"%0{decimals + 3}.{decimals}f"
+
+    for idx in np.flatnonzero(~is_exact):
+        strings[idx] = (
+            strings[idx][: len(sign_column) + 6]
+            + string_format % seconds[idx]
+        )
+
+    return strings.astype(str)
+
+
+###############################################################################
+def _split_sexagesimal(value: np.ndarray, decimals: int) -> List[np.ndarray]:
+    """
+    Non negative values to whole units, minutes and seconds, with the
+    same truncation as the scalar conversions. Seconds are rounded to
+    decimals and 60 seconds or 60 minutes carry to the next unit
+    """
+
+    minutes = (value - np.trunc(value)) * 60.0
+    seconds = (minutes - np.trunc(minutes)) * 60
+
+    whole = np.trunc(value).astype(int)
+    minutes = np.trunc(minutes).astype(int)
+    seconds = np.round(seconds, decimals)
+
+    carry = seconds >= 60
+    seconds = np.where(carry, seconds - 60, seconds)
+    minutes = minutes + carry
+
+    carry = minutes >= 60
+    minutes = np.where(carry, minutes - 60, minutes)
+    whole = whole + carry
 
-        return [declination, minutes, seconds]
+    return [whole, minutes, seconds]
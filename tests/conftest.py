@@ -0,0 +1,139 @@
+"""Satellites and observation window shared by the tests"""
+import pytest
+
+from leosTrack.tle import TLE
+from observatories import observatories
+
+###############################################################################
+# CONSTANTS
+# morning of 2023-01-16 at La Silla, as in the shipped track.ini
+TIME_PARAMETERS = {
+    "year": 2023,
+    "month": 1,
+    "day": 16,
+    "delta": 60,
+    "window": "morning",
+}
+OBSERVATION_CONSTRAINTS = {
+    "lowest_altitude_satellite": 30,
+    "sun_zenith_lowest": 100,
+    "sun_zenith_highest": 111,
+}
+# [name, inclination, eccentricity, mean motion in revolutions per day]
+# of each shell, satellites are spread over the planes and along them
+SHELLS = [
+    ["STARLINK", 53.2, 0.0001, 15.06],
+    ["ONEWEB", 87.9, 0.0002, 13.15],
+    ["COSMOS", 75.8, 0.0010, 13.10],
+]
+PLANES = 6
+SATELLITES_PER_PLANE = 4
+###############################################################################
+
+
+def get_checksum(line: str) -> int:
+    """Modulo 10 checksum of a line of elements, a minus counts one"""
+
+    return (
+        sum(int(c) for c in line if c.isdigit()) + line.count("-")
+    ) % 10
+
+
+def get_tle_lines(
+    number: int,
+    inclination: float,
+    right_ascension: float,
+    eccentricity: float,
+    mean_anomaly: float,
+    mean_motion: float,
+) -> list:
+    """Two lines of elements with epoch 2023-01-15 12:00 UTC"""
+
+    line_1 = (
+        f"1 {number:05d}U 20001A   23015.50000000  .00001000  00000-0 "
+        " 10000-3 0  999"
+    )
+    line_2 = (
+        f"2 {number:05d} {inclination:8.4f} {right_ascension:8.4f} "
+        f"{round(eccentricity * 1e7):07d} {90.0:8.4f} {mean_anomaly:8.4f} "
+        f"{mean_motion:11.8f}12345"
+    )
+
+    return [
+        f"{line_1}{get_checksum(line_1)}",
+        f"{line_2}{get_checksum(line_2)}",
+    ]
+
+
+def get_tle_content() -> str:
+    """Content of a tle file with every satellite of SHELLS"""
+
+    lines = []
+    number = 10000
+
+    for name, inclination, eccentricity, mean_motion in SHELLS:
+
+        for plane in range(PLANES):
+
+            for position in range(SATELLITES_PER_PLANE):
+
+                number += 1
+                lines.append(f"{name}-{number}")
+                lines += get_tle_lines(
+                    number,
+                    inclination,
+                    360.0 * plane / PLANES,
+                    eccentricity,
+                    (360.0 * position / SATELLITES_PER_PLANE + 7 * plane)
+                    % 360,
+                    mean_motion,
+                )
+
+    return "\n".join(lines) + "\n"
+
+
+###############################################################################
+@pytest.fixture
+def tle_file(tmp_path) -> str:
+    """Path of a tle file with the satellites of SHELLS"""
+
+    tle_file = tmp_path / "leo.txt"
+    tle_file.write_text(get_tle_content())
+
+    return str(tle_file)
+
+
+@pytest.fixture
+def catalog(tmp_path, tle_file):
+    """Output of TLE.read_catalog for tle_file"""
+
+    tle = TLE(satellite_brand="ALL", tle_directory=str(tmp_path))
+
+    return tle.read_catalog(tle_file, use_cache=False)
+
+
+@pytest.fixture
+def make_engine(tle_file, catalog):
+    """
+    Build an engine, e.g, FixWindow, for La Silla with the satellites
+    of tle_file in memory. Constraints and time parameters passed
+    replace the ones of OBSERVATION_CONSTRAINTS and TIME_PARAMETERS
+    """
+
+    def make_engine(engine, constraints: dict = None, **time_parameters):
+
+        compute_visibility = engine(
+            time_parameters={**TIME_PARAMETERS, **time_parameters},
+            observatory_data=observatories["lasilla"],
+            observation_constraints={
+                **OBSERVATION_CONSTRAINTS,
+                **(constraints or {}),
+            },
+            tle_file_location=tle_file,
+        )
+
+        compute_visibility.set_tle_index(TLE.get_tle_index(catalog))
+
+        return compute_visibility
+
+    return make_engine
@@ -0,0 +1,61 @@
+"""RA and DEC of whole arrays against ephem"""
+import numpy as np
+
+from leosTrack.track.equatorial import RADEC_TOLERANCE
+from leosTrack.track.vectorized import VectorizedWindow
+
+
+def get_direction(right_ascension: np.ndarray, declination: np.ndarray):
+    """Unit vectors of RA in hours and DEC in degrees"""
+
+    right_ascension = np.radians(15 * np.asarray(right_ascension))
+    declination = np.radians(declination)
+
+    return np.stack(
+        [
+            np.cos(declination) * np.cos(right_ascension),
+            np.cos(declination) * np.sin(right_ascension),
+            np.sin(declination),
+        ],
+        axis=-1,
+    )
+
+
+def test_ra_dec_within_tolerance_of_ephem(make_engine):
+
+    compute_visibility = make_engine(VectorizedWindow)
+    compute_visibility._set_observer()
+
+    time_grid = compute_visibility.get_time_grid()
+    equatorial_frame = compute_visibility.set_equatorial_frame()
+
+    rng = np.random.default_rng(0)
+    steps = rng.integers(0, time_grid.size, 500)
+    azimuth = rng.uniform(0, 360, steps.size)
+    altitude = rng.uniform(10, 90, steps.size)
+
+    [right_ascension, declination] = equatorial_frame.get_ra_dec(
+        azimuth, altitude, steps
+    )
+
+    ephem_ra_dec = []
+
+    for step, step_azimuth, step_altitude in zip(steps, azimuth, altitude):
+
+        compute_visibility._update_observer_date(time_grid[step].tolist())
+        ephem_ra_dec.append(
+            compute_visibility.get_satellite_ra_dec(
+                step_azimuth, step_altitude
+            )
+        )
+
+    # angle from the chord between the directions, exact for small
+    # angles unlike the arc cosine of their dot product
+    chord = np.linalg.norm(
+        get_direction(right_ascension, declination)
+        - get_direction(*np.transpose(ephem_ra_dec)),
+        axis=-1,
+    )
+    separation = 2 * np.arcsin(chord / 2)
+
+    assert separation.max() <= RADEC_TOLERANCE
@@ -0,0 +1,45 @@
+"""Time steps skipped between passes in FixWindow"""
+import numpy as np
+
+from leosTrack.track.fixtime import FixWindow
+
+
+def get_records(compute_visibility: FixWindow) -> dict:
+    """
+    Records of the visible satellites, keyed by their names. One
+    satellite of each orbital plane, to keep the test short
+    """
+
+    records = {}
+
+    for satellite in list(compute_visibility.tle_index)[::4]:
+
+        result = compute_visibility.compute_visibility_of_satellite(satellite)
+
+        if isinstance(result, list):
+            records[result[0]] = result[1]
+
+    return records
+
+
+def test_skip_ahead_matches_fixed_stepping(make_engine, monkeypatch):
+
+    # the whole night, so there are several passes of each satellite
+    # and long stretches of time steps to skip between them
+    constraints = {"sun_zenith_lowest": 90, "sun_zenith_highest": 180}
+
+    records = get_records(make_engine(FixWindow, constraints))
+
+    monkeypatch.setattr(
+        FixWindow, "_get_next_step", lambda self, *args, **kwargs: 0
+    )
+
+    fixed_records = get_records(make_engine(FixWindow, constraints))
+
+    assert len(records) > 0
+    assert records.keys() == fixed_records.keys()
+
+    for satellite, satellite_records in records.items():
+        np.testing.assert_array_equal(
+            satellite_records, fixed_records[satellite]
+        )
@@ -0,0 +1,81 @@
+"""Columns formatted at once against printf"""
+import numpy as np
+import pytest
+
+from leosTrack.output import join_columns
+from leosTrack.units import ConvertUnits
+
+###############################################################################
+# formats of the output columns, e.g, %08.3f, and a few more
+FORMATS = [
+    [8, 3, True],
+    [7, 3, True],
+    [6, 3, True],
+    [9, 3, True],
+    [8, 3, False],
+    [3, 0, False],
+    [1, 5, False],
+]
+
+
+def get_values() -> np.ndarray:
+    """Random values, values at and next to ties and special values"""
+
+    rng = np.random.default_rng(0)
+
+    random_values = rng.uniform(-1e4, 1e4, 20_000)
+    small_values = rng.uniform(-2, 2, 5_000)
+
+    # halves of the last decimal and their neighbours, printf rounds the
+    # binary value, which may be on either side of the half
+    ties = (np.arange(-5_000, 5_000) + 0.5) / 1000
+    ties = np.concatenate(
+        [ties, np.nextafter(ties, np.inf), np.nextafter(ties, -np.inf)]
+    )
+
+    special_values = np.array(
+        [0.0, -0.0, -1e-9, 1e-9, 0.9995, -0.9995, 9.9995, 2.0**53]
+        + [1e15, -1e15, np.nan, np.inf, -np.inf]
+    )
+
+    return np.concatenate(
+        [random_values, small_values, ties, ties / 100, special_values]
+    )
+
+
+@pytest.mark.parametrize("width, decimals, zero_pad", FORMATS)
+def test_format_fixed_point(width, decimals, zero_pad):
+
+    values = get_values()
+    string_format = f"%{'0' * zero_pad}{width}.{decimals}f"
+
+    strings = ConvertUnits.format_fixed_point(
+        values, width, decimals, zero_pad
+    )
+
+    assert strings.tolist() == [string_format % value for value in values]
+
+
+def test_format_fixed_point_empty():
+
+    strings = ConvertUnits.format_fixed_point(np.empty(0), 8, 3, True)
+
+    assert strings.size == 0
+
+
+def test_join_columns():
+
+    columns = [
+        np.array(["ONEWEB-0008", "STARLINK-1", "ÑANDÚ-7", ""]),
+        ConvertUnits.format_fixed_point(
+            np.array([1.5, -20.25, 300.125, 0.0]), 8, 3, True
+        ),
+        np.array(["a", "", "bb", "c"]),
+    ]
+
+    rows = "".join(
+        "\t".join(row) + "\n" for row in zip(*[c.tolist() for c in columns])
+    )
+
+    assert join_columns(columns) == rows
+    assert join_columns([np.empty(0, dtype=str)]) == ""
@@ -0,0 +1,36 @@
+"""Error of the interpolated tracks of AdaptiveTime"""
+import numpy as np
+import pytest
+
+from leosTrack.track.adaptivetime import AdaptiveTime
+
+###############################################################################
+# an hour of the morning of 2023-01-16 at La Silla every second
+TIME_PARAMETERS = {"hour": 5, "minute": 0, "observing_time": 60, "delta": 1}
+###############################################################################
+
+
+@pytest.mark.parametrize("tolerance", [1.0, 0.1, 0.05, 0.02])
+def test_interpolation_error_within_tolerance(make_engine, tolerance):
+
+    compute_visibility = make_engine(AdaptiveTime, **TIME_PARAMETERS)
+    compute_visibility.set_interpolation(60, tolerance)
+
+    time_grid = compute_visibility.get_time_grid()
+
+    # one satellite of every other plane of each shell
+    for satellite_name in list(compute_visibility.tle_index)[::8]:
+
+        satellite = compute_visibility._set_dark_satellite(satellite_name)
+
+        position = compute_visibility.interpolate_satellite(
+            satellite, time_grid
+        )[1]
+        sgp4_position = compute_visibility.propagate_satellite(
+            satellite, time_grid
+        )[1]
+
+        # km to meters
+        error = np.linalg.norm(position - sgp4_position, axis=0) * 1e3
+
+        assert error.max() <= tolerance
@@ -0,0 +1,181 @@
+"""Mirror of groups of satellites against a local HTTP server"""
+import http.server
+import json
+import os
+import threading
+
+import pytest
+
+from leosTrack.tle import TLE
+
+from conftest import get_tle_content
+
+###############################################################################
+ETAG = '"group-v1"'
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves the groups in server.groups, {path: content}, with an ETag,
+    answers 304 when If-None-Match matches, redirects the paths in
+    server.redirects, {path: location}, and cuts the responses short
+    when server.broken is set
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+
+        self.server.requests.append(
+            [self.path, self.headers.get("If-None-Match")]
+        )
+
+        if self.path in self.server.redirects:
+
+            self.send_response(302)
+            self.send_header("Location", self.server.redirects[self.path])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+            return
+
+        content = self.server.groups.get(self.path)
+
+        if content is None:
+
+            self.send_error(404)
+
+            return
+
+        if self.headers.get("If-None-Match") == ETAG:
+
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+
+        if self.server.broken:
+            # the connection drops in the middle of the content
+            self.wfile.write(content[: len(content) // 2])
+            self.close_connection = True
+
+            return
+
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Stand-in server on a free port of localhost"""
+
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), StandInHandler
+    )
+    server.groups = {"/oneweb.txt": get_tle_content().encode("ascii")}
+    server.redirects = {}
+    server.requests = []
+    server.broken = False
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def get_tle(server, tmp_path, path: str = "") -> TLE:
+    """TLE that requests the groups every time, max_age is 0"""
+
+    return TLE(
+        satellite_brand="oneweb",
+        tle_directory=str(tmp_path),
+        url=f"http://127.0.0.1:{server.server_port}{path}",
+        max_age=0,
+    )
+
+
+def test_download_with_etag(server, tmp_path):
+
+    tle_name, _ = get_tle(server, tmp_path).download()
+
+    with open(tmp_path / "mirror" / "oneweb.json", encoding="utf-8") as file:
+        metadata = json.load(file)
+
+    assert metadata["etag"] == ETAG
+    assert (tmp_path / "mirror" / "oneweb.txt").read_bytes() == (
+        server.groups["/oneweb.txt"]
+    )
+    assert (tmp_path / tle_name).read_bytes() == server.groups[
+        "/oneweb.txt"
+    ].rstrip(b"\n")
+    assert server.requests == [["/oneweb.txt", None]]
+
+
+def test_not_modified_keeps_file(server, tmp_path):
+
+    get_tle(server, tmp_path).download()
+
+    group_location = tmp_path / "mirror" / "oneweb.txt"
+    modified = group_location.stat().st_mtime_ns
+
+    # the server content changes, but the ETag does not
+    server.groups["/oneweb.txt"] = b"changed"
+
+    get_tle(server, tmp_path).download()
+
+    assert server.requests[-1] == ["/oneweb.txt", ETAG]
+    assert group_location.stat().st_mtime_ns == modified
+    assert group_location.read_bytes() != b"changed"
+
+
+def test_redirect(server, tmp_path):
+
+    server.redirects["/moved/oneweb.txt"] = "/oneweb.txt"
+
+    get_tle(server, tmp_path, "/moved").download()
+
+    assert [path for path, _ in server.requests] == [
+        "/moved/oneweb.txt",
+        "/oneweb.txt",
+    ]
+    assert (tmp_path / "mirror" / "oneweb.txt").read_bytes() == (
+        server.groups["/oneweb.txt"]
+    )
+
+
+def test_failed_download_keeps_previous_file(server, tmp_path):
+
+    tle_name, _ = get_tle(server, tmp_path).download()
+
+    group_location = tmp_path / "mirror" / "oneweb.txt"
+    metadata_location = tmp_path / "mirror" / "oneweb.json"
+    previous_content = group_location.read_bytes()
+
+    # the mirror is older than the content in the server
+    metadata = json.loads(metadata_location.read_text())
+    metadata["etag"] = '"group-v0"'
+    metadata_location.write_text(json.dumps(metadata))
+
+    server.groups["/oneweb.txt"] = previous_content.replace(b"ONEWEB", b"NEW")
+    server.broken = True
+
+    # the local copy is used
+    assert get_tle(server, tmp_path).download()[0] == tle_name
+
+    assert server.requests[-1] == ["/oneweb.txt", '"group-v0"']
+    assert group_location.read_bytes() == previous_content
+    assert sorted(os.listdir(tmp_path / "mirror")) == [
+        "oneweb.json",
+        "oneweb.txt",
+    ]
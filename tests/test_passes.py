@@ -0,0 +1,35 @@
+"""Passes cut by the observation window"""
+from leosTrack.track.passes import PassPredictor
+
+from conftest import OBSERVATION_CONSTRAINTS
+
+
+def test_peak_of_truncated_pass(make_engine):
+
+    compute_visibility = make_engine(PassPredictor)
+    compute_visibility.set_twilight_window()
+
+    lowest_altitude = OBSERVATION_CONSTRAINTS["lowest_altitude_satellite"]
+    truncated = 0
+
+    for satellite in compute_visibility.tle_index:
+
+        result = compute_visibility.compute_visibility_of_satellite(satellite)
+
+        if isinstance(result, list) is False:
+            continue
+
+        for _, pass_data in result:
+
+            start_altitude = pass_data[2]
+            peak_altitude = pass_data[5]
+            finish_altitude = pass_data[11]
+
+            # still above the lowest altitude where twilight ends
+            truncated += max(start_altitude, finish_altitude) > (
+                lowest_altitude + 1
+            )
+
+            assert peak_altitude >= max(start_altitude, finish_altitude)
+
+    assert truncated > 0
@@ -0,0 +1,76 @@
+"""Satellites discarded by the prefilter are never visible"""
+from leosTrack.tle import TLE
+from leosTrack.track.fixtime import FixWindow
+from leosTrack.track.prefilter import filter_satellites
+
+from conftest import OBSERVATION_CONSTRAINTS, get_tle_lines
+
+###############################################################################
+# CONSTANTS
+# low inclination orbits around the bound of the orbits that reach the
+# lowest altitude from La Silla, latitude -29.26
+INCLINATIONS = range(1, 30, 3)
+MEAN_MOTIONS = [15.5, 14.0, 12.5]  # revolutions per day
+PLANES = [0.0, 180.0]
+###############################################################################
+
+
+def test_discarded_satellites_are_not_visible(
+    tmp_path, make_engine, monkeypatch
+):
+
+    lines = []
+    number = 20000
+
+    for inclination in INCLINATIONS:
+        for mean_motion in MEAN_MOTIONS:
+            for right_ascension in PLANES:
+
+                number += 1
+                lines.append(f"LOW-{number}")
+                lines += get_tle_lines(
+                    number,
+                    inclination,
+                    right_ascension,
+                    0.001,
+                    0.0,
+                    mean_motion,
+                )
+
+    tle_file = tmp_path / "low.txt"
+    tle_file.write_text("\n".join(lines) + "\n")
+
+    tle = TLE(satellite_brand="ALL", tle_directory=str(tmp_path))
+    catalog = tle.read_catalog(str(tle_file), use_cache=False)
+    satellites = tle.get_satellites(catalog)
+
+    # every time step of the night counts, not only the twilight ones,
+    # and none is skipped, see FixWindow._get_next_step
+    monkeypatch.setattr(
+        FixWindow, "_get_next_step", lambda self, *args, **kwargs: 0
+    )
+
+    compute_visibility = make_engine(
+        FixWindow, {"sun_zenith_lowest": 0, "sun_zenith_highest": 180}
+    )
+    compute_visibility.set_tle_index(TLE.get_tle_index(catalog))
+
+    [kept, _, number_out_of_reach] = filter_satellites(
+        catalog,
+        satellites,
+        [compute_visibility.observatory_data["latitude"]],
+        OBSERVATION_CONSTRAINTS["lowest_altitude_satellite"],
+    )
+
+    discarded = [
+        satellite for satellite in satellites if satellite not in kept
+    ]
+
+    assert number_out_of_reach == len(discarded) > 0
+    assert len(kept) > 0
+
+    for satellite in discarded:
+        assert (
+            compute_visibility.compute_visibility_of_satellite(satellite)
+            == satellite
+        )
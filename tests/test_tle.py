@@ -0,0 +1,67 @@
+"""Parse of tle files with corrupt records"""
+from leosTrack.tle import TLE
+
+###############################################################################
+TLE_CONTENT = (
+    "ONEWEB-0001\n"
+    "1 10001U 20001A   23015.50000000  .00001000  00000-0  10000-3 0  9996\n"
+    "2 10001  87.9000 181.6873 0006354 272.0895 222.6128 13.14501013123450\n"
+    "STARLINK-0014\n"
+    "1 10014U 20001A   23015.50000000  .00001000  00000-0  10000-3 0  9990\n"
+    "2 10014  53.2000 206.5918 0018290 192.3113 245.0121 15.05053394123454\n"
+    "ONEWEB-0108\n"
+    "1 10108U 20001A   23015.50000000  .00001000  00000-0  10000-3 0  9994\n"
+    "2 10108  87.9000 179.4477 0018439 221.7660   9.3652 13.15192251123454\n"
+)
+
+
+def read_catalog(tmp_path, tle_content: str):
+    """Catalog of tle_content written to a file in tmp_path"""
+
+    tle_file = tmp_path / "tle.txt"
+    tle_file.write_text(tle_content)
+
+    tle = TLE(satellite_brand="ALL", tle_directory=str(tmp_path))
+
+    return tle.read_catalog(str(tle_file), use_cache=False)
+
+
+def test_valid_records(tmp_path):
+
+    catalog = read_catalog(tmp_path, TLE_CONTENT)
+
+    assert catalog["satellite"].tolist() == [
+        "ONEWEB-0001-ID-0000",
+        "STARLINK-0014-ID-0001",
+        "ONEWEB-0108-ID-0002",
+    ]
+
+
+def test_corrupt_epoch_is_dropped(tmp_path):
+    # four characters of the epoch of STARLINK-0014, checksum left stale
+    line_1 = (
+        "1 10014U 20001A   23015.50000000  .00001000  00000-0  10000-3 0  9990"
+    )
+    tle_content = TLE_CONTENT.replace(
+        line_1, line_1.replace("23015.50000000", "23015.5ab?x900")
+    )
+
+    catalog = read_catalog(tmp_path, tle_content)
+
+    assert catalog["satellite"].tolist() == [
+        "ONEWEB-0001-ID-0000",
+        "ONEWEB-0108-ID-0002",
+    ]
+
+
+def test_letter_with_valid_checksum_is_dropped(tmp_path):
+    # a zero replaced by a letter leaves the checksum unchanged
+    tle_content = TLE_CONTENT.replace(" 0018439 ", " 0a18439 ")
+
+    catalog = read_catalog(tmp_path, tle_content)
+
+    assert catalog["satellite"].tolist() == [
+        "ONEWEB-0001-ID-0000",
+        "STARLINK-0014-ID-0001",
+    ]
+    assert abs(catalog["eccentricity"][0] - 6354e-7) < 1e-12
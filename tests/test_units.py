@@ -0,0 +1,73 @@
+"""Sexagesimal strings of whole arrays against the scalar converters"""
+import numpy as np
+
+from leosTrack.units import ConvertUnits
+
+CONVERT = ConvertUnits()
+
+
+def get_values(upper: float) -> np.ndarray:
+    """
+    Random values below upper and values whose seconds round to 60,
+    which carry to the minutes and to the whole units. The seconds are
+    away from the halves of the last decimal, that the conversion from
+    radians may move to either side
+    """
+
+    rng = np.random.default_rng(0)
+
+    whole = np.arange(int(upper))
+    carry = np.concatenate(
+        [
+            whole + (59 + 59.9962 / 60) / 60,
+            whole + (59 + 59.9994 / 60) / 60,
+            whole + (30 + 59.9971 / 60) / 60,
+            whole + 59.9946 / 3600,
+        ]
+    )
+
+    return np.concatenate([rng.uniform(0, upper, 10_000), carry])
+
+
+def test_format_hh_mm_ss():
+
+    hours = get_values(24)
+
+    strings = ConvertUnits.format_hh_mm_ss(hours)
+
+    expected = [
+        "{:02d}:{:02d}:{:05.2f}".format(
+            *CONVERT.right_ascension_in_radians_to_hh_mm_ss(
+                np.radians(15 * value)
+            )
+        )
+        for value in hours
+    ]
+
+    assert strings.tolist() == expected
+    assert not any(string.endswith("60.00") for string in expected)
+    assert "00:00:00.00" in expected
+
+
+def test_format_dd_mm_ss():
+
+    degrees = get_values(90)
+    # declinations between -1 and 0 degrees keep their sign
+    degrees = np.concatenate([degrees, -degrees, [-0.5, -1e-6]])
+
+    strings = ConvertUnits.format_dd_mm_ss(degrees)
+
+    expected = []
+
+    for value in degrees:
+
+        [dd, mm, ss] = CONVERT.declination_in_radians_to_dd_mm_ss(
+            np.radians(value)
+        )
+
+        sign = "-" if value < 0 else "+"
+        expected.append(f"{sign}{abs(dd):02d}:{mm:02d}:{ss:05.2f}")
+
+    assert strings.tolist() == expected
+    assert not any(string.endswith("60.00") for string in expected)
+    assert strings[-2] == "-00:30:00.00"
@@ -1,13 +1,23 @@
 """Spot visible LEO-sats with low resolution track"""
 import multiprocessing as mp
+import sys
 import time
 from configparser import ConfigParser, ExtendedInterpolation
 
-from leosTrack.output import OutputFile
-from leosTrack.tle import TLE
+import numpy as np
+
+from leosTrack.output import OutputFile, StreamingOutputFile
+from leosTrack.tle import TLE, TLE_MAX_AGE, TLE_URL
 from leosTrack.utils.configfile import ConfigurationFile
 from leosTrack.utils.filedir import FileDirectory
 from leosTrack.track.fixtime import FixWindow
+from leosTrack.track import worker
+from leosTrack.track.multisite import MultiSiteWindow
+from leosTrack.track.passes import PassPredictor
+from leosTrack.track.interpolation import INTERPOLATION_TOLERANCE
+from leosTrack.track.prefilter import filter_satellites
+from leosTrack.track.refine import RefineWindow, get_refine_task
+from leosTrack.track.vectorized import VectorizedWindow
 from observatories import observatories
 
 ###############################################################################
@@ -29,9 +39,17 @@ if __name__ == "__main__":
     year = int(time_parameters["year"])
     month = int(time_parameters["month"])
     day = int(time_parameters["day"])
-    window = time_parameters["window"]
+    # several windows are separated by commas, e.g, morning, evening
+    windows = [
+        window.strip() for window in time_parameters["window"].split(",")
+    ]
+    # optional, track every night up to this date, e.g, 2023-01-22
+    last_day = time_parameters.get("last_day", None)
+
+    date = f"{year}_{month:02d}_{day:02d}_{'_'.join(windows)}"
 
-    date = f"{year}_{month:02d}_{day:02d}_{window}"
+    if last_day is not None:
+        date = f"{date}_to_{last_day.replace('-', '_')}"
 
     # Set output directory
     output_directory = parser.get("directory", "output")
@@ -44,10 +62,16 @@ if __name__ == "__main__":
 
     if download_tle:
 
-        output_directory = f"{output_directory}/{satellite_brand}_{date}"
+        # satellite = oneweb, starlink -> oneweb_starlink
+        groups = "_".join(TLE.get_groups(satellite_brand))
+        output_directory = f"{output_directory}/{groups}_{date}"
 
         tle = TLE(
-            satellite_brand=satellite_brand, tle_directory=output_directory
+            satellite_brand=satellite_brand,
+            tle_directory=output_directory,
+            mirror_directory=parser.get("tle", "mirror", fallback=None),
+            url=parser.get("tle", "url", fallback=TLE_URL),
+            max_age=parser.getfloat("tle", "max_age", fallback=TLE_MAX_AGE),
         )
 
         tle_name, tle_time_stamp = tle.download()
@@ -63,11 +87,16 @@ if __name__ == "__main__":
             satellite_brand=satellite_brand, tle_directory=output_directory
         )
 
-    tle.update_tle_file(f"{tle_name}")
-    tle_file_location = f"{output_directory}/unique_{tle_name}"
+    tle_file_location = f"{output_directory}/{tle_name}"
     ###########################################################################
     print("Get list of satellites from TLE file", end="\n")
-    satellites_list = tle.get_satellites_from_tle(f"{tle_file_location}")
+    # satellites get a unique identifier, e.g, ONEWEB-0008-ID-0007
+    # parsed catalog is cached next to the tle file, keyed by its content
+    use_cache = parser.getboolean("tle", "cache", fallback=True)
+    tle_catalog = tle.read_catalog(f"{tle_file_location}", use_cache)
+    satellites_list = tle.get_satellites(tle_catalog)
+    # workers build satellites from memory
+    tle_index = tle.get_tle_index(tle_catalog)
     ###########################################################################
     # reload to get it as a tuple again
     print("Compute visibility of satellite", end="\n")
@@ -76,35 +105,472 @@ if __name__ == "__main__":
         parser.items("time")
     )
 
-    observatory_name = parser.get("observation", "observatory")
-    observatory_data = observatories[f"{observatory_name}"]
+    # several observatories are separated by commas, e.g, lasilla, paranal
+    observatory_names = [
+        name.strip()
+        for name in parser.get("observation", "observatory").split(",")
+    ]
 
     observations_constraints = ConfigurationFile().section_to_dictionary(
         parser.items("observation")
     )
 
-    # compute_visibility = ComputeVisibility(
-    compute_visibility = FixWindow(
-        time_parameters=time_parameters,
-        observatory_data=observatory_data,
-        observation_constraints=observations_constraints,
-        tle_file_location=tle_file_location,
-    )
+    # engine = loop: FixWindow, steps through the window one at a time
+    # engine = vectorized: VectorizedWindow, array operations over the
+    # whole window. Both produce the same output
+    # engine = passes: PassPredictor, one row per pass with exact start,
+    # culmination and end
+    engine = parser.get("configuration", "engine", fallback="loop")
+
+    if engine == "vectorized":
+        visibility_engine = VectorizedWindow
+    elif engine == "passes":
+        visibility_engine = PassPredictor
+    else:
+        visibility_engine = FixWindow
+
+    if len(observatory_names) > 1:
+        # satellites are propagated once for all the observatories
+        if engine != "vectorized":
+            print("Several observatories need: engine = vectorized")
+            sys.exit()
+
+        compute_visibility = MultiSiteWindow(
+            time_parameters=time_parameters,
+            observatories_data={
+                name: observatories[name] for name in observatory_names
+            },
+            observation_constraints=observations_constraints,
+            tle_file_location=tle_file_location,
+        )
+
+        sites = compute_visibility.sites
+
+    else:
+
+        compute_visibility = visibility_engine(
+            time_parameters=time_parameters,
+            observatory_data=observatories[observatory_names[0]],
+            observation_constraints=observations_constraints,
+            tle_file_location=tle_file_location,
+        )
+
+        sites = {observatory_names[0]: compute_visibility}
+
+    compute_visibility.set_tle_index(tle_index)
+    # satellites in deep space orbits or whose orbits never get above
+    # lowest_altitude_satellite for any of the observatories are not
+    # sent to the workers
+    if parser.getboolean("configuration", "prefilter", fallback=True):
+
+        [
+            satellites_list,
+            number_deep_space,
+            number_out_of_reach,
+        ] = filter_satellites(
+            tle_catalog,
+            satellites_list,
+            [
+                site_visibility.observatory_data["latitude"]
+                for site_visibility in sites.values()
+            ],
+            observations_constraints["lowest_altitude_satellite"],
+        )
+
+        print(
+            f"Prefilter: discard {number_deep_space} deep space and "
+            f"{number_out_of_reach} out of reach satellites, "
+            f"{len(satellites_list)} left"
+        )
+
+    # radec = ephem: ephem.Observer.radec_of at every visible time step
+    # radec = numpy: whole time grid at once, within 0.5" of ephem. Only
+    # with engine = vectorized
+    radec_method = parser.get("configuration", "radec", fallback="ephem")
+    compute_visibility.set_radec_method(radec_method)
 
     number_processes = parser.getint("configuration", "processes")
 
-    with mp.Pool(processes=number_processes) as pool:
-        results = pool.map(
-            compute_visibility.compute_visibility_of_satellite, satellites_list
+    # a single night or every night of a date range. The pool, the
+    # satellites and the observer are shared by all of them
+    nights = compute_visibility.get_nights(last_day, windows)
+    night_states = {}
+    # with fewer satellites than chunks for every process, each night is
+    # split in shards of its time grid, see worker.get_number_of_shards
+    night_shards = {}
+    twilight = parser.getboolean("time", "twilight", fallback=True)
+
+    for night, night_parameters in nights:
+
+        compute_visibility.set_night(night_parameters)
+        number_of_steps = 0
+
+        if len(nights) > 1:
+            print(f"Night: {night}")
+
+        for site, site_visibility in sites.items():
+
+            if len(sites) > 1:
+                print(f"Observatory: {site}")
+
+            # satellites are not visible outside the twilight intervals,
+            # where the sun zenith is between sun_zenith_lowest and
+            # sun_zenith_highest
+            if twilight:
+
+                twilight_intervals = site_visibility.set_twilight_window()
+
+                twilight_intervals = [
+                    " ".join(
+                        np.datetime_as_string(np.array(interval), unit="s")
+                    )
+                    for interval in twilight_intervals
+                ]
+
+                print(
+                    "Twilight intervals [UT]: "
+                    f"{', '.join(twilight_intervals)}"
+                )
+                # keep them in the copy of the configuration file in the
+                # output
+                if parser.has_section("twilight") is False:
+                    parser["twilight"] = {}
+
+                twilight_key = "_".join(
+                    [night] * (len(nights) > 1) + [site] * (len(sites) > 1)
+                )
+                parser["twilight"][twilight_key or "intervals"] = "\n".join(
+                    twilight_intervals
+                )
+
+            # Sun coordinates only depend on time and observatory, compute
+            # them once for all satellites
+            sun_ephemeris = site_visibility.set_sun_ephemeris()
+            evaluations_saved = sun_ephemeris.evaluations_saved(
+                len(satellites_list)
+            )
+            print(
+                f"Sun ephemeris: {sun_ephemeris.time_grid.size} time steps, "
+                f"{evaluations_saved} evaluations saved"
+            )
+
+            # sidereal time, nutation and precession, also shared
+            if radec_method == "numpy":
+                site_visibility.set_equatorial_frame()
+
+            number_of_steps = max(
+                number_of_steps, sun_ephemeris.time_grid.size
+            )
+
+        # passes are found over the whole night
+        night_shards[night] = (
+            1
+            if engine == "passes"
+            else worker.get_number_of_shards(
+                len(satellites_list), number_processes, number_of_steps
+            )
         )
 
-    ###########################################################################
-    # Get string formats for output files
-    output = OutputFile(results, output_directory)
-    # Save data
+        if night_shards[night] > 1:
+            print(f"Time grid split in {night_shards[night]} shards")
+
+        shard_states = compute_visibility.get_shard_states(night_shards[night])
+
+        for shard, shard_state in enumerate(shard_states):
+            night_states[(night, shard)] = shard_state
+
+    # each night of a date range and each observatory go to their own
+    # directory, e.g, output/2023_01_16_morning/lasilla
+    night_directories = {
+        (night, site): "/".join(
+            [output_directory]
+            + [night] * (len(nights) > 1)
+            + [site] * (len(sites) > 1)
+        )
+        for night in night_shards
+        for site in sites
+    }
+
+    # night by night, so workers move to another night once, and the
+    # shards of a satellite one after the other
+    tasks = [
+        (night, shard, satellite)
+        for night in night_shards
+        for satellite in satellites_list
+        for shard in range(night_shards[night])
+    ]
+    sharded_results = worker.ShardedResults(night_shards)
+
+    # workers get the engine once, then only the satellite names
+    chunk_size = parser.getint(
+        "configuration",
+        "chunksize",
+        fallback=worker.get_chunk_size(len(tasks), number_processes),
+    )
+
+    # either tsv, parquet, feather or hdf5
+    output_format = parser.get("file", "format", fallback="tsv")
+    OutputFile.check_output_format(output_format)
+    # row of each satellite in the simple file
+    simple_rule = parser.get("file", "simple_rule", fallback="earliest")
+    OutputFile.check_simple_rule(simple_rule)
+
+    # write results as workers finish them instead of keeping all of
+    # them in memory. Only for tsv files and not available for passes
+    streaming = parser.getboolean("file", "streaming", fallback=False)
+    streaming &= engine != "passes" and output_format == "tsv"
+
     details_name = parser.get("file", "complete")
     visible_name = parser.get("file", "simple")
-    output.save_data(simple_name=visible_name, full_name=details_name)
+    # one row per pass, only written if set
+    summary_name = parser.get("file", "summary", fallback=None)
+    time_delta = compute_visibility.time_delta.total_seconds()
+
+    # fine tracks around the passes found above, computed in the same
+    # pool and saved to the refine directory of each night
+    refine = parser.has_section("refine")
+    refine_windows = None
+    refine_nights = None
+    refine_tasks = []
+
+    if refine:
+
+        if engine == "passes":
+            print("refine is not available with: engine = passes")
+            sys.exit()
+
+        # seconds added before and after each pass, a time step by default
+        refine_padding = parser.getfloat(
+            "refine", "padding", fallback=time_delta
+        )
+
+        refine_windows = {}
+
+        for site in sites:
+
+            refine_window = RefineWindow(
+                time_parameters={
+                    **time_parameters,
+                    "delta": parser.getfloat("refine", "delta"),
+                },
+                observatory_data=observatories[site],
+                observation_constraints=observations_constraints,
+                tle_file_location=tle_file_location,
+            )
+
+            refine_window.set_tle_index(tle_index)
+            refine_window.set_radec_method(radec_method)
+            refine_window.set_interpolation(
+                parser.getfloat("refine", "coarse_delta", fallback=time_delta),
+                parser.getfloat(
+                    "refine", "tolerance", fallback=INTERPOLATION_TOLERANCE
+                ),
+            )
+
+            refine_windows[site] = refine_window
+
+        # as in the coarse run, the sun ephemeris and the equatorial
+        # frame of the fine time grid are computed once per night
+        refine_nights = {}
+
+        for night, night_parameters in nights:
+
+            for site, refine_window in refine_windows.items():
+
+                refine_window.set_night(night_parameters)
+
+                if twilight:
+                    refine_window.set_twilight_window()
+
+                refine_window.set_sun_ephemeris()
+
+                if radec_method == "numpy":
+                    refine_window.set_equatorial_frame()
+
+                refine_nights[(night, site)] = refine_window.get_night_state()
+
+    initargs = (
+        compute_visibility,
+        night_states,
+        refine_windows,
+        refine_nights,
+    )
+
+    # bytes and time the pool spends pickling, off by default since it
+    # pickles the whole worker state once more
+    if parser.getboolean("configuration", "diagnostics", fallback=False):
+
+        [task_bytes, task_time, state_bytes] = worker.get_task_overhead(
+            initargs, tasks, number_processes, chunk_size
+        )
+        print(
+            f"Pickled per task: {task_bytes:.0f} bytes in "
+            f"{task_time * 1e6:.0f} us, worker state of {state_bytes} "
+            "bytes sent to each process"
+        )
+
+    with mp.Pool(
+        processes=number_processes,
+        initializer=worker.init_worker,
+        initargs=initargs,
+    ) as pool:
+
+        if streaming:
+
+            outputs = {
+                key: StreamingOutputFile(
+                    night_directory,
+                    simple_name=visible_name,
+                    full_name=details_name,
+                    simple_rule=simple_rule,
+                    summary_name=summary_name,
+                    time_delta=time_delta,
+                )
+                for key, night_directory in night_directories.items()
+            }
+
+            for night, shard, satellite, shard_result in pool.imap_unordered(
+                worker.compute_visibility_in_shard,
+                tasks,
+                chunksize=chunk_size,
+            ):
+
+                # empty until all the shards of the satellite are done
+                for result in sharded_results.add(
+                    night, shard, satellite, shard_result
+                ):
+
+                    if len(sites) == 1:
+                        result = {observatory_names[0]: result}
+
+                    for site, site_result in result.items():
+
+                        outputs[(night, site)].add_result(site_result)
+
+                        if refine:
+                            refine_tasks.append(
+                                get_refine_task(
+                                    night,
+                                    site,
+                                    site_result,
+                                    time_delta,
+                                    refine_padding,
+                                )
+                            )
+
+            for output in outputs.values():
+                output.close()
+
+        else:
+
+            results = {key: [] for key in night_directories}
+
+            for night, shard, satellite, shard_result in pool.imap(
+                worker.compute_visibility_in_shard,
+                tasks,
+                chunksize=chunk_size,
+            ):
+
+                # empty until all the shards of the satellite are done
+                for result in sharded_results.add(
+                    night, shard, satellite, shard_result
+                ):
+
+                    if len(sites) == 1:
+                        result = {observatory_names[0]: result}
+
+                    for site, site_result in result.items():
+
+                        results[(night, site)].append(site_result)
+
+                        if refine:
+                            refine_tasks.append(
+                                get_refine_task(
+                                    night,
+                                    site,
+                                    site_result,
+                                    time_delta,
+                                    refine_padding,
+                                )
+                            )
+
+        if refine:
+            # only satellites visible in the coarse run, in the order of
+            # the satellites list since streaming gets them unordered
+            satellite_order = {
+                satellite: idx for idx, satellite in enumerate(satellites_list)
+            }
+
+            refine_tasks = sorted(
+                [task for task in refine_tasks if task is not None],
+                key=lambda task: satellite_order[task[2]],
+            )
+
+            refine_results = {key: [] for key in night_directories}
+
+            for night, site, result in pool.imap(
+                worker.refine_visibility,
+                refine_tasks,
+                chunksize=worker.get_chunk_size(
+                    len(refine_tasks), number_processes
+                ),
+            ):
+                refine_results[(night, site)].append(result)
+
+    ###########################################################################
+    # Get string formats for output files, streaming saved them already
+    if streaming is False:
+
+        for key, night_directory in night_directories.items():
+
+            if len(night_directories) > 1:
+                print(f"Output: {night_directory}")
+
+            output = OutputFile(results[key], night_directory)
+
+            if engine == "passes":
+
+                passes_name = parser.get("file", "passes", fallback="passes")
+                output.save_passes(passes_name, output_format)
+
+                continue
+
+            output.save_data(
+                simple_name=visible_name,
+                full_name=details_name,
+                output_format=output_format,
+                simple_rule=simple_rule,
+            )
+
+            if summary_name is not None:
+                output.save_pass_summary(
+                    summary_name, time_delta, output_format
+                )
+    ###########################################################################
+    # fine tracks, e.g, output/2023_01_16_morning/refine
+    if refine:
+
+        refine_delta = parser.getfloat("refine", "delta")
+
+        for key, night_directory in night_directories.items():
+
+            print(f"Refined output: {night_directory}/refine")
+
+            output = OutputFile(
+                refine_results[key], f"{night_directory}/refine"
+            )
+
+            output.save_data(
+                simple_name=visible_name,
+                full_name=details_name,
+                output_format=output_format,
+                simple_rule=simple_rule,
+            )
+
+            if summary_name is not None:
+                output.save_pass_summary(
+                    summary_name, refine_delta, output_format
+                )
     ###########################################################################
     with open(
         f"{output_directory}/{CONFIG_FILE_NAME}.ini", "w", encoding="utf-8"